@@ -0,0 +1,226 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from config.metrics import timed
+
+# Lo unico que se cachea de un token: nunca el hash de la contraseña ni los
+# permisos del usuario. is_staff evita una consulta en IsAdminUser y en el
+# muestreo del perfilado (config.profiling)
+CachedToken = namedtuple("CachedToken", ["key", "user_id", "is_active", "is_staff"])
+
+
+def cached_token(token):
+    user = token.user
+    return CachedToken(token.key, token.user_id, user.is_active, user.is_staff)
+
+
+def rebuild_token(entry):
+    """
+    ``Token`` y ``User`` a partir de la entrada cacheada, sin consultas: los
+    demas campos del usuario quedan diferidos y el ORM los lee de la base de
+    datos solo si la peticion los usa (p. ej. ``is_staff`` en IsAdminUser).
+    """
+    User = get_user_model()
+    known = {
+        User._meta.pk.attname: entry.user_id,
+        "is_active": entry.is_active,
+        "is_staff": entry.is_staff,
+    }
+    # from_db espera los valores en el orden de los campos del modelo
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in known]
+    user = User.from_db(
+        router.db_for_read(User), names, [known[name] for name in names]
+    )
+    token = Token.from_db(
+        router.db_for_read(Token), ["key", "user_id"], [entry.key, entry.user_id]
+    )
+    token.user = user
+    return token
+
+
+class TokenCache:
+    """
+    Cache de tokens en dos niveles:
+
+    1. LRU local al proceso, acotado en entradas y con TTL corto.
+    2. Nivel compartido opcional sobre una cache de Django (Redis en
+       produccion, LocMemCache como sustituto local).
+
+    Con nivel compartido, cada entrada local recuerda la generacion de
+    revocaciones vigente al guardarla. Borrar un token o cambiar al usuario
+    incrementa la generacion compartida, y todos los workers descartan sus
+    entradas locales anteriores en el siguiente acceso (una lectura de la
+    cache compartida por peticion). Sin nivel compartido solo se invalida el
+    propio proceso: es para un unico proceso en desarrollo.
+
+    Guarda solo la clave, el id del usuario, ``is_active`` e ``is_staff``
+    (``CachedToken``); un acierto reconstruye el ``Token`` y su ``user`` sin
+    tocar la base de datos.
+    """
+
+    # La version cambia con el formato de CachedToken: las entradas viejas
+    # del nivel compartido quedan inalcanzables
+    key_prefix = "auth:token:v2:"
+    generation_key = "auth:token:generation"
+
+    def __init__(self, max_entries=10000, ttl=60, shared_alias=None, shared_ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ["local_hits", "shared_hits", "misses", "evictions", "invalidations"], 0
+        )
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "TOKEN_AUTH_CACHE", {})
+        return cls(
+            max_entries=options.get("MAX_ENTRIES", 10000),
+            ttl=options.get("TTL", 60),
+            shared_alias=options.get("SHARED_CACHE"),
+            shared_ttl=options.get("SHARED_TTL", 300),
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def cache_key(self, key):
+        # Nunca guardar el token en claro como clave de cache
+        return self.key_prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def generation(self):
+        """Generacion de revocaciones compartida (None sin nivel compartido)."""
+        if not self.shared:
+            return None
+        generation = self.shared.get(self.generation_key)
+        if generation is None:
+            # Si se pierde, la nueva nunca repite una anterior
+            self.shared.add(self.generation_key, time.time_ns(), None)
+            generation = self.shared.get(self.generation_key)
+        return generation
+
+    def get(self, key):
+        cache_key = self.cache_key(key)
+        generation = self.generation()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                cached, expires, entry_generation = entry
+                if expires > now and entry_generation == generation:
+                    self._entries.move_to_end(cache_key)
+                    self._stats["local_hits"] += 1
+                    return rebuild_token(cached)
+                del self._entries[cache_key]
+
+        cached = self.shared.get(cache_key) if self.shared else None
+        if cached is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        cached = CachedToken(*cached)
+        with self._lock:
+            self._stats["shared_hits"] += 1
+        self._store_local(cache_key, cached, generation)
+        return rebuild_token(cached)
+
+    def set(self, key, token):
+        cache_key = self.cache_key(key)
+        cached = cached_token(token)
+        self._store_local(cache_key, cached, self.generation())
+        if self.shared:
+            # Tupla simple: no depende del pickle de los modelos
+            self.shared.set(cache_key, tuple(cached), self.shared_ttl)
+
+    def _store_local(self, cache_key, cached, generation):
+        with self._lock:
+            self._entries[cache_key] = (
+                cached,
+                time.monotonic() + self.ttl,
+                generation,
+            )
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, *keys):
+        cache_keys = [self.cache_key(key) for key in keys]
+        with self._lock:
+            for cache_key in cache_keys:
+                self._entries.pop(cache_key, None)
+            self._stats["invalidations"] += len(cache_keys)
+        if self.shared and cache_keys:
+            self.shared.delete_many(cache_keys)
+            # Los demas workers descartan sus entradas locales
+            try:
+                self.shared.incr(self.generation_key)
+            except ValueError:
+                self.shared.set(self.generation_key, time.time_ns(), None)
+
+    def clear(self):
+        """Vacia el nivel local y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        hits = stats["local_hits"] + stats["shared_hits"]
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Devuelve la cache de tokens del proceso (se crea al primer uso)."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache.from_settings()
+    return _token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Igual que ``TokenAuthentication`` pero resuelve el token desde la cache
+    antes de consultar ``authtoken_token``. Solo se cachean tokens validos de
+    usuarios activos; las señales de ``accounts.signals`` invalidan la entrada
+    al borrar el token, desactivar al usuario o cambiar su contraseña.
+    """
+
+    def authenticate(self, request):
+        with timed("auth"):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(key, token)
+        return (user, token)
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    get_token_cache().delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Cualquier cambio del usuario (desactivacion, cambio de contraseña,
+    permisos) invalida sus tokens cacheados.
+    """
+    if created:
+        return
+    keys = Token.objects.filter(user=instance).values_list("key", flat=True)
+    get_token_cache().delete(*keys)
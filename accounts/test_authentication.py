@@ -0,0 +1,129 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import authentication
+from accounts.authentication import TokenCache
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """Cache de tokens con nivel compartido sobre LocMemCache"""
+    cache = TokenCache(max_entries=2, ttl=60, shared_alias="default")
+    monkeypatch.setattr(authentication, "_token_cache", cache)
+    yield cache
+    cache.shared.clear()
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    """
+    Tests para la autenticacion por token con cache
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, token_cache):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.cache = token_cache
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_request_skips_token_query(self):
+        """Test: la segunda peticion no consulta la tabla de tokens"""
+        assert self.client.get("/api/tags/").status_code == status.HTTP_200_OK
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tags/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any("authtoken_token" in q["sql"] for q in ctx.captured_queries)
+        assert self.cache.stats()["local_hits"] == 1
+        assert self.cache.stats()["misses"] == 1
+
+    def test_shared_tier_serves_other_workers(self):
+        """Test: otro proceso (LRU local vacio) acierta en el nivel compartido"""
+        self.client.get("/api/tags/")
+        self.cache._entries.clear()
+
+        assert self.client.get("/api/tags/").status_code == status.HTTP_200_OK
+        assert self.cache.stats()["shared_hits"] == 1
+
+    def test_shared_tier_stores_no_user_secrets(self):
+        """Test: el nivel compartido solo guarda la clave, el id y los flags"""
+        self.client.get("/api/tags/")
+
+        stored = self.cache.shared.get(self.cache.cache_key(self.token.key))
+        assert stored == (self.token.key, self.user.pk, True, False)
+
+    def test_cached_user_loads_other_fields_lazily(self):
+        """Test: los demas campos del usuario se leen solo si se usan"""
+        self.client.get("/api/tags/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            token = self.cache.get(self.token.key)
+            assert token.user.pk == self.user.pk
+            assert token.user.is_active
+            assert not token.user.is_staff
+        assert len(ctx.captured_queries) == 0
+        assert token.user.username == "usuario1"
+
+    def test_deleted_token_is_rejected(self):
+        """Test: borrar el token invalida la cache"""
+        self.client.get("/api/tags/")
+        self.token.delete()
+
+        response = self.client.get("/api/tags/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected(self):
+        """Test: desactivar al usuario invalida la cache"""
+        self.client.get("/api/tags/")
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/tags/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_invalidates_cache(self):
+        """Test: cambiar la contraseña obliga a volver a la base de datos"""
+        self.client.get("/api/tags/")
+        self.user.set_password("nueva-clave-123")
+        self.user.save()
+
+        assert self.cache.get(self.token.key) is None
+        assert self.cache.stats()["invalidations"] == 1
+
+    def test_lru_is_bounded(self):
+        """Test: el LRU local no supera el maximo de entradas"""
+        for name in ("a", "b", "c"):
+            user = User.objects.create_user(username=name, password="pass123")
+            token = Token.objects.create(user=user)
+            self.cache.set(token.key, token)
+
+        stats = self.cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+
+
+@pytest.mark.django_db
+def test_revocation_reaches_other_workers():
+    """Test: borrar un token en un worker invalida el LRU local de los demas"""
+    worker = TokenCache(shared_alias="default")
+    other = TokenCache(shared_alias="default")
+    user = User.objects.create_user(username="usuario1", password="pass123")
+    token = Token.objects.create(user=user)
+    worker.set(token.key, token)
+    assert other.get(token.key) is not None
+    assert other.get(token.key) is not None
+    assert other.stats()["local_hits"] == 1
+
+    worker.delete(token.key)
+
+    assert other.get(token.key) is None
+    worker.shared.clear()
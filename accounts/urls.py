@@ -6,6 +6,8 @@ from . import views
 
 
 class SpectacularObtainAuthToken(ObtainAuthToken):
+    query_budget = {"POST": 3}
+
     @extend_schema(
         summary="Obtener token de autenticacion",
         description="Obtiene token de autenticacion usando username y password",
@@ -0,0 +1,10 @@
+"""
+Benchmarks de la API. Se ejecutan a mano contra la base de datos configurada
+(PostgreSQL en docker-compose), p. ej.::
+
+    python -m benchmarks.async_views --requests 2000 --concurrency 50
+
+``benchmarks.suite`` mide todos los endpoints y guarda resultados en JSON
+para comparar ejecuciones; ``benchmarks.plans`` compara los planes de las
+consultas calientes con un snapshot.
+"""
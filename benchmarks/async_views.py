@@ -0,0 +1,160 @@
+"""
+Compara las vistas sincronas (WSGI) y asincronas (ASGI) de tareas y
+etiquetas con el mismo conjunto de datos y la misma mezcla de peticiones.
+
+Cada modo corre en su propio proceso (``TASKS_ASYNC_VIEWS`` decide las
+rutas al importar las URLs), con la cache de respuestas desactivada para que
+todas las peticiones lleguen a la base de datos::
+
+    python -m benchmarks.async_views --requests 2000 --concurrency 50
+
+La concurrencia sincrona usa un hilo por peticion en curso (como los
+threads de gunicorn); la asincrona, corrutinas en un solo hilo.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HOST = "localhost"
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+
+def request_paths(task_ids, count, seed=0):
+    """Mezcla fija de peticiones: listados, filtros, detalle y etiquetas."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            paths.append(f"/api/tasks/?page={rng.randint(1, 50)}")
+        elif kind < 0.6:
+            paths.append("/api/tasks/?completed=true&ordering=-created_at")
+        elif kind < 0.9:
+            paths.append(f"/api/tasks/{rng.choice(task_ids)}/")
+        else:
+            paths.append("/api/tags/")
+    return paths
+
+
+def summarize(mode, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def run_sync(paths, token, concurrency):
+    from django.test import Client
+
+    headers = {"host": HOST, "authorization": f"Token {token}"}
+
+    def fetch(path):
+        start = time.perf_counter()
+        response = Client(headers=headers).get(path)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, paths))
+    elapsed = time.perf_counter() - start
+    errors = sum(status != 200 for _, status in results)
+    return summarize("sync", [latency for latency, _ in results], elapsed, errors)
+
+
+def run_async(paths, token, concurrency):
+    from django.test import AsyncClient
+
+    headers = {"host": HOST, "authorization": f"Token {token}"}
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient(headers=headers)
+
+        async def fetch(path):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(fetch(path) for path in paths))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    errors = sum(status != 200 for _, status in results)
+    return summarize("async", [latency for latency, _ in results], elapsed, errors)
+
+
+def worker(args):
+    setup_django()
+    from tasks.models import Task
+
+    from .dataset import USERNAME, seed_dataset
+
+    _, token = seed_dataset(tasks=args.tasks)
+    task_ids = list(
+        Task.objects.filter(user__username=USERNAME).values_list("id", flat=True)
+    )
+    paths = request_paths(task_ids, args.requests)
+    run = run_async if args.worker == "async" else run_sync
+    # Calentamiento: conexiones, snapshot de etiquetas, imports
+    run(paths[: args.concurrency], token, args.concurrency)
+    print(json.dumps(run(paths, token, args.concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--worker", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    results = []
+    for mode in ("sync", "async"):
+        env = {
+            **os.environ,
+            "TASKS_ASYNC_VIEWS": str(mode == "async"),
+            "TASK_RESPONSE_CACHE_ENABLED": "False",
+        }
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_views", *sys.argv[1:]]
+            + ["--worker", mode],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = list(results[0])
+    print("  ".join(f"{name:>20}" for name in columns))
+    for result in results:
+        print("  ".join(f"{result[name]!s:>20}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
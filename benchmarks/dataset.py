@@ -0,0 +1,179 @@
+"""Datos de prueba compartidos por los benchmarks."""
+
+import random
+
+from django.contrib.auth.models import User
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from tasks.models import Tag, Task
+from tasks.tags import refresh_tag_names
+
+USERNAME = "benchmark"
+
+
+def seed_dataset(tasks=5000, tags=20, batch_size=1000):
+    """
+    Crea (una sola vez) el usuario de benchmark con ``tasks`` tareas y
+    ``tags`` etiquetas. Devuelve ``(usuario, token)``.
+    """
+    user, _ = User.objects.get_or_create(username=USERNAME)
+    token, _ = Token.objects.get_or_create(user=user)
+    existing = Task.objects.filter(user=user).count()
+    if existing >= tasks:
+        return user, token.key
+
+    tag_objects = [
+        Tag.objects.get_or_create(name=f"benchmark-{i}")[0] for i in range(tags)
+    ]
+    through = Task.tags.through
+    for start in range(existing, tasks, batch_size):
+        created = Task.objects.bulk_create(
+            Task(
+                user=user,
+                title=f"tarea de benchmark {i}",
+                description=f"descripcion {i}",
+                completed=i % 3 == 0,
+            )
+            for i in range(start, min(start + batch_size, tasks))
+        )
+        through.objects.bulk_create(
+            through(task_id=task.pk, tag_id=tag_objects[task.pk % tags].pk)
+            for task in created
+        )
+        # bulk_create no envia m2m_changed: tag_names se rellena aparte
+        refresh_tag_names(task.pk for task in created)
+    return user, token.key
+
+
+# Poblacion realista para benchmarks.suite: muchos usuarios con un numero de
+# tareas sesgado (pocos usuarios concentran casi todas), varias etiquetas por
+# tarea y descripciones largas.
+POPULATION_PREFIX = "bench-"
+PASSWORD = "benchmark-pass"
+
+WORDS = (
+    "revisar enviar preparar llamar comprar informe reunion cliente proyecto "
+    "factura presupuesto codigo despliegue servidor base datos pruebas correo "
+    "agenda viaje medico banco contrato diseño entrega equipo semana mes "
+    "urgente pendiente documentacion migracion backup seguridad rendimiento "
+    "usuario soporte ventas marketing compras almacen inventario pedido "
+    "calendario tarea nota idea plan objetivo metrica panel alerta error"
+).split()
+
+
+def task_counts(users, tasks, skew):
+    """Reparte ``tasks`` entre ``users`` con pesos Zipf (``1 / rango^skew``)."""
+    weights = [1 / (rank**skew) for rank in range(1, users + 1)]
+    scale = tasks / sum(weights)
+    counts = [max(int(weight * scale), 1) for weight in weights]
+    counts[0] += tasks - sum(counts)
+    return counts
+
+
+def describe(rng, words):
+    length = max(int(rng.gauss(words, words / 3)), 1)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def insert_tasks(owners, tags, tags_per_task, description_words, rng):
+    """Un lote de tareas con sus etiquetas, ``tag_names`` y documento de busqueda."""
+    from tasks.search import update_search_documents
+    from tasks.tags import join_tag_names
+
+    now = timezone.now()
+    tasks = []
+    task_tags = []
+    for user, number in owners:
+        chosen = rng.sample(tags, min(rng.randint(0, 2 * tags_per_task), len(tags)))
+        completed = rng.random() < 0.4
+        tasks.append(
+            Task(
+                user=user,
+                title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}",
+                description=describe(rng, description_words),
+                completed=completed,
+                completed_at=now if completed else None,
+                tag_names=join_tag_names(tag.name for tag in chosen),
+            )
+        )
+        task_tags.append(chosen)
+    Task.objects.bulk_create(tasks)
+    through = Task.tags.through
+    through.objects.bulk_create(
+        through(task_id=task.pk, tag_id=tag.pk)
+        for task, chosen in zip(tasks, task_tags)
+        for tag in chosen
+    )
+    update_search_documents([task.pk for task in tasks])
+
+
+def seed_population(
+    users=50,
+    tasks=20000,
+    skew=1.1,
+    tags=30,
+    tags_per_task=2,
+    description_words=40,
+    seed=0,
+    batch_size=1000,
+):
+    """
+    Crea la poblacion de benchmark (se reutiliza si ya existe con los mismos
+    parametros; si no, se borra y se vuelve a crear). Devuelve
+    ``[(usuario, token, tareas)]`` de mayor a menor numero de tareas.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from tasks.stats import rebuild_stats
+
+    marker = f"{users}-{tasks}-{skew}-{tags}-{tags_per_task}-{description_words}-{seed}"
+    population = User.objects.filter(username__startswith=POPULATION_PREFIX)
+    if not population.filter(first_name=marker).exists():
+        rng = random.Random(seed)
+        population.delete()
+        Tag.objects.filter(name__startswith=POPULATION_PREFIX).delete()
+        # Un solo hash: calcularlo por usuario dominaria el tiempo de carga
+        password = make_password(PASSWORD)
+        created = User.objects.bulk_create(
+            User(
+                username=f"{POPULATION_PREFIX}{i}",
+                password=password,
+                first_name=marker,
+            )
+            for i in range(users)
+        )
+        Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in created
+        )
+        tag_objects = Tag.objects.bulk_create(
+            Tag(name=f"{POPULATION_PREFIX}{i}") for i in range(tags)
+        )
+        owners = [
+            (user, number)
+            for user, count in zip(created, task_counts(users, tasks, skew))
+            for number in range(count)
+        ]
+        for start in range(0, len(owners), batch_size):
+            insert_tasks(
+                owners[start : start + batch_size],
+                tag_objects,
+                tags_per_task,
+                description_words,
+                rng,
+            )
+        rebuild_stats()
+
+    totals = dict(
+        Task.objects.filter(user__username__startswith=POPULATION_PREFIX)
+        .values_list("user")
+        .annotate(total=Count("id"))
+    )
+    return sorted(
+        (
+            (user, user.auth_token.key, totals.get(user.pk, 0))
+            for user in population.select_related("auth_token")
+        ),
+        key=lambda item: -item[2],
+    )
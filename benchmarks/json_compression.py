@@ -0,0 +1,127 @@
+"""
+Throughput del listado de tareas antes y despues del renderer orjson y de la
+compresion de respuestas, mas el costo de codificar una pagina grande::
+
+    python -m benchmarks.json_compression --requests 2000
+
+Las variantes corren en el mismo proceso cambiando ``API_JSON_BACKEND`` y
+``RESPONSE_COMPRESSION`` (con la cache de respuestas desactivada); las
+peticiones son secuenciales, asi que req/s es el inverso del costo por
+peticion en el servidor. ``bytes`` es el tamaño medio del cuerpo enviado.
+"""
+
+import argparse
+import os
+import random
+import time
+
+HOST = "localhost"
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    # SQLite en memoria (DJANGO_USE_SQLITE): la base vive solo en este proceso
+    if connection.settings_dict["NAME"] == ":memory:":
+        call_command("migrate", verbosity=0)
+
+
+def variants():
+    from django.conf import settings
+
+    from tasks.middleware import available_encoders
+
+    base = {**settings.RESPONSE_COMPRESSION, "ENABLED": False}
+    yield "stdlib", "stdlib", base, ""
+    yield "orjson", "auto", base, ""
+    enabled = {**base, "ENABLED": True}
+    for encoder in reversed(available_encoders(enabled)):
+        yield f"orjson+{encoder.name}", "auto", enabled, encoder.name
+
+
+def run(paths, token, backend, compression, accept_encoding):
+    from django.test import Client, override_settings
+
+    with override_settings(
+        API_JSON_BACKEND=backend,
+        RESPONSE_COMPRESSION=compression,
+        TASK_RESPONSE_CACHE={"ENABLED": False},
+    ):
+        # Cliente nuevo: el middleware lee RESPONSE_COMPRESSION al crearse
+        client = Client(
+            headers={
+                "host": HOST,
+                "authorization": f"Token {token}",
+                "accept-encoding": accept_encoding,
+            }
+        )
+        for path in paths[:50]:
+            client.get(path)
+        total_bytes = 0
+        start = time.perf_counter()
+        for path in paths:
+            response = client.get(path)
+            total_bytes += len(response.content)
+        elapsed = time.perf_counter() - start
+    return len(paths) / elapsed, total_bytes / len(paths)
+
+
+def encode_page(size, repeat):
+    """Milisegundos en codificar ``size`` tareas con cada renderer."""
+    from django.test import override_settings
+
+    from tasks.models import Task
+    from tasks.renderers import FastJSONRenderer
+    from tasks.rows import TaskRows
+    from tasks.serializers import TaskSerializer
+
+    rows = TaskRows.for_serializer(TaskSerializer())
+    queryset = Task.objects.order_by("-created_at", "-id")
+    data = {"results": rows.represent(list(rows.queryset(queryset)[:size]))}
+    timings = {}
+    for backend in ("stdlib", "auto"):
+        with override_settings(API_JSON_BACKEND=backend):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                FastJSONRenderer().render(data)
+            timings[backend] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--encode-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from .dataset import seed_dataset
+
+    _, token = seed_dataset(tasks=args.tasks)
+    rng = random.Random(0)
+    pages = max(args.tasks // 10, 1)
+    paths = [f"/api/tasks/?page={rng.randint(1, pages)}" for _ in range(args.requests)]
+
+    columns = ["variant", "requests_per_second", "bytes"]
+    print("  ".join(f"{name:>20}" for name in columns))
+    for name, backend, compression, accept_encoding in variants():
+        per_second, size = run(paths, token, backend, compression, accept_encoding)
+        values = [name, round(per_second, 1), round(size)]
+        print("  ".join(f"{value!s:>20}" for value in values))
+
+    timings = encode_page(args.encode_size, repeat=20)
+    print(
+        f"\nCodificar {args.encode_size} tareas: "
+        f"stdlib {timings['stdlib']:.2f} ms, orjson {timings['auto']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
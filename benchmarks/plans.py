@@ -0,0 +1,374 @@
+"""
+Planes de ejecucion de las consultas calientes, comparados con snapshots::
+
+    python -m benchmarks.plans                 # compara con benchmarks/plans/<motor>.json
+    python -m benchmarks.plans --update        # regenera el snapshot
+    python -m benchmarks.plans --analyze       # ademas ejecuta y mide cada consulta
+
+Carga la poblacion de ``dataset.seed_population`` (y ``ANALYZE``), hace las
+peticiones de cada escenario (listado con cada filtro, orden, busqueda y
+paginacion, detalle, lote con comprobacion de titulos...) y captura los
+SELECT que ejecutan las vistas, asi que mide exactamente los querysets del
+codigo. De cada SELECT obtiene el plan (``EXPLAIN QUERY PLAN`` en SQLite,
+``EXPLAIN (FORMAT JSON)`` en PostgreSQL) y lo normaliza: sin costes, filas
+estimadas ni tiempos, solo la forma del plan.
+
+Termina con codigo 1 si:
+
+* un plan no coincide con el snapshot del motor (cambio de indice o de
+  consulta: revisar y ``--update`` si es intencionado), o
+* un escenario recorre entera una tabla grande (``SCAN``/``Seq Scan``) u
+  ordena en memoria (``TEMP B-TREE``/``Sort``) consultando una tabla grande
+  (``--large-table-rows`` filas o mas), salvo que el escenario lo permita.
+
+Las escrituras de los escenarios se deshacen al terminar cada peticion.
+"""
+
+import argparse
+import difflib
+import json
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from .suite import setup_django
+
+SNAPSHOT_DIR = Path(__file__).with_name("plans")
+
+# Escenarios: (nombre, metodo, ruta, cuerpo, problemas permitidos). La ruta y
+# el cuerpo se formatean con el contexto de la poblacion.
+SCENARIOS = [
+    ("tasks_list", "GET", "/api/tasks/", None, ()),
+    ("tasks_deep_page", "GET", "/api/tasks/?page={last_page}", None, ()),
+    ("tasks_completed", "GET", "/api/tasks/?completed=true", None, ()),
+    ("tasks_pending", "GET", "/api/tasks/?completed=false", None, ()),
+    ("tasks_tag", "GET", "/api/tasks/?tags={tag}", None, ()),
+    ("tasks_two_tags", "GET", "/api/tasks/?tags={tag}&tags={other_tag}", None, ()),
+    ("tasks_order_title", "GET", "/api/tasks/?ordering=title", None, ()),
+    ("tasks_order_title_desc", "GET", "/api/tasks/?ordering=-title", None, ()),
+    ("tasks_order_created", "GET", "/api/tasks/?ordering=created_at", None, ()),
+    ("tasks_order_tags", "GET", "/api/tasks/?ordering=tags__name", None, ()),
+    # Las filas encontradas salen del indice de texto completo, no en el orden
+    # pedido (relevancia o fecha): ordenarlas es inevitable
+    ("tasks_search", "GET", "/api/tasks/?search={word}", None, ("sort",)),
+    (
+        "tasks_search_completed",
+        "GET",
+        "/api/tasks/?search={word}&completed=true",
+        None,
+        ("sort",),
+    ),
+    (
+        "tasks_search_ordered",
+        "GET",
+        "/api/tasks/?search={word}&ordering=-created_at",
+        None,
+        ("sort",),
+    ),
+    (
+        "tasks_cursor",
+        "GET",
+        "/api/tasks/?pagination=cursor&ordering=-created_at",
+        None,
+        (),
+    ),
+    ("tasks_include_archived", "GET", "/api/tasks/?include_archived=true", None, ()),
+    ("task_detail", "GET", "/api/tasks/{task}/", None, ()),
+    ("tasks_stats", "GET", "/api/tasks/stats/", None, ()),
+    # Comprobacion de titulos por lote (la de validate_title, por conjuntos)
+    (
+        "tasks_bulk_titles",
+        "POST",
+        "/api/tasks/bulk/",
+        {
+            "operations": [
+                {"action": "create", "data": {"title": "plan-a", "tags_id": []}},
+                {"action": "create", "data": {"title": "plan-b", "tags_id": []}},
+            ]
+        },
+        (),
+    ),
+]
+
+
+def build_context(args):
+    import math
+
+    from django.conf import settings
+    from django.db import connection
+
+    from tasks.models import Tag, Task
+
+    from .dataset import POPULATION_PREFIX, WORDS, seed_population
+
+    population = seed_population(users=args.users, tasks=args.tasks, seed=args.seed)
+    user, token, total = population[0]
+    with connection.cursor() as cursor:
+        # Estadisticas al dia: los planes dependen de ellas
+        cursor.execute("ANALYZE")
+    tags = Tag.objects.filter(name__startswith=POPULATION_PREFIX).order_by("id")
+    return {
+        "user": user,
+        "token": token,
+        "last_page": math.ceil(total / settings.REST_FRAMEWORK["PAGE_SIZE"]),
+        "tag": tags[0].id,
+        "other_tag": tags[1].id,
+        "word": WORDS[0],
+        "task": Task.objects.filter(user=user)
+        .order_by("id")
+        .values_list("id", flat=True)[0],
+    }
+
+
+@contextmanager
+def capture_selects():
+    """SELECT ejecutados en el bloque: ``[(alias, sql, params)]``."""
+    from django.db import connections
+
+    captured = []
+
+    def wrapper(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((context["connection"].alias, sql, params))
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield captured
+
+
+def run_request(client, method, path, body, token):
+    from django.db import transaction
+
+    headers = {"authorization": f"Token {token}"}
+    with transaction.atomic():
+        if method == "POST":
+            response = client.post(
+                path, body, content_type="application/json", headers=headers
+            )
+        else:
+            response = client.get(path, headers=headers)
+        transaction.set_rollback(True)
+    return response.status_code
+
+
+def sqlite_plan(cursor, sql, params, analyze):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in cursor.fetchall():
+        depth[node] = depth.get(parent, -1) + 1
+        detail = re.sub(r" \(~\d+ rows?\)", "", detail)
+        lines.append("  " * depth[node] + detail)
+    elapsed = None
+    if analyze:
+        # SQLite no tiene EXPLAIN ANALYZE: se ejecuta y se mide
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+    return lines, elapsed
+
+
+def postgresql_plan(cursor, sql, params, analyze):
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    cursor.execute(f"EXPLAIN ({options}) " + sql, params)
+    (plan,) = cursor.fetchone()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines = []
+
+    def walk(node, depth):
+        text = node["Node Type"]
+        if "Relation Name" in node:
+            text += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            text += f" using {node['Index Name']}"
+        if "Sort Key" in node:
+            text += f" by {', '.join(node['Sort Key'])}"
+        lines.append("  " * depth + text)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"], 0)
+    return lines, plan[0].get("Execution Time")
+
+
+PLANNERS = {"sqlite": sqlite_plan, "postgresql": postgresql_plan}
+
+
+def explain(alias, sql, params, analyze=False):
+    """Plan normalizado y, con ``analyze``, milisegundos de ejecucion."""
+    from django.db import connections
+
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        lines, elapsed = PLANNERS[connection.vendor](cursor, sql, params, analyze)
+    return lines, elapsed if elapsed is None else round(elapsed, 3)
+
+
+def table_rows(tables):
+    """Filas de las tablas (no de las vistas, como ``tasks_task_all``)."""
+    from django.db import connection
+
+    counts = {}
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+        for table in sorted(set(tables) & existing):
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+# Patrones de problemas por motor: recorrido completo (la tabla en el grupo 1)
+# y ordenacion en memoria
+FULL_SCAN = {
+    "sqlite": re.compile(r"^\s*SCAN (\w+)$"),
+    "postgresql": re.compile(r"^\s*Seq Scan on (\w+)$"),
+}
+SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)"),
+    "postgresql": re.compile(r"^\s*Sort\b"),
+}
+
+
+def problems(vendor, lines, large_tables, allowed):
+    found = []
+    text = "\n".join(lines)
+    touches_large = any(re.search(rf"\b{table}\b", text) for table in large_tables)
+    for line in lines:
+        scan = FULL_SCAN[vendor].match(line)
+        if scan and scan.group(1) in large_tables and "scan" not in allowed:
+            found.append(f"recorrido completo: {line.strip()}")
+        if SORT[vendor].search(line) and touches_large and "sort" not in allowed:
+            found.append(f"ordenacion en memoria: {line.strip()}")
+    return found
+
+
+def capture_plans(context, analyze):
+    from django.test import Client
+
+    client = Client(headers={"host": "localhost"})
+    results = {}
+    for name, method, path, body, allowed in SCENARIOS:
+        path = path.format(**context)
+        # Primera peticion: token y snapshot de etiquetas a la cache
+        run_request(client, method, path, body, context["token"])
+        with capture_selects() as captured:
+            status = run_request(client, method, path, body, context["token"])
+        queries = []
+        for alias, sql, params in captured:
+            plan, elapsed = explain(alias, sql, params, analyze)
+            queries.append({"sql": sql, "plan": plan, "ms": elapsed})
+        results[name] = {
+            "request": f"{method} {path}",
+            "status": status,
+            "allowed": allowed,
+            "queries": queries,
+        }
+    return results
+
+
+def engine_version(connection):
+    if connection.vendor == "sqlite":
+        import sqlite3
+
+        return f"sqlite {sqlite3.sqlite_version}"
+    return f"postgresql {connection.pg_version}"
+
+
+def large_tables(results, min_rows):
+    tables = set()
+    for result in results.values():
+        for query in result["queries"]:
+            tables.update(re.findall(r'(?:FROM|JOIN) "?(\w+)"?', query["sql"]))
+    return {table for table, rows in table_rows(tables).items() if rows >= min_rows}
+
+
+def check(vendor, result, expected, large):
+    """Problemas de un escenario: respuesta, planes y diferencias con el snapshot."""
+    issues = []
+    if result["status"] >= 400:
+        issues.append(f"{result['request']} respondio {result['status']}")
+    for query in result["queries"]:
+        issues.extend(problems(vendor, query["plan"], large, result["allowed"]))
+    plans = [query["plan"] for query in result["queries"]]
+    if expected is not None and expected != plans:
+        before = [line for plan in expected for line in plan + ["--"]]
+        after = [line for plan in plans for line in plan + ["--"]]
+        diff = difflib.unified_diff(before, after, "snapshot", "actual", lineterm="")
+        issues.append("plan distinto del snapshot:\n" + "\n".join(diff))
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--update", action="store_true", help="Regenera el snapshot")
+    parser.add_argument(
+        "--analyze", action="store_true", help="Ejecuta cada consulta y la mide"
+    )
+    parser.add_argument("--large-table-rows", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Muestra SQL y planes")
+    args = parser.parse_args()
+
+    setup_django(response_cache=False)
+    from django.db import connection
+
+    if connection.vendor not in PLANNERS:
+        parser.error(f"Motor no soportado: {connection.vendor}")
+    snapshot_path = SNAPSHOT_DIR / f"{connection.vendor}.json"
+    engine = engine_version(connection)
+    snapshot = None
+    if snapshot_path.exists() and not args.update:
+        snapshot = json.loads(snapshot_path.read_text())
+        if snapshot["engine"] != engine:
+            print(f"Aviso: snapshot de {snapshot['engine']}, motor actual {engine}")
+
+    results = capture_plans(build_context(args), args.analyze)
+    large = large_tables(results, args.large_table_rows)
+    failures = 0
+    for name, result in results.items():
+        expected = None
+        if snapshot is not None:
+            expected = snapshot["scenarios"].get(name, [])
+        issues = check(connection.vendor, result, expected, large)
+        timing = ""
+        if args.analyze:
+            timing = f"  {sum(query['ms'] for query in result['queries']):.1f} ms"
+        print(f"{'FALLA' if issues else 'ok':6} {name:26} {result['request']}{timing}")
+        for issue in issues:
+            print("       " + issue.replace("\n", "\n       "))
+        if args.verbose:
+            for query in result["queries"]:
+                print(f"\n       {query['sql']}")
+                print("\n".join("         " + line for line in query["plan"]))
+            print()
+        failures += bool(issues)
+
+    print(f"\nTablas grandes (>= {args.large_table_rows} filas): {sorted(large)}")
+    if args.update:
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        snapshot = {
+            "engine": engine,
+            "scenarios": {
+                name: [query["plan"] for query in result["queries"]]
+                for name, result in results.items()
+            },
+        }
+        snapshot_path.write_text(json.dumps(snapshot, indent=2) + "\n")
+        print(f"Snapshot guardado en {snapshot_path}")
+    elif snapshot is None:
+        print(f"No hay snapshot en {snapshot_path}: ejecutar con --update")
+    if failures:
+        print(f"{failures} escenarios con problemas")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
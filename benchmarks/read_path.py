@@ -0,0 +1,88 @@
+"""
+Compara la lectura de una pagina de tareas con ``TaskSerializer``
+(instancias del modelo) y con la ruta rapida de ``tasks.rows`` (tuplas de
+``values_list``), para varios tamaños de pagina::
+
+    python -m benchmarks.read_path --sizes 10,100,1000 --repeat 20
+
+Cada medicion incluye la consulta de la pagina y la construccion de los
+diccionarios (sin renderizar JSON). Antes de medir se comprueba que ambas
+rutas producen exactamente la misma salida.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    # SQLite en memoria (DJANGO_USE_SQLITE): la base vive solo en este proceso
+    if connection.settings_dict["NAME"] == ":memory:":
+        call_command("migrate", verbosity=0)
+
+
+def measure(function, repeat):
+    """Mediana en milisegundos de ``repeat`` ejecuciones."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,50,100,250,500,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=5000)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    setup_django()
+    from tasks.models import Task
+    from tasks.rows import TaskRows
+    from tasks.serializers import TaskSerializer
+
+    from .dataset import seed_dataset
+
+    user, _ = seed_dataset(tasks=max(args.tasks, *sizes))
+    queryset = Task.objects.filter(user=user).order_by("-created_at", "-id")
+    rows = TaskRows.for_serializer(TaskSerializer())
+
+    def with_serializer(size):
+        return TaskSerializer(list(queryset[:size]), many=True).data
+
+    def with_rows(size):
+        return rows.represent(list(rows.queryset(queryset)[:size]))
+
+    # Calentamiento (snapshot de etiquetas) y comprobacion de equivalencia
+    for size in sizes:
+        if with_serializer(size) != with_rows(size):
+            raise SystemExit(f"Salidas distintas con {size} tareas")
+
+    columns = ["page_size", "serializer_ms", "rows_ms", "speedup"]
+    print("  ".join(f"{name:>14}" for name in columns))
+    for size in sizes:
+        serializer_ms = measure(lambda: with_serializer(size), args.repeat)
+        rows_ms = measure(lambda: with_rows(size), args.repeat)
+        values = [
+            size,
+            round(serializer_ms, 2),
+            round(rows_ms, 2),
+            f"{serializer_ms / rows_ms:.1f}x",
+        ]
+        print("  ".join(f"{value!s:>14}" for value in values))
+
+
+if __name__ == "__main__":
+    main()
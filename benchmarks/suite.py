@@ -0,0 +1,481 @@
+"""
+Latencia, throughput y consultas por peticion de los endpoints de la API::
+
+    python -m benchmarks.suite --requests 200 --output results.json
+    python -m benchmarks.suite --transport http --concurrency 8
+    python -m benchmarks.suite --compare baseline.json --max-regression 0.15
+
+Carga (una vez) una poblacion con ``dataset.seed_population`` y mide cada
+escenario por separado: listado de tareas con filtros, busqueda, orden y
+paginas profundas, detalle, etiquetas y login.
+
+* ``--transport inprocess`` (por defecto): ``django.test.Client`` en este
+  proceso; cuenta las consultas SQL de cada peticion.
+* ``--transport http``: peticiones HTTP reales contra ``--base-url`` o,
+  sin ella, contra un servidor WSGI con hilos que se levanta en este
+  proceso. Sin conteo de consultas.
+
+``--concurrency`` y el servidor propio usan hilos, asi que necesitan una
+base en archivo o PostgreSQL (SQLite en memoria no se comparte entre hilos).
+
+La cache de respuestas se desactiva salvo ``--response-cache`` (si no, casi
+todos los GET repetidos serian aciertos). ``--output`` guarda los resultados
+en JSON con la configuracion y el commit; ``--compare`` los compara con
+otra ejecucion y termina con codigo 1 si algun escenario empeora su p95 mas
+de ``--max-regression`` o hace mas consultas.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+HOST = "localhost"
+
+
+def setup_django(response_cache):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # ResponseCache lee su configuracion una vez por proceso
+    os.environ["TASK_RESPONSE_CACHE_ENABLED"] = str(response_cache)
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    # SQLite en memoria (DJANGO_USE_SQLITE): la base vive solo en este proceso
+    if connection.settings_dict["NAME"] == ":memory:":
+        call_command("migrate", verbosity=0)
+
+
+# Escenarios: cada uno devuelve (metodo, ruta, cuerpo, token) a partir del
+# contexto de la poblacion y de un generador aleatorio con semilla
+
+
+def heavy(context, path):
+    return "GET", path, None, context["heavy_token"]
+
+
+def last_page(context):
+    return math.ceil(context["heavy_tasks"] / context["page_size"])
+
+
+SCENARIOS = {
+    "tasks_list": lambda ctx, rng: heavy(ctx, "/api/tasks/"),
+    "tasks_filter_completed": lambda ctx, rng: heavy(ctx, "/api/tasks/?completed=true"),
+    "tasks_filter_tags": lambda ctx, rng: heavy(
+        ctx, f"/api/tasks/?tags={rng.choice(ctx['tag_ids'])}"
+    ),
+    "tasks_search": lambda ctx, rng: heavy(
+        ctx, f"/api/tasks/?search={rng.choice(ctx['words'])}"
+    ),
+    "tasks_ordering": lambda ctx, rng: heavy(ctx, "/api/tasks/?ordering=title"),
+    "tasks_deep_page": lambda ctx, rng: heavy(
+        ctx,
+        f"/api/tasks/?page={rng.randint(max(last_page(ctx) - 10, 1), last_page(ctx))}",
+    ),
+    "tasks_cursor": lambda ctx, rng: heavy(
+        ctx, "/api/tasks/?pagination=cursor&ordering=-created_at"
+    ),
+    "task_detail": lambda ctx, rng: heavy(
+        ctx, f"/api/tasks/{rng.choice(ctx['task_ids'])}/"
+    ),
+    "tags_list": lambda ctx, rng: heavy(ctx, "/api/tags/"),
+    "tag_detail": lambda ctx, rng: heavy(
+        ctx, f"/api/tags/{rng.choice(ctx['tag_ids'])}/"
+    ),
+    # Hash de contraseña incluido: es el costo real del login
+    "auth_login": lambda ctx, rng: (
+        "POST",
+        "/api/auth/login/",
+        {"username": rng.choice(ctx["usernames"]), "password": ctx["password"]},
+        None,
+    ),
+}
+
+
+def build_context(args):
+    from django.conf import settings
+
+    from tasks.models import Tag, Task
+
+    from .dataset import PASSWORD, POPULATION_PREFIX, WORDS, seed_population
+
+    start = time.perf_counter()
+    population = seed_population(
+        users=args.users,
+        tasks=args.tasks,
+        skew=args.skew,
+        tags=args.tags,
+        tags_per_task=args.tags_per_task,
+        description_words=args.description_words,
+        seed=args.seed,
+    )
+    seeded = time.perf_counter() - start
+    user, token, total = population[0]
+    return {
+        "heavy_token": token,
+        "heavy_tasks": total,
+        "page_size": settings.REST_FRAMEWORK["PAGE_SIZE"],
+        "task_ids": list(
+            Task.objects.filter(user=user).values_list("id", flat=True)[:5000]
+        ),
+        "tag_ids": list(
+            Tag.objects.filter(name__startswith=POPULATION_PREFIX).values_list(
+                "id", flat=True
+            )
+        ),
+        "usernames": [item[0].username for item in population],
+        "password": PASSWORD,
+        "words": WORDS,
+        "tasks_per_user": [item[2] for item in population],
+        "seed_seconds": round(seeded, 2),
+    }
+
+
+@contextmanager
+def count_queries():
+    """Cuenta las consultas del hilo actual en todos los alias de la base."""
+    from django.db import connections
+
+    counter = [0]
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield counter
+
+
+class InProcessTransport:
+    name = "inprocess"
+    counts_queries = True
+
+    def __init__(self):
+        from django.test import Client
+
+        self.local = threading.local()
+        self.client_class = Client
+
+    def request(self, method, path, data, token):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.client_class(headers={"host": HOST})
+        headers = {"authorization": f"Token {token}"} if token else {}
+        with count_queries() as queries:
+            if method == "POST":
+                response = client.post(
+                    path, data, content_type="application/json", headers=headers
+                )
+            else:
+                response = client.get(path, headers=headers)
+        return response.status_code, queries[0]
+
+
+class HTTPTransport:
+    """HTTP/1.1 con una conexion persistente por hilo."""
+
+    name = "http"
+    counts_queries = False
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30
+            )
+        return connection
+
+    def request(self, method, path, data, token):
+        headers = {"Host": HOST, "Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Token {token}"
+        body = None
+        if data is not None:
+            body = json.dumps(data)
+            headers["Content-Type"] = "application/json"
+        connection = self.connection()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self.local.connection = None
+            return 0, None
+        return response.status, None
+
+
+def start_server():
+    """Servidor WSGI con hilos en un puerto libre. Devuelve (url, servidor)."""
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def setup(self):
+            # Cabeceras y cuerpo salen en dos escrituras: sin TCP_NODELAY el
+            # ACK retardado del cliente añade ~40 ms a cada respuesta
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            super().setup()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def percentile(sorted_values, fraction):
+    """Percentil con interpolacion lineal sobre valores ya ordenados."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        position - lower
+    )
+
+
+def summarize(latencies, queries, statuses, elapsed):
+    latencies = sorted(latencies)
+    counted = [count for count in queries if count is not None]
+    return {
+        "requests": len(latencies),
+        "errors": sum(not 200 <= status < 300 for status in statuses),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries_mean": round(statistics.fmean(counted), 2) if counted else None,
+        "queries_max": max(counted) if counted else None,
+    }
+
+
+def run_scenario(transport, build, context, requests, warmup, concurrency, seed):
+    rng = random.Random(seed)
+    calls = [build(context, rng) for _ in range(warmup + requests)]
+
+    def fetch(call):
+        start = time.perf_counter()
+        status, queries = transport.request(*call)
+        return time.perf_counter() - start, queries, status
+
+    if concurrency == 1:
+        # En el hilo principal: SQLite en memoria solo existe en esta conexion
+        list(map(fetch, calls[:warmup]))
+        start = time.perf_counter()
+        results = list(map(fetch, calls[warmup:]))
+        elapsed = time.perf_counter() - start
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fetch, calls[:warmup]))
+            start = time.perf_counter()
+            results = list(pool.map(fetch, calls[warmup:]))
+            elapsed = time.perf_counter() - start
+    latencies, queries, statuses = zip(*results)
+    return summarize(latencies, queries, statuses, elapsed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(args, context, transport):
+    import django
+    from django.db import connection
+
+    tasks_per_user = context["tasks_per_user"]
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "database": connection.vendor,
+        "transport": transport.name,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "response_cache": args.response_cache,
+        "dataset": {
+            "users": args.users,
+            "tasks": args.tasks,
+            "skew": args.skew,
+            "tags": args.tags,
+            "tags_per_task": args.tags_per_task,
+            "description_words": args.description_words,
+            "seed": args.seed,
+            "max_tasks_per_user": tasks_per_user[0],
+            "median_tasks_per_user": statistics.median(tasks_per_user),
+            "seed_seconds": context["seed_seconds"],
+        },
+    }
+
+
+def compare(baseline, current, max_regression):
+    """
+    Diferencias por escenario frente a ``baseline``. Devuelve las filas y los
+    escenarios que empeoraron (p95 por encima del umbral o mas consultas).
+    """
+    rows = []
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        more_queries = (
+            result["queries_mean"] is not None
+            and before["queries_mean"] is not None
+            and result["queries_mean"] > before["queries_mean"]
+        )
+        rows.append((name, before["p95_ms"], result["p95_ms"], change, more_queries))
+        if change > max_regression or more_queries:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_table(columns, rows, width=14):
+    if columns:
+        print("  ".join(f"{name:>{width}}" for name in columns))
+    for row in rows:
+        print("  ".join(f"{value!s:>{width}}" for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Escenarios separados por comas",
+    )
+    parser.add_argument(
+        "--transport", choices=["inprocess", "http"], default="inprocess"
+    )
+    parser.add_argument("--base-url", help="Servidor ya levantado (--transport http)")
+    parser.add_argument("--response-cache", action="store_true")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--tags", type=int, default=30)
+    parser.add_argument("--tags-per-task", type=int, default=2)
+    parser.add_argument("--description-words", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Resultados JSON de referencia")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    setup_django(args.response_cache)
+    from django.db import connection
+
+    threaded = args.concurrency > 1 or (args.transport == "http" and not args.base_url)
+    if threaded and connection.settings_dict["NAME"] == ":memory:":
+        parser.error(
+            "SQLite en memoria no se comparte entre hilos: --concurrency > 1 y "
+            "--transport http necesitan una base en archivo o PostgreSQL"
+        )
+    context = build_context(args)
+    if args.transport == "http":
+        base_url = args.base_url or start_server()[0]
+        transport = HTTPTransport(base_url)
+    else:
+        transport = InProcessTransport()
+
+    results = {"meta": metadata(args, context, transport), "scenarios": {}}
+    columns = ["scenario", "req/s", "p50_ms", "p95_ms", "p99_ms", "queries", "errors"]
+    print_table(columns, [], width=22)
+    for number, name in enumerate(names):
+        result = run_scenario(
+            transport,
+            SCENARIOS[name],
+            context,
+            args.requests,
+            args.warmup,
+            args.concurrency,
+            seed=args.seed + number,
+        )
+        results["scenarios"][name] = result
+        print_table(
+            [],
+            [
+                [
+                    name,
+                    result["requests_per_second"],
+                    result["p50_ms"],
+                    result["p95_ms"],
+                    result["p99_ms"],
+                    result["queries_mean"],
+                    result["errors"],
+                ]
+            ],
+            width=22,
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows, regressions = compare(baseline, results, args.max_regression)
+        print()
+        print_table(
+            ["scenario", "p95_before", "p95_after", "change", "more_queries"],
+            [
+                (name, before, after, f"{change:+.1%}", more)
+                for name, before, after, change, more in rows
+            ],
+            width=22,
+        )
+        if regressions:
+            print(f"\nRegresiones: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Bajo ASGI las vistas de tareas y etiquetas usan el ORM asincrono
+os.environ.setdefault("TASKS_ASYNC_VIEWS", "True")
+# Sin conexiones persistentes bajo ASGI (config/database.py): usar DB_POOL
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
-# Trigger redeploy on Railway
\ No newline at end of file
+# Trigger redeploy on Railway
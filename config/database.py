@@ -0,0 +1,88 @@
+"""
+Gestion de conexiones a PostgreSQL a partir de variables de entorno.
+
+* Conexiones persistentes (por defecto): cada worker/hilo reutiliza su
+  conexion durante ``DB_CONN_MAX_AGE`` segundos y, con
+  ``DB_CONN_HEALTH_CHECKS``, Django comprueba que sigue viva antes de
+  reutilizarla en otra peticion (evita errores tras un reinicio de la base
+  de datos o un corte por inactividad).
+* Pool del driver (``DB_POOL=True``, psycopg 3 con ``psycopg_pool``): cada
+  proceso mantiene entre ``DB_POOL_MIN_SIZE`` y ``DB_POOL_MAX_SIZE``
+  conexiones abiertas; las peticiones las toman y devuelven al terminar, y
+  cada conexion se comprueba al salir del pool. Django exige
+  ``CONN_MAX_AGE=0`` con pool.
+
+Bajo ASGI las conexiones persistentes quedan atadas a hilos que no
+controlamos, asi que ``config/asgi.py`` usa ``DB_CONN_MAX_AGE=0`` por
+defecto: ahi conviene activar el pool.
+
+Las replicas de lectura (``DATABASE_REPLICA_URLS``) se configuran igual;
+el enrutado esta en ``config/replicas.py``.
+
+Este modulo se importa desde ``settings``: no usa nada de Django.
+"""
+
+import os
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+def env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def pool_options():
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        raise ImportError(
+            "DB_POOL=True requiere psycopg 3 con pool: pip install 'psycopg[pool]'"
+        ) from None
+    return {
+        "min_size": env_int("DB_POOL_MIN_SIZE", 2),
+        "max_size": env_int("DB_POOL_MAX_SIZE", 10),
+        # Segundos que una peticion espera una conexion libre antes de fallar
+        "timeout": env_int("DB_POOL_TIMEOUT", 10),
+        "max_idle": env_int("DB_POOL_MAX_IDLE", 300),
+        "max_lifetime": env_int("DB_POOL_MAX_LIFETIME", 3600),
+        # Comprueba la conexion antes de entregarla (descarta las caidas)
+        "check": ConnectionPool.check_connection,
+    }
+
+
+def configure_connections(database):
+    """Completa un alias de ``DATABASES`` de PostgreSQL con la gestion de conexiones."""
+    options = database.setdefault("OPTIONS", {})
+    options["connect_timeout"] = env_int("DB_CONNECT_TIMEOUT", 5)
+    statement_timeout = env_int("DB_STATEMENT_TIMEOUT", 0)
+    if statement_timeout:
+        options["options"] = f"-c statement_timeout={statement_timeout}"
+
+    if env_bool("DB_POOL", False):
+        options["pool"] = pool_options()
+        database["CONN_MAX_AGE"] = 0
+    else:
+        database["CONN_MAX_AGE"] = env_int("DB_CONN_MAX_AGE", 60)
+    database["CONN_HEALTH_CHECKS"] = env_bool("DB_CONN_HEALTH_CHECKS", True)
+    return database
+
+
+def replica_databases(urls):
+    """Alias ``replica1``, ``replica2``... a partir de URLs separadas por comas."""
+    urls = [url.strip() for url in urls.split(",") if url.strip()]
+    if not urls:
+        return {}
+    # Solo hace falta con replicas configuradas
+    import dj_database_url
+
+    replicas = {}
+    for number, url in enumerate(urls, 1):
+        database = dj_database_url.parse(url)
+        if database["ENGINE"] == "django.db.backends.postgresql":
+            configure_connections(database)
+        # En los tests la replica es el propio primario
+        database["TEST"] = {"MIRROR": "default"}
+        replicas[f"replica{number}"] = database
+    return replicas
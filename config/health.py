@@ -0,0 +1,79 @@
+"""
+Estado de las bases de datos y metricas del pool de conexiones
+(``/health/db/``). Responde 503 si algun alias no contesta a ``SELECT 1``.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+
+from config.replicas import get_replica_set
+
+logger = logging.getLogger(__name__)
+
+
+def pool_stats(connection):
+    """Metricas del pool del driver del alias, o None si no usa pool."""
+    # DatabaseWrapper.pool solo existe en PostgreSQL (None sin OPTIONS["pool"])
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    idle = stats.get("pool_available", 0)
+    queued = stats.get("requests_queued", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "min_size": stats.get("pool_min", 0),
+        "max_size": stats.get("pool_max", 0),
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": stats.get("requests_num", 0),
+        # Peticiones que tuvieron que esperar una conexion libre
+        "queued": queued,
+        "wait_ms_total": wait_ms,
+        "wait_ms_avg": round(wait_ms / queued, 2) if queued else 0.0,
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
+
+
+def check_database(alias):
+    connection = connections[alias]
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError:
+        # El endpoint es publico: el mensaje (host, usuario) solo va al log
+        logger.exception("Base de datos %s no disponible", alias)
+        return {"status": "unhealthy"}
+    return {
+        "status": "healthy",
+        "vendor": connection.vendor,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+        "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+        "pool": pool_stats(connection),
+        # Retraso de las replicas de lectura (None en el primario)
+        "lag_seconds": (
+            get_replica_set().measure_lag(alias)
+            if alias in settings.DATABASE_REPLICAS["ALIASES"]
+            else None
+        ),
+    }
+
+
+def database_healthcheck(request):
+    databases = {alias: check_database(alias) for alias in connections}
+    healthy = all(db["status"] == "healthy" for db in databases.values())
+    return JsonResponse(
+        {"status": "healthy" if healthy else "unhealthy", "databases": databases},
+        status=200 if healthy else 503,
+    )
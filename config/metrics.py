@@ -0,0 +1,471 @@
+"""
+Metricas por peticion y cabecera ``Server-Timing``.
+
+``MetricsMiddleware`` mide cada peticion y la agrega por endpoint (ruta de
+la URL, no la ruta concreta, para acotar las series):
+
+* ``http_requests_total`` por metodo, ruta y codigo de estado.
+* Histogramas de latencia y de consultas SQL por peticion.
+* Totales de tiempo en base de datos, autenticacion, serializacion y
+  renderizado, y bytes de respuesta (divididos por las peticiones dan la
+  media).
+
+Las consultas se cuentan con un ``execute_wrapper`` instalado en cada
+conexion; las fases con ``timed(nombre)`` (autenticacion por token,
+``represent`` de las vistas de tareas y el renderer JSON). La medicion viaja
+en una ContextVar, asi que tambien cuenta lo que las vistas asincronas
+ejecutan con ``sync_to_async``.
+
+Ademas se exportan los contadores de aciertos, fallos y desalojos de las
+caches del proceso listadas en ``METRICS["CACHES"]`` (``stats()`` de cada
+una), con la etiqueta ``cache``.
+
+``/metrics`` expone el formato de texto de Prometheus. Con varios workers de
+gunicorn cada proceso agrega en memoria y, cada ``FLUSH_INTERVAL`` segundos,
+guarda su estado en un archivo propio de ``METRICS["DIR"]``; ``/metrics``
+suma los archivos de todos los procesos. Los archivos de procesos que ya no
+existen (workers reiniciados) se suman a ``metrics-retired.json`` y se
+borran, asi que el directorio no crece con cada reinicio y los contadores no
+retroceden. Los procesos deben ser de la misma maquina (se comprueba el
+pid). Sin ``DIR`` cada proceso solo expone lo suyo.
+
+Sin ``METRICS["TOKEN"]``, ``/metrics`` solo responde con ``DEBUG``: en
+produccion el endpoint exige el token.
+"""
+
+import atexit
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# (nombre, tipo, ayuda) en el orden de /metrics
+METRICS = (
+    ("http_requests_total", "counter", "Peticiones atendidas"),
+    ("http_request_duration_seconds", "histogram", "Latencia de la peticion"),
+    ("http_request_db_queries", "histogram", "Consultas SQL por peticion"),
+    ("http_request_db_seconds_total", "counter", "Tiempo en la base de datos"),
+    ("http_request_auth_seconds_total", "counter", "Tiempo de autenticacion"),
+    ("http_request_serialize_seconds_total", "counter", "Tiempo de serializacion"),
+    ("http_request_render_seconds_total", "counter", "Tiempo de renderizado"),
+    ("http_response_size_bytes_total", "counter", "Bytes de respuesta"),
+    ("cache_hits_total", "counter", "Aciertos de las caches del proceso"),
+    ("cache_misses_total", "counter", "Fallos de las caches del proceso"),
+    ("cache_evictions_total", "counter", "Desalojos de las caches del proceso"),
+)
+PHASES = ("auth", "serialize", "render")
+CACHE_COUNTERS = ("hits", "misses", "evictions")
+# Estado acumulado de los procesos que ya terminaron
+RETIRED_FILENAME = "metrics-retired.json"
+
+
+class RequestTimings:
+    """Mediciones de una peticion (fases y consultas)."""
+
+    __slots__ = ("phases", "queries", "db_seconds")
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self, total):
+        parts = [
+            f"app;dur={total * 1000:.2f}",
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        parts.extend(
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()
+        )
+        return ", ".join(parts)
+
+
+# Mediciones de la peticion en curso (None fuera de una peticion)
+request_timings = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase):
+    """Suma la duracion del bloque a la fase ``phase`` de la peticion en curso."""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] += time.perf_counter() - start
+
+
+def record_query(execute, sql, params, many, context):
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_seconds += time.perf_counter() - start
+
+
+def install_query_timer(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_on_new_connection(sender, connection, **kwargs):
+    # Conexiones de otros hilos (sync_to_async, replicas) al abrirse
+    install_query_timer(connection)
+
+
+connection_created.connect(install_on_new_connection)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas del proceso. Series: ``(metrica, etiquetas)``,
+    con las etiquetas como tupla de pares ordenada.
+    """
+
+    def __init__(self, directory=None, flush_interval=5, caches=None):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        # nombre -> ruta de la funcion que devuelve la cache (con ``stats()``)
+        self.caches = caches or {}
+        self.counters = defaultdict(float)
+        # serie -> [cuentas por bucket (+Inf al final), suma, total]
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        # pid + instante de arranque: un pid reutilizado no pisa otro archivo
+        self.filename = f"metrics-{os.getpid()}-{time.time_ns()}.json"
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atexit.register(self.flush)
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.METRICS
+        return cls(
+            config["DIR"] or None, config["FLUSH_INTERVAL"], config.get("CACHES")
+        )
+
+    def observe(self, name, labels, value, buckets):
+        series = (name, labels)
+        histogram = self.histograms.get(series)
+        if histogram is None:
+            histogram = self.histograms[series] = [[0] * (len(buckets) + 1), 0.0, 0]
+        index = next(
+            (i for i, bound in enumerate(buckets) if value <= bound), len(buckets)
+        )
+        histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def record(self, method, route, status, duration, timings, size):
+        labels = (("method", method), ("route", route))
+        with self._lock:
+            self.counters[
+                "http_requests_total", (*labels, ("status", str(status)))
+            ] += 1
+            self.observe(
+                "http_request_duration_seconds", labels, duration, LATENCY_BUCKETS
+            )
+            self.observe(
+                "http_request_db_queries", labels, timings.queries, QUERY_BUCKETS
+            )
+            self.counters["http_request_db_seconds_total", labels] += timings.db_seconds
+            for phase in PHASES:
+                self.counters[f"http_request_{phase}_seconds_total", labels] += (
+                    timings.phases.get(phase, 0.0)
+                )
+            self.counters["http_response_size_bytes_total", labels] += size
+            self._dirty = True
+        if self.directory is not None:
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def cache_counters(self):
+        counters = []
+        for name, getter in self.caches.items():
+            stats = import_string(getter)().stats()
+            counters.extend(
+                [f"cache_{counter}_total", [["cache", name]], stats[counter]]
+                for counter in CACHE_COUNTERS
+            )
+        return counters
+
+    def state(self):
+        cache_counters = self.cache_counters()
+        with self._lock:
+            state = encode_state(self.counters, self.histograms)
+        state["counters"] += cache_counters
+        return state
+
+    def flush(self):
+        """Guarda el estado del proceso en su archivo (escritura atomica)."""
+        if self.directory is None:
+            return
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._dirty:
+                return
+            self._dirty = False
+        write_state(self.directory / self.filename, self.state())
+
+    def prune(self):
+        """
+        Suma a ``metrics-retired.json`` los archivos de procesos que ya no
+        existen y los borra. Un lock de archivo evita que dos workers sumen
+        el mismo archivo.
+        """
+        # Solo POSIX, como los workers de gunicorn que escriben en DIR
+        import fcntl
+
+        with open(self.directory / "metrics.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            dead = [
+                path
+                for path in self.directory.glob("metrics-*-*.json")
+                if not process_alive(int(path.stem.split("-")[1]))
+            ]
+            if not dead:
+                return
+            retired = self.directory / RETIRED_FILENAME
+            states = read_states([retired, *dead])
+            write_state(retired, encode_state(*merge_states(states)))
+            for path in dead:
+                path.unlink(missing_ok=True)
+
+    def collect(self):
+        """Estado de todos los procesos: el propio y el de los archivos."""
+        states = [self.state()]
+        if self.directory is not None:
+            self.prune()
+            states += read_states(
+                path
+                for path in self.directory.glob("metrics-*.json")
+                if path.name != self.filename
+            )
+        return merge_states(states)
+
+    def exposition(self):
+        """Texto en el formato de exposicion de Prometheus."""
+        counters, histograms = self.collect()
+        buckets = {
+            "http_request_duration_seconds": LATENCY_BUCKETS,
+            "http_request_db_queries": QUERY_BUCKETS,
+        }
+        lines = []
+        for name, kind, help_text in METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{{{format_labels(labels)}}} {value:g}")
+                continue
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets[name], "+Inf"), counts):
+                    cumulative += bucket_count
+                    bucket_labels = format_labels((*labels, ("le", bound)))
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                lines.append(f"{name}_sum{{{format_labels(labels)}}} {total:g}")
+                lines.append(f"{name}_count{{{format_labels(labels)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def encode_state(counters, histograms):
+    """Contadores e histogramas en el formato JSON de los archivos."""
+    return {
+        "counters": [
+            [name, list(map(list, labels)), value]
+            for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, list(map(list, labels)), list(counts), total, count]
+            for (name, labels), (counts, total, count) in histograms.items()
+        ],
+    }
+
+
+def merge_states(states):
+    """Suma estados en el formato de ``encode_state``."""
+    counters = defaultdict(float)
+    histograms = {}
+    for state in states:
+        for name, labels, value in state["counters"]:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, counts, total, count in state["histograms"]:
+            series = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(series, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def read_states(paths):
+    states = []
+    for path in paths:
+        try:
+            states.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # Archivo borrado o a medio escribir por otro proceso
+            continue
+    return states
+
+
+def write_state(path, state):
+    """Escritura atomica: quien lee nunca ve un archivo a medias."""
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(state))
+    os.replace(temporary, path)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, pero es de otro usuario
+        return True
+    return True
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Devuelve el registro de metricas del proceso (se crea al primer uso)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry.from_settings()
+    return _registry
+
+
+def route_of(request):
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+def response_size(response):
+    # Las respuestas en streaming (exportacion) no tienen tamaño conocido
+    return 0 if response.streaming else len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Mide la peticion completa (va el primero en ``MIDDLEWARE``), añade
+    ``Server-Timing`` y registra la peticion. Sincrono y asincrono.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = settings.METRICS
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def finish(self, request, response, timings, start):
+        duration = time.perf_counter() - start
+        if self.config["SERVER_TIMING"]:
+            response["Server-Timing"] = timings.server_timing(duration)
+        get_registry().record(
+            request.method,
+            route_of(request),
+            response.status_code,
+            duration,
+            timings,
+            response_size(response),
+        )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for alias in connections:
+            install_query_timer(connections[alias])
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+
+def prometheus_metrics(request):
+    """
+    ``/metrics``: con ``METRICS_TOKEN`` exige ``Authorization: Bearer <token>``;
+    sin el, solo responde con ``DEBUG``.
+    """
+    expected = settings.METRICS["TOKEN"]
+    if not expected and not settings.DEBUG:
+        return HttpResponse(
+            "Configure METRICS_TOKEN para exponer /metrics\n",
+            status=403,
+            content_type="text/plain",
+        )
+    if expected:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not secrets.compare_digest(given, expected):
+            return HttpResponse(
+                "No autorizado\n", status=401, content_type="text/plain"
+            )
+    registry = get_registry()
+    registry.flush()
+    return HttpResponse(
+        registry.exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,361 @@
+"""
+Perfilado bajo demanda de peticiones individuales.
+
+``ProfilingMiddleware`` perfila con cProfile solo las peticiones que lo
+piden; el resto no paga nada mas que mirar una cabecera:
+
+* Cabecera ``X-Profile`` con un token firmado (``manage.py profile_token``,
+  caduca a los ``TOKEN_MAX_AGE`` segundos y puede limitarse a un prefijo de
+  ruta). Sirve para perfilar la peticion exacta que va lenta en produccion.
+* Muestreo: con ``SAMPLE_RATE`` > 0 se perfila esa fraccion de las
+  peticiones de usuarios staff (el token de la API se resuelve solo para las
+  peticiones que salen en el sorteo).
+
+Cada perfil se guarda en ``PROFILING["DIR"]``: el volcado de cProfile
+(``<id>.prof``, para ``snakeviz`` o ``pstats``) y ``<id>.json`` con la
+peticion, el resumen por tiempo acumulado y el SQL ejecutado (sin
+parametros). Es un buffer circular: solo se conservan los ``MAX_PROFILES``
+mas recientes. La respuesta perfilada lleva ``X-Profile-Id``.
+
+cProfile es global al proceso desde Python 3.12 (``sys.monitoring``), asi
+que solo se perfila una peticion a la vez: si otra peticion ya se esta
+perfilando, la nueva se atiende sin perfil.
+
+``/api/profiles/`` (solo administradores) lista los perfiles y permite
+descargarlos. En ASGI solo se perfila el hilo del event loop y no se captura
+el SQL que las vistas asincronas ejecutan en otros hilos.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework import exceptions
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-Profile"
+SIGNING_SALT = "config.profiling"
+PROFILE_ID = re.compile(r"\d+-\d+")
+# Funciones del resumen y consultas guardadas por perfil
+SUMMARY_LINES = 40
+MAX_QUERIES = 500
+
+# Tomado mientras una peticion se perfila (un profiler activo por proceso)
+_profiling_lock = threading.Lock()
+
+
+def profile_token(path_prefix="/"):
+    """Token para ``X-Profile``: perfila peticiones cuya ruta empiece por ``path_prefix``."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(path_prefix)
+
+
+def token_allows(token, path, max_age):
+    try:
+        prefix = signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=max_age
+        )
+    except signing.BadSignature:
+        logger.warning("Token de perfilado invalido o caducado para %s", path)
+        return False
+    return path.startswith(prefix)
+
+
+def is_staff_request(request):
+    """Resuelve el usuario con los autenticadores de la API (sin pasar por DRF)."""
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(request)
+        except exceptions.APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+class ProfileStore:
+    """Buffer circular de perfiles en disco."""
+
+    def __init__(self, directory, max_profiles):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.PROFILING
+        return cls(config["DIR"], config["MAX_PROFILES"])
+
+    def path(self, profile_id, suffix):
+        if not PROFILE_ID.fullmatch(profile_id):
+            raise Http404
+        return self.directory / f"{profile_id}{suffix}"
+
+    def save(self, profiler, metadata):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = metadata["id"]
+        profiler.dump_stats(self.path(profile_id, ".prof"))
+        data = self.path(profile_id, ".json")
+        temporary = data.with_suffix(".tmp")
+        temporary.write_text(json.dumps(metadata))
+        # El .json aparece completo y despues del .prof: es lo que se lista
+        os.replace(temporary, data)
+        self.prune()
+
+    def ids(self):
+        """Ids de los perfiles guardados, del mas reciente al mas antiguo."""
+        ids = [path.stem for path in self.directory.glob("*.json")]
+        return sorted(ids, key=lambda profile_id: int(profile_id.split("-")[0]))[::-1]
+
+    def prune(self):
+        for profile_id in self.ids()[self.max_profiles :]:
+            for suffix in (".json", ".prof"):
+                self.path(profile_id, suffix).unlink(missing_ok=True)
+
+    def load(self, profile_id):
+        try:
+            return json.loads(self.path(profile_id, ".json").read_text())
+        except (OSError, ValueError):
+            # Borrado por el buffer circular o por otro worker
+            raise Http404 from None
+
+    def list(self):
+        profiles = []
+        for profile_id in self.ids():
+            try:
+                metadata = self.load(profile_id)
+            except Http404:
+                continue
+            metadata.pop("summary")
+            metadata.pop("queries")
+            profiles.append(metadata)
+        return profiles
+
+
+class ProfiledRequest:
+    """Perfil de cProfile y SQL de una peticion."""
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.query_count = 0
+        self.stack = ExitStack()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            if len(self.queries) < MAX_QUERIES:
+                duration = (time.perf_counter() - start) * 1000
+                self.queries.append({"sql": sql, "duration_ms": round(duration, 3)})
+
+    def start(self):
+        """Empieza a perfilar; False si ya hay otro profiler activo."""
+        if not _profiling_lock.acquire(blocking=False):
+            return False
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Otro profiler ajeno a este modulo ocupa sys.monitoring
+            _profiling_lock.release()
+            return False
+        self.started = time.perf_counter()
+        # Solo las conexiones de este hilo y solo durante esta peticion
+        for alias in connections:
+            self.stack.enter_context(
+                connections[alias].execute_wrapper(self.record_query)
+            )
+        return True
+
+    def stop(self):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        try:
+            self.stack.close()
+        finally:
+            _profiling_lock.release()
+
+    def summary(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        return stream.getvalue()
+
+    def metadata(self, request, response):
+        user = getattr(request, "user", None)
+        return {
+            "id": f"{time.time_ns()}-{os.getpid()}",
+            "created_at": timezone.now().isoformat(),
+            "trigger": self.trigger,
+            "method": request.method,
+            "path": request.path,
+            "query_string": request.META.get("QUERY_STRING", ""),
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "status": response.status_code,
+            "duration_ms": round(self.duration * 1000, 3),
+            "query_count": self.query_count,
+            "queries": self.queries,
+            "summary": self.summary(),
+        }
+
+
+class ProfilingMiddleware:
+    """Perfila las peticiones marcadas con ``X-Profile`` o sorteadas. Sincrono y asincrono."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = settings.PROFILING
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.store = ProfileStore.from_settings()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def has_valid_header(self, request):
+        token = request.headers.get(HEADER)
+        return token is not None and token_allows(
+            token, request.path, self.config["TOKEN_MAX_AGE"]
+        )
+
+    def sampled(self):
+        rate = self.config["SAMPLE_RATE"]
+        return bool(rate) and random.random() < rate
+
+    def trigger(self, request):
+        """Motivo para perfilar la peticion (None si no se perfila)."""
+        if self.has_valid_header(request):
+            return "header"
+        if self.sampled() and is_staff_request(request):
+            return "sample"
+        return None
+
+    async def atrigger(self, request):
+        """``trigger`` con los autenticadores (ORM) fuera del event loop."""
+        if self.has_valid_header(request):
+            return "header"
+        if self.sampled() and await sync_to_async(is_staff_request)(request):
+            return "sample"
+        return None
+
+    def finish(self, request, response, profiled):
+        metadata = profiled.metadata(request, response)
+        try:
+            self.store.save(profiled.profiler, metadata)
+        except OSError:
+            logger.exception("No se pudo guardar el perfil de %s", request.path)
+            return response
+        response["X-Profile-Id"] = metadata["id"]
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profiled = ProfiledRequest(trigger)
+        if not profiled.start():
+            logger.info(
+                "Otra peticion se esta perfilando, sin perfil: %s", request.path
+            )
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiled.stop()
+        return self.finish(request, response, profiled)
+
+    async def __acall__(self, request):
+        trigger = await self.atrigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        profiled = ProfiledRequest(trigger)
+        if not profiled.start():
+            logger.info(
+                "Otra peticion se esta perfilando, sin perfil: %s", request.path
+            )
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiled.stop()
+        # Escribe los archivos y poda el buffer: fuera del event loop
+        return await sync_to_async(self.finish)(request, response, profiled)
+
+
+# Vistas de administracion de los perfiles guardados
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+    query_budget = {"GET": 3}
+
+    @extend_schema(
+        operation_id="profiles_list",
+        summary="Listar perfiles",
+        description="Perfiles guardados, del mas reciente al mas antiguo (sin SQL ni resumen)",
+        tags=["Profiling"],
+        responses={200: {"type": "array", "items": {"type": "object"}}},
+    )
+    def get(self, request):
+        return Response(ProfileStore.from_settings().list())
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAdminUser]
+    query_budget = {"GET": 3}
+
+    @extend_schema(
+        summary="Obtener perfil",
+        description="Peticion perfilada, resumen por tiempo acumulado y SQL ejecutado",
+        tags=["Profiling"],
+        responses={200: {"type": "object"}, 404: {"description": "No encontrado"}},
+    )
+    def get(self, request, profile_id):
+        return Response(ProfileStore.from_settings().load(profile_id))
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+    query_budget = {"GET": 3}
+
+    @extend_schema(
+        summary="Descargar perfil",
+        description="Volcado de cProfile (abrir con snakeviz o pstats)",
+        tags=["Profiling"],
+        responses={200: {"type": "string", "format": "binary"}},
+    )
+    def get(self, request, profile_id):
+        path = ProfileStore.from_settings().path(profile_id, ".prof")
+        try:
+            return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+        except FileNotFoundError:
+            raise Http404 from None
@@ -0,0 +1,223 @@
+"""
+Presupuesto de consultas y deteccion de N+1.
+
+Las vistas declaran cuantas consultas SQL puede hacer una peticion con el
+atributo ``query_budget`` (un entero o un dict por metodo HTTP, p. ej.
+``{"GET": 4, "POST": 8}``); las vistas de funcion, con el decorador
+``query_budget(n)``. ``QueryBudgetMiddleware`` cuenta las consultas de cada
+peticion y, ademas, agrupa las consultas por forma (el SQL parametrizado, con
+las listas ``IN (...)`` colapsadas): una misma forma repetida
+``N_PLUS_ONE_THRESHOLD`` veces o mas es un N+1 y se informa con el punto del
+codigo del proyecto que la lanzo.
+
+``QUERY_BUDGET["MODE"]``: ``"raise"`` (los tests; la peticion falla con
+``QueryBudgetExceeded``), ``"log"`` (desarrollo, por defecto con DEBUG) u
+``"off"`` (produccion: el middleware se desactiva y no cuesta nada).
+
+Los tests usan los fixtures de ``conftest.py``: ``query_budget(n)`` mide un
+bloque y falla con el informe si se pasa del presupuesto o hay un N+1.
+"""
+
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from config import metrics
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+VALUES_LIST = re.compile(r"VALUES (?:\((?:%s, )*%s\), )*\((?:%s, )*%s\)")
+# Otros execute_wrapper de config que no son el origen de la consulta
+INSTRUMENTATION = {__file__, metrics.__file__}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql):
+    """SQL sin el numero de parametros de ``IN`` y ``VALUES``."""
+    return VALUES_LIST.sub("VALUES (...)", IN_LIST.sub("IN (...)", sql))
+
+
+def call_site():
+    """Primer marco del codigo del proyecto (fuera de Django y de los wrappers)."""
+    base = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base)
+            and filename not in INSTRUMENTATION
+            and "site-packages" not in filename
+        ):
+            path = Path(filename).relative_to(base)
+            return f"{path}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return "desconocido"
+
+
+class QueryLog:
+    """Consultas de una peticion o de un bloque medido."""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.sites = {}
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def add(self, sql):
+        shape = query_shape(sql)
+        self.shapes[shape] += 1
+        if shape not in self.sites:
+            self.sites[shape] = call_site()
+
+    def repeated(self, threshold):
+        """Formas ejecutadas ``threshold`` veces o mas: ``[(forma, veces, sitio)]``."""
+        return [
+            (shape, times, self.sites[shape])
+            for shape, times in self.shapes.most_common()
+            if times >= threshold
+        ]
+
+    def report(self, width=120):
+        """Consultas agrupadas por forma, de la mas repetida a la menos."""
+        lines = []
+        for shape, times in self.shapes.most_common():
+            sql = " ".join(shape.split())
+            if len(sql) > width:
+                sql = sql[: width - 3] + "..."
+            lines.append(f"  {times}x {self.sites[shape]}: {sql}")
+        return "\n".join(lines)
+
+    def problems(self, budget=None, threshold=None):
+        """Mensajes de presupuesto superado y de N+1 (lista vacia si no hay)."""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} consultas, presupuesto {budget}")
+        if threshold:
+            problems.extend(
+                f"N+1: {times} veces desde {site}"
+                for _, times, site in self.repeated(threshold)
+            )
+        return problems
+
+
+# Registros activos (la peticion en curso y los bloques de los fixtures)
+query_logs = ContextVar("query_logs", default=())
+
+
+def record_query(execute, sql, params, many, context):
+    for log in query_logs.get():
+        log.add(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_on_new_connection(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+connection_created.connect(install_on_new_connection)
+
+
+@contextmanager
+def track_queries():
+    """Registra las consultas del bloque en el ``QueryLog`` que devuelve."""
+    for alias in connections:
+        install_query_recorder(connections[alias])
+    log = QueryLog()
+    token = query_logs.set((*query_logs.get(), log))
+    try:
+        yield log
+    finally:
+        query_logs.reset(token)
+
+
+def query_budget(limit):
+    """Decorador de vistas de funcion: presupuesto de consultas de la vista."""
+
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+def view_budget(request):
+    """Presupuesto de la vista que atendio la peticion (None si no declara)."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    budget = getattr(view, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(request.method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Comprueba el presupuesto y los N+1 de cada peticion. Sincrono y
+    asincrono; se desactiva con ``MODE="off"``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = settings.QUERY_BUDGET
+        if self.config["MODE"] == "off":
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def check(self, request, log):
+        problems = log.problems(
+            view_budget(request), self.config["N_PLUS_ONE_THRESHOLD"]
+        )
+        if not problems:
+            return
+        message = (
+            f"{request.method} {request.path}: "
+            + "; ".join(problems)
+            + "\n"
+            + log.report()
+        )
+        if self.config["MODE"] == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with track_queries() as log:
+            response = self.get_response(request)
+        self.check(request, log)
+        return response
+
+    async def __acall__(self, request):
+        with track_queries() as log:
+            response = await self.get_response(request)
+        self.check(request, log)
+        return response
@@ -0,0 +1,214 @@
+"""
+Lecturas en replicas con "read-your-writes".
+
+``ReplicaRoutingMiddleware`` marca las peticiones GET/HEAD/OPTIONS como
+aptas para leer de una replica y ``ReplicaRouter`` envia sus lecturas a una
+de las replicas de ``DATABASE_REPLICAS["ALIASES"]`` (las escrituras y el
+resto de peticiones van siempre a ``default``).
+
+* Fijacion al primario: tras una escritura con exito, el cliente (por su
+  token o cookie de sesion) lee del primario durante ``PIN_SECONDS``, asi
+  que nunca deja de ver lo que acaba de escribir aunque la replica vaya
+  atrasada. La marca vive en la cache ``PIN_CACHE`` (Redis para que la
+  compartan todos los workers).
+* Retraso: cada proceso mide el retraso de cada replica cada
+  ``LAG_CHECK_INTERVAL`` segundos; las que superan ``MAX_LAG`` o no
+  responden dejan de usarse y, si no queda ninguna, se lee del primario.
+  ``PIN_SECONDS`` deberia ser mayor que ``MAX_LAG``.
+
+Para probarlo en local basta con otra base SQLite como replica:
+``DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3`` y
+``python manage.py migrate --database replica1`` (sin replicacion, sirve
+para ver a donde va cada consulta).
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Retraso en segundos: 0 en el primario o si la replica ya aplico todo el WAL
+# recibido (sin escrituras recientes replay_timestamp envejece sin retraso real)
+LAG_SQL = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+# La peticion en curso puede leer de una replica
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+class ReplicaSet:
+    """Replicas configuradas y su retraso medido (por proceso)."""
+
+    def __init__(self, aliases, max_lag=5, lag_check_interval=5):
+        self.aliases = list(aliases)
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._lag = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.DATABASE_REPLICAS
+        return cls(
+            config["ALIASES"],
+            max_lag=config["MAX_LAG"],
+            lag_check_interval=config["LAG_CHECK_INTERVAL"],
+        )
+
+    def measure_lag(self, alias):
+        """Retraso de la replica en segundos, o None si no responde."""
+        connection = connections[alias]
+        sql = LAG_SQL.get(connection.vendor)
+        if sql is None:
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            logger.warning("Replica %s no disponible", alias, exc_info=True)
+            return None
+
+    def lag(self, alias):
+        now = time.monotonic()
+        checked = self._lag.get(alias)
+        if checked is None or now - checked[0] >= self.lag_check_interval:
+            with self._lock:
+                checked = self._lag.get(alias)
+                if checked is None or now - checked[0] >= self.lag_check_interval:
+                    checked = self._lag[alias] = (now, self.measure_lag(alias))
+        return checked[1]
+
+    def healthy(self):
+        healthy = []
+        for alias in self.aliases:
+            lag = self.lag(alias)
+            if lag is not None and lag <= self.max_lag:
+                healthy.append(alias)
+        return healthy
+
+    def choose(self):
+        """Una replica al dia (al azar), o ``default`` si no hay ninguna."""
+        healthy = self.healthy()
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+
+_replica_set = None
+_replica_set_lock = threading.Lock()
+
+
+def get_replica_set():
+    """Devuelve las replicas del proceso (se crean al primer uso)."""
+    global _replica_set
+    if _replica_set is None:
+        with _replica_set_lock:
+            if _replica_set is None:
+                _replica_set = ReplicaSet.from_settings()
+    return _replica_set
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        return get_replica_set().choose()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas y primario tienen los mismos datos
+        return True
+
+
+def pin_key(request):
+    """Clave de fijacion del cliente (token o sesion), o None si es anonimo."""
+    credentials = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return "db-pin:" + hashlib.sha256(credentials.encode()).hexdigest()[:32]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide si la peticion puede leer de una replica y fija el cliente al
+    primario tras escribir. Funciona igual en WSGI y ASGI: la decision viaja
+    en una ContextVar, que ``sync_to_async`` copia a los hilos del ORM.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.DATABASE_REPLICAS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @property
+    def pins(self):
+        return caches[self.config["PIN_CACHE"]]
+
+    def can_read_replica(self, request):
+        if not self.config["ALIASES"] or request.method not in SAFE_METHODS:
+            return False
+        key = pin_key(request)
+        return key is None or self.pins.get(key) is None
+
+    async def acan_read_replica(self, request):
+        if not self.config["ALIASES"] or request.method not in SAFE_METHODS:
+            return False
+        key = pin_key(request)
+        return key is None or await self.pins.aget(key) is None
+
+    def must_pin(self, request, response):
+        """Clave a fijar tras una escritura con exito, o None."""
+        if not self.config["ALIASES"] or request.method in SAFE_METHODS:
+            return None
+        if response.status_code >= 400:
+            return None
+        return pin_key(request)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = replica_reads.set(self.can_read_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        key = self.must_pin(request, response)
+        if key is not None:
+            self.pins.set(key, True, self.config["PIN_SECONDS"])
+        return response
+
+    async def __acall__(self, request):
+        token = replica_reads.set(await self.acan_read_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        key = self.must_pin(request, response)
+        if key is not None:
+            await self.pins.aset(key, True, self.config["PIN_SECONDS"])
+        return response
@@ -16,6 +16,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from config.database import configure_connections, replica_databases
+
 # Detectar si estamos ejecutando tests
 TESTING = (
     "test" in sys.argv
@@ -42,9 +44,9 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 DEBUG = os.getenv("DJANGO_DEBUG", "False").lower() == "true"
 
 ALLOWED_HOSTS = [
-    'localhost',
-    '127.0.0.1',
-    '.railway.app',
+    "localhost",
+    "127.0.0.1",
+    ".railway.app",
 ]
 
 
@@ -66,8 +68,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero: mide la peticion completa (config/metrics.py)
+    "config.metrics.MetricsMiddleware",
+    "config.query_budget.QueryBudgetMiddleware",
+    "config.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    "tasks.middleware.CompressionMiddleware",
+    "config.replicas.ReplicaRoutingMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -119,10 +127,45 @@ else:
         }
     }
 
-if 'DATABASE_URL' in os.environ:
+if "DATABASE_URL" in os.environ:
     import dj_database_url
-    DATABASES = {
-        'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+
+    DATABASES = {"default": dj_database_url.parse(os.environ.get("DATABASE_URL"))}
+
+# Conexiones persistentes o pool del driver segun las variables DB_*
+# (config/database.py)
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    configure_connections(DATABASES["default"])
+
+# Replicas de lectura (config/replicas.py): URLs separadas por comas. Las
+# lecturas de GET/HEAD van a una replica al dia salvo que el cliente haya
+# escrito en los ultimos PIN_SECONDS (entonces al primario)
+DATABASES.update(replica_databases(os.getenv("DATABASE_REPLICA_URLS", "")))
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+DATABASE_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "PIN_SECONDS": int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "10")),
+    "MAX_LAG": float(os.getenv("DATABASE_REPLICA_MAX_LAG", "5")),
+    "LAG_CHECK_INTERVAL": float(os.getenv("DATABASE_REPLICA_LAG_CHECK_INTERVAL", "5")),
+    "PIN_CACHE": os.getenv("DATABASE_REPLICA_PIN_CACHE", "default"),
+}
+
+
+# Cache
+# Redis si hay REDIS_URL (docker-compose), memoria local en otro caso
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
     }
 
 
@@ -162,7 +205,7 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Media files (user uploads)
 MEDIA_URL = "media/"
@@ -175,8 +218,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # DRF confirucion
 REST_FRAMEWORK = {
+    # JSON con orjson si esta instalado (tasks.renderers); API_JSON_BACKEND
+    "DEFAULT_RENDERER_CLASSES": [
+        "tasks.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "tasks.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
     "DEFAULT_FILTER_BACKENDS": [
@@ -189,6 +242,134 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Codificador JSON de la API: "auto" (orjson si esta instalado) o "stdlib"
+API_JSON_BACKEND = os.getenv("API_JSON_BACKEND", "auto")
+
+# Compresion de respuestas (tasks.middleware.CompressionMiddleware) segun
+# Accept-Encoding: zstd y br solo si zstandard/brotli estan instalados
+RESPONSE_COMPRESSION = {
+    "ENABLED": os.getenv("RESPONSE_COMPRESSION_ENABLED", "True").lower() == "true",
+    "ENCODINGS": os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(","),
+    "MIN_SIZE": int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024")),
+    "GZIP_LEVEL": int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6")),
+    "BROTLI_QUALITY": int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "4")),
+    "ZSTD_LEVEL": int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", "3")),
+}
+
+# Cache de tokens de autenticacion: LRU local + nivel compartido opcional
+# (alias de CACHES; por defecto Redis cuando esta configurado)
+TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    "TTL": int(os.getenv("TOKEN_CACHE_TTL", "60")),
+    "SHARED_CACHE": os.getenv("TOKEN_CACHE_SHARED", "default" if REDIS_URL else None),
+    "SHARED_TTL": int(os.getenv("TOKEN_CACHE_SHARED_TTL", "300")),
+}
+
+# Cache de respuestas de /api/tasks/ (listado y detalle) por usuario.
+# Backends: tasks.cache.DjangoCacheBackend (alias de CACHES, p. ej. Redis, que
+# aplica sus propios limites de memoria; por defecto cuando hay Redis) o
+# tasks.cache.LocalMemoryBackend (LRU acotado por entradas y bytes, para un
+# unico proceso en desarrollo). Las versiones de ambos viven en CACHES.
+TASK_RESPONSE_CACHE_BACKEND = os.getenv(
+    "TASK_RESPONSE_CACHE_BACKEND",
+    "tasks.cache.DjangoCacheBackend" if REDIS_URL else "tasks.cache.LocalMemoryBackend",
+)
+TASK_RESPONSE_CACHE = {
+    "ENABLED": os.getenv("TASK_RESPONSE_CACHE_ENABLED", "True").lower() == "true",
+    "BACKEND": TASK_RESPONSE_CACHE_BACKEND,
+    "TIMEOUT": int(os.getenv("TASK_RESPONSE_CACHE_TIMEOUT", "300")),
+    "OPTIONS": (
+        {"ALIAS": os.getenv("TASK_RESPONSE_CACHE_ALIAS", "default")}
+        if TASK_RESPONSE_CACHE_BACKEND.endswith("DjangoCacheBackend")
+        else {
+            "MAX_ENTRIES": int(os.getenv("TASK_RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            "MAX_BYTES": int(os.getenv("TASK_RESPONSE_CACHE_MAX_BYTES", "33554432")),
+            "VERSION_ALIAS": os.getenv("TASK_RESPONSE_CACHE_ALIAS", "default"),
+        }
+    ),
+}
+
+# Alias de CACHES donde se publica la version del snapshot de etiquetas
+# (tasks.tags); con Redis los workers detectan los cambios de los demas
+TASK_TAG_SNAPSHOT_CACHE = os.getenv("TASK_TAG_SNAPSHOT_CACHE", "default")
+
+# Vistas asincronas de tareas y etiquetas (tasks.async_views). config/asgi.py
+# las activa por defecto; bajo WSGI se usan las vistas sincronas.
+TASKS_ASYNC_VIEWS = os.getenv("TASKS_ASYNC_VIEWS", "False").lower() == "true"
+
+# GET de tareas leidos como filas (values_list) en vez de instancias y
+# TaskSerializer (tasks.rows); la respuesta es la misma
+TASK_FAST_READ_PATH = os.getenv("TASK_FAST_READ_PATH", "True").lower() == "true"
+
+# Maximo de operaciones por peticion en /api/tasks/bulk/
+TASK_BULK_MAX_OPERATIONS = int(os.getenv("TASK_BULK_MAX_OPERATIONS", "100"))
+
+# Filas por bloque del cursor de /api/tasks/export/
+TASK_EXPORT_CHUNK_SIZE = int(os.getenv("TASK_EXPORT_CHUNK_SIZE", "2000"))
+
+# Importacion de tareas (/api/tasks/import/ y manage.py import_tasks): filas
+# por lote y errores por fila incluidos en la respuesta de la API
+TASK_IMPORT_BATCH_SIZE = int(os.getenv("TASK_IMPORT_BATCH_SIZE", "1000"))
+TASK_IMPORT_MAX_REPORTED_ERRORS = int(
+    os.getenv("TASK_IMPORT_MAX_REPORTED_ERRORS", "100")
+)
+
+# Archivo de tareas (manage.py archive_tasks): completadas y sin cambios
+# desde hace AFTER_DAYS dias, movidas en lotes de BATCH_SIZE
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90"))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", "500"))
+
+# Borrado por lotes de usuarios y etiquetas (tasks/deletion.py): lotes de
+# BATCH_SIZE filas con PAUSE segundos entre ellos. Una etiqueta con mas de
+# ASYNC_THRESHOLD tareas se borra fuera de la peticion: en un hilo del
+# proceso ("thread", solo desarrollo: el hilo muere con el worker web) o con
+# "manage.py run_deletions" ("worker")
+DELETION = {
+    "BATCH_SIZE": int(os.getenv("DELETION_BATCH_SIZE", "500")),
+    "PAUSE": float(os.getenv("DELETION_PAUSE", "0")),
+    "ASYNC_THRESHOLD": int(os.getenv("DELETION_ASYNC_THRESHOLD", "2000")),
+    "RUNNER": os.getenv("DELETION_RUNNER", "thread"),
+}
+
+# Metricas por peticion (config/metrics.py): cabecera Server-Timing y
+# /metrics para Prometheus. Con varios workers, DIR es un directorio local
+# compartido donde cada proceso guarda su estado cada FLUSH_INTERVAL segundos;
+# con TOKEN, /metrics exige "Authorization: Bearer <TOKEN>" (sin TOKEN solo
+# responde con DEBUG)
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True").lower() == "true",
+    "SERVER_TIMING": os.getenv("METRICS_SERVER_TIMING", "True").lower() == "true",
+    "DIR": os.getenv("METRICS_DIR", ""),
+    "FLUSH_INTERVAL": float(os.getenv("METRICS_FLUSH_INTERVAL", "5")),
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+    # Caches del proceso cuyos stats() se exportan (etiqueta cache=<nombre>)
+    "CACHES": {
+        "task_response": "tasks.cache.get_response_cache",
+        "auth_token": "accounts.authentication.get_token_cache",
+    },
+}
+
+# Presupuesto de consultas por vista y deteccion de N+1
+# (config/query_budget.py): "raise", "log" u "off"
+QUERY_BUDGET = {
+    "MODE": os.getenv("QUERY_BUDGET_MODE", "log" if DEBUG else "off"),
+    "N_PLUS_ONE_THRESHOLD": int(os.getenv("QUERY_BUDGET_N_PLUS_ONE_THRESHOLD", "5")),
+}
+
+# Perfilado bajo demanda (config/profiling.py): cabecera X-Profile con un
+# token de "manage.py profile_token" o una fraccion SAMPLE_RATE de las
+# peticiones de staff. Se guardan los MAX_PROFILES ultimos en DIR
+PROFILING = {
+    "ENABLED": os.getenv("PROFILING_ENABLED", "True").lower() == "true",
+    "DIR": os.getenv("PROFILING_DIR") or str(BASE_DIR / "profiles"),
+    "MAX_PROFILES": int(os.getenv("PROFILING_MAX_PROFILES", "50")),
+    "SAMPLE_RATE": float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+    "TOKEN_MAX_AGE": int(os.getenv("PROFILING_TOKEN_MAX_AGE", "3600")),
+}
+
+# Configuracion de texto completo de PostgreSQL para la busqueda de tareas
+TASK_SEARCH_CONFIG = os.getenv("TASK_SEARCH_CONFIG", "simple")
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "TaskFlow API",
     "DESCRIPTION": "API REST para gestion de tareas con autenticacion y filtros avanzado",
@@ -199,5 +380,6 @@ SPECTACULAR_SETTINGS = {
         {"name": "Authentication", "description": "Operaciones de autentiacion"},
         {"name": "Tasks", "description": "Gestion de tareas"},
         {"name": "Tags", "description": "Gestion de etiquetas"},
+        {"name": "Profiling", "description": "Perfiles de peticiones (admin)"},
     ],
 }
@@ -18,6 +18,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from django.http import JsonResponse
+from config.health import database_healthcheck
+from config.metrics import prometheus_metrics
+from config.profiling import ProfileDetailView, ProfileDownloadView, ProfileListView
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -48,7 +51,20 @@ urlpatterns = [
     path('', api_root, name='api_root'),
     path('api/', api_root, name='api_root_api'),
     path('health/', healthcheck, name='healthcheck'),
+    path("health/db/", database_healthcheck, name="database-healthcheck"),
+    path("metrics", prometheus_metrics, name="metrics"),
     path("api/auth/", include("accounts.urls")),
+    path("api/profiles/", ProfileListView.as_view(), name="profile-list"),
+    path(
+        "api/profiles/<str:profile_id>/",
+        ProfileDetailView.as_view(),
+        name="profile-detail",
+    ),
+    path(
+        "api/profiles/<str:profile_id>/download/",
+        ProfileDownloadView.as_view(),
+        name="profile-download",
+    ),
     path("api/", include("tasks.urls")),
     # Documentacion automatica
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
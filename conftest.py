@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+
+import pytest
+from django.conf import settings as django_settings
+
+from accounts.authentication import get_token_cache
+from config.query_budget import track_queries
+from tasks.cache import get_response_cache
+from tasks.tags import get_tag_snapshot
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """
+    Las caches viven en el proceso y los ids se reutilizan entre tests (la
+    base de datos se revierte): se vacian antes de cada test.
+    """
+    get_token_cache().clear()
+    get_response_cache().clear()
+    get_tag_snapshot().clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Toda peticion de los tests respeta el presupuesto de su vista y no hace N+1."""
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "MODE": "raise"}
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Presupuesto de un bloque: ``with query_budget(4): ...`` falla con el
+    informe de consultas si el bloque hace mas de 4 o repite una consulta
+    (N+1). ``query_budget()`` solo comprueba los N+1.
+    """
+
+    @contextmanager
+    def check(limit=None, n_plus_one_threshold=None):
+        threshold = (
+            n_plus_one_threshold or django_settings.QUERY_BUDGET["N_PLUS_ONE_THRESHOLD"]
+        )
+        with track_queries() as log:
+            yield log
+        problems = log.problems(limit, threshold)
+        if problems:
+            pytest.fail("; ".join(problems) + "\n" + log.report())
+
+    return check
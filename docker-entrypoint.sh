@@ -52,6 +52,12 @@ else:
 log "📁 Collecting static files..."
 python manage.py collectstatic --no-input --clear
 
+# Metricas de workers de un despliegue anterior
+if [ -n "$METRICS_DIR" ]; then
+    log "📈 Clearing metrics directory..."
+    rm -f "$METRICS_DIR"/metrics-*.json
+fi
+
 # Verificar configuración
 log "🔍 Checking Django configuration..."
 python manage.py check
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Tag, Task
+from .models import DeletionJob, Tag, Task
 
 
 # Register your models here.
@@ -18,3 +18,17 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ["name"]
     search_fields = ["name"]
     ordering = ["name"]
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ["kind", "target_id", "status", "deleted", "total", "created_at"]
+    list_filter = ["kind", "status"]
+    ordering = ["-created_at"]
+
+    def has_add_permission(self, request):
+        # Los crean la API y manage.py delete_user
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tasks"
+
+    def ready(self):
+        # Registrar los receptores de señales (indice de busqueda, etc.)
+        from . import signals  # noqa: F401
@@ -0,0 +1,174 @@
+"""
+Archivo de tareas completadas hace tiempo.
+
+Las tareas completadas y sin cambios desde hace ``TASK_ARCHIVE_AFTER_DAYS``
+dias se mueven, con sus etiquetas, de ``tasks_task`` a ``tasks_archivedtask``
+(``manage.py archive_tasks``), asi que el listado por defecto y sus indices
+solo recorren datos activos:
+
+* Lotes de ``TASK_ARCHIVE_BATCH_SIZE`` tareas, cada uno en su propia
+  transaccion corta (``INSERT ... SELECT`` y ``DELETE`` por id). En
+  PostgreSQL las filas se bloquean con ``SKIP LOCKED``: las que otra
+  peticion esta modificando quedan para la siguiente ejecucion.
+* La fila archivada conserva id, fechas, ``tag_names`` y documento de
+  busqueda; los contadores de ``tasks.stats`` siguen contandola.
+* Lecturas: el detalle y ``?include_archived=true`` leen la vista
+  ``tasks_task_all`` (``TaskRecord``). Modificar o borrar una tarea
+  archivada la devuelve antes a ``tasks_task`` (``restore_tasks``).
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import search
+from .cache import get_response_cache
+from .models import ArchivedTask, Task, TaskRecord
+from .tags import refresh_tag_names
+
+INCLUDE_ARCHIVED_PARAM = "include_archived"
+
+# Columnas comunes a tasks_task y tasks_archivedtask
+COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "completed",
+    "completed_at",
+    "created_at",
+    "updated_at",
+    "search_vector",
+    "tag_names",
+    "user_id",
+)
+
+
+def include_archived(request):
+    """``?include_archived=true``: el listado incluye las tareas archivadas."""
+    value = request.query_params.get(INCLUDE_ARCHIVED_PARAM, "")
+    return value.lower() in ("true", "1")
+
+
+def task_model(request):
+    """Modelo que lee el listado: solo tareas activas o tambien archivadas."""
+    return TaskRecord if include_archived(request) else Task
+
+
+def move_tasks(ids, source, target, using="default", extra=None):
+    """
+    Copia las filas ``ids`` de ``source`` a ``target`` con sus etiquetas y las
+    borra de ``source``, sin leerlas en Python. ``extra`` son columnas
+    adicionales de ``target`` con su valor.
+    """
+    extra = extra or {}
+    columns = ", ".join(COLUMNS + tuple(extra))
+    values = ", ".join(COLUMNS + ("%s",) * len(extra))
+    placeholders = ", ".join(["%s"] * len(ids))
+    source_tags = source.tags.through._meta.db_table
+    target_tags = target.tags.through._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {target._meta.db_table} ({columns}) "
+            f"SELECT {values} FROM {source._meta.db_table} "
+            f"WHERE id IN ({placeholders})",
+            [*extra.values(), *ids],
+        )
+        cursor.execute(
+            f"INSERT INTO {target_tags} (task_id, tag_id) "
+            f"SELECT task_id, tag_id FROM {source_tags} "
+            f"WHERE task_id IN ({placeholders})",
+            ids,
+        )
+        cursor.execute(
+            f"DELETE FROM {source_tags} WHERE task_id IN ({placeholders})", ids
+        )
+        cursor.execute(
+            f"DELETE FROM {source._meta.db_table} WHERE id IN ({placeholders})", ids
+        )
+
+
+def archive_cutoff(days=None, now=None):
+    if days is None:
+        days = settings.TASK_ARCHIVE_AFTER_DAYS
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archive_batch(cutoff, after_id=0, batch_size=500, using="default"):
+    """
+    Archiva hasta ``batch_size`` tareas con id mayor que ``after_id``
+    completadas y sin cambios antes de ``cutoff``. Devuelve sus ids.
+    """
+    with transaction.atomic(using=using):
+        rows = list(
+            Task.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .filter(
+                id__gt=after_id,
+                completed=True,
+                completed_at__lt=cutoff,
+                updated_at__lt=cutoff,
+            )
+            .order_by("id")
+            .values_list("id", "user_id")[:batch_size]
+        )
+        ids = [task_id for task_id, _ in rows]
+        if ids:
+            move_tasks(ids, Task, ArchivedTask, using, {"archived_at": timezone.now()})
+            for user_id in {user_id for _, user_id in rows}:
+                get_response_cache().invalidate_user(user_id)
+    return ids
+
+
+def archive_tasks(days=None, batch_size=None, pause=0, using="default", now=None):
+    """
+    Archiva por lotes todas las tareas elegibles (recorre ``tasks_task`` por
+    id una sola vez). Devuelve cuantas se archivaron.
+    """
+    cutoff = archive_cutoff(days, now)
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    total = 0
+    last_id = 0
+    while True:
+        ids = archive_batch(cutoff, last_id, batch_size, using)
+        if not ids:
+            return total
+        total += len(ids)
+        last_id = ids[-1]
+        if pause:
+            # Deja respirar a la base (replicas, autovacuum) entre lotes
+            time.sleep(pause)
+
+
+def restore_tasks(user, task_ids, using="default"):
+    """
+    Devuelve a ``tasks_task`` las tareas archivadas de ``user`` con esos ids.
+    Devuelve los ids restaurados. Si el titulo ya lo usa una tarea activa
+    lanza ``IntegrityError`` (el savepoint deja la transaccion utilizable).
+    """
+    ids = list(
+        ArchivedTask.objects.using(using)
+        .filter(user=user, id__in=task_ids)
+        .values_list("id", flat=True)
+    )
+    if ids:
+        with transaction.atomic(using=using):
+            move_tasks(ids, ArchivedTask, Task, using)
+    return ids
+
+
+def refresh_archived_tags(task_ids, using="default"):
+    """
+    Tras renombrar o borrar una etiqueta: recalcula ``tag_names`` y el
+    documento de busqueda de las tareas archivadas que la usaban.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    refresh_tag_names(task_ids, using=using, model=ArchivedTask)
+    ArchivedTask.objects.using(using).filter(pk__in=task_ids).update(
+        updated_at=timezone.now()
+    )
+    search.update_search_documents(task_ids, using=using, model=ArchivedTask)
@@ -0,0 +1,102 @@
+"""
+Versiones asincronas (ASGI) de las vistas de tareas y etiquetas.
+
+Mismas URLs, filtros, busqueda, ordenamiento, paginacion, permisos, cache
+de respuestas y peticiones condicionales que ``tasks.views``: cada vista
+hereda de la sincrona y solo reemplaza ``dispatch`` y los GET. Las tareas se
+leen con ``alist``/``aretrieve`` de ``tasks.mixins``, que comparten cada paso
+con ``list``/``retrieve`` y esperan a la base de datos con el ORM asincrono
+(``aaggregate``, ``afirst``, ``async for``), asi que un worker ASGI atiende
+otras peticiones mientras tanto.
+
+Lo que en Django/DRF solo existe en sincrono (autenticacion, validacion de
+filtros, escrituras con transacciones y señales, renderizado) se ejecuta con
+``sync_to_async``.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.utils.functional import classproperty
+from rest_framework.response import Response
+
+from .tags import get_tag_snapshot
+from .views import (
+    TagListCreateView,
+    TagRetrieveUpdateDestroyView,
+    TaskListCreateView,
+    TaskRetrieveUpdateDestroyView,
+)
+
+
+class AsyncAPIViewMixin:
+    """
+    ``dispatch`` asincrono para vistas DRF. Los handlers ``async def`` se
+    esperan directamente; los sincronos (POST, PUT, PATCH, DELETE) se
+    ejecutan en el hilo sincrono con ``sync_to_async``.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        # La cache de respuestas puede ser Redis: se guarda en el hilo sincrono
+        self.response = await sync_to_async(self.finalize_response)(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+
+class AsyncTaskListCreateView(AsyncAPIViewMixin, TaskListCreateView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncTaskRetrieveUpdateDestroyView(
+    AsyncAPIViewMixin, TaskRetrieveUpdateDestroyView
+):
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+
+class AsyncTagListCreateView(AsyncAPIViewMixin, TagListCreateView):
+    async def get(self, request, *args, **kwargs):
+        tags = await get_tag_snapshot().aall()
+        page = self.paginate_queryset(tags)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        return Response(self.get_serializer(tags, many=True).data)
+
+
+class AsyncTagRetrieveUpdateDestroyView(
+    AsyncAPIViewMixin, TagRetrieveUpdateDestroyView
+):
+    async def get(self, request, *args, **kwargs):
+        tag = await get_tag_snapshot().aget(kwargs[self.lookup_field])
+        if tag is None:
+            raise Http404
+        return Response(self.get_serializer(tag).data)
@@ -0,0 +1,301 @@
+"""
+Operaciones masivas sobre tareas (crear, actualizar y eliminar en una sola
+peticion).
+
+Todas las validaciones que tocan la base de datos se hacen por lote: una
+consulta para las tareas objetivo y una para los titulos; las etiquetas se
+validan contra el snapshot en memoria (``tasks.tags``). La escritura usa ``bulk_create``/``bulk_update`` y un unico
+``INSERT`` en la tabla intermedia de etiquetas. Actualizar o eliminar una
+tarea archivada la restaura primero, como ``PUT``/``PATCH``/``DELETE`` en el
+detalle.
+"""
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from . import archive
+from .models import ArchivedTask, Task
+from .serializers import (
+    DUPLICATE_TITLE_MESSAGE,
+    BulkOperationSerializer,
+    BulkTaskDataSerializer,
+    TaskSerializer,
+    duplicate_title_error,
+    is_duplicate_title,
+)
+from .signals import bulk_tasks_changed
+from .stats import StatsChange, sync_completed_at
+from .tags import get_tag_snapshot, join_tag_names
+
+NOT_FOUND_MESSAGE = "Tarea no encontrada."
+REPEATED_TARGET_MESSAGE = "La tarea ya aparece en otra operacion del lote."
+
+
+class BulkOperation:
+    """Estado de una operacion del lote mientras se valida y se aplica."""
+
+    SUCCESS_STATUS = {
+        "create": status.HTTP_201_CREATED,
+        "update": status.HTTP_200_OK,
+        "delete": status.HTTP_204_NO_CONTENT,
+    }
+
+    def __init__(self, index, payload):
+        self.index = index
+        self.action = payload.get("action") if isinstance(payload, dict) else None
+        self.task_id = None
+        self.task = None
+        self.data = {}
+        self.tag_ids = None
+        self.status = None
+        self.errors = None
+
+        operation = BulkOperationSerializer(data=payload)
+        if not operation.is_valid():
+            self.fail(operation.errors)
+            return
+        self.action = operation.validated_data["action"]
+        self.task_id = operation.validated_data.get("id")
+        if self.action == "delete":
+            return
+
+        data = BulkTaskDataSerializer(
+            data=operation.validated_data["data"], partial=self.action == "update"
+        )
+        if not data.is_valid():
+            self.fail(data.errors)
+            return
+        self.data = dict(data.validated_data)
+        tag_ids = self.data.pop("tags_id", None)
+        self.tag_ids = None if tag_ids is None else list(dict.fromkeys(tag_ids))
+
+    @property
+    def ok(self):
+        return self.errors is None
+
+    @property
+    def title(self):
+        return self.data.get("title")
+
+    def fail(self, errors, code=status.HTTP_400_BAD_REQUEST):
+        self.errors = errors
+        self.status = code
+
+    def result(self, rendered):
+        result = {"index": self.index, "action": self.action}
+        if self.task_id is not None:
+            result["id"] = self.task_id
+        if not self.ok:
+            result.update(status=self.status, errors=self.errors)
+            return result
+        result["status"] = self.SUCCESS_STATUS[self.action]
+        if self.action != "delete":
+            result["data"] = rendered[self.task.pk]
+        return result
+
+
+def execute(user, payloads):
+    """
+    Valida y aplica las operaciones de ``payloads`` para ``user``.
+    Las operaciones invalidas se informan y no se aplican; las validas se
+    escriben juntas en una transaccion. Devuelve un resultado por operacion.
+    """
+    operations = [
+        BulkOperation(index, payload) for index, payload in enumerate(payloads)
+    ]
+    load_targets(user, operations)
+    check_tags(operations)
+    check_titles(user, operations)
+
+    try:
+        with transaction.atomic():
+            changed_ids = apply(user, operations)
+    except IntegrityError as exc:
+        # Otra peticion ocupo un titulo entre la validacion y la escritura:
+        # el lote completo se revierte y el cliente puede reintentarlo
+        if not is_duplicate_title(exc):
+            raise
+        raise duplicate_title_error() from exc
+
+    tasks = Task.objects.filter(id__in=changed_ids)
+    rendered = {item["id"]: item for item in TaskSerializer(tasks, many=True).data}
+    return [operation.result(rendered) for operation in operations]
+
+
+def valid(operations, *actions):
+    return [op for op in operations if op.ok and op.action in actions]
+
+
+def load_targets(user, operations):
+    """
+    Carga en una consulta las tareas a modificar o eliminar. Las tareas de
+    otros usuarios se tratan como inexistentes, igual que en el detalle, y
+    las archivadas vuelven antes a ``tasks_task`` (solo entonces se consulta
+    ``tasks_archivedtask``).
+    """
+    targets = valid(operations, "update", "delete")
+    ids = {op.task_id for op in targets}
+    tasks = Task.objects.filter(user=user).in_bulk(ids)
+    conflicts = set()
+    if ids - tasks.keys():
+        restored, conflicts = restore_targets(user, ids - tasks.keys())
+        if restored:
+            tasks.update(Task.objects.filter(user=user).in_bulk(restored))
+    seen = set()
+    for op in targets:
+        if op.task_id in conflicts:
+            # Mientras estaba archivada otra tarea tomo su titulo
+            op.fail({"title": [DUPLICATE_TITLE_MESSAGE]})
+        elif op.task_id not in tasks:
+            op.fail({"detail": NOT_FOUND_MESSAGE}, status.HTTP_404_NOT_FOUND)
+        elif op.task_id in seen:
+            op.fail({"id": [REPEATED_TARGET_MESSAGE]})
+        else:
+            seen.add(op.task_id)
+            op.task = tasks[op.task_id]
+
+
+def restore_targets(user, task_ids):
+    """
+    Restaura las tareas archivadas de ``user`` entre ``task_ids``. Devuelve
+    los ids restaurados y los que no pueden volver porque una tarea activa
+    usa su titulo.
+    """
+    archived = dict(
+        ArchivedTask.objects.filter(user=user, id__in=task_ids).values_list(
+            "id", "title"
+        )
+    )
+    if not archived:
+        return [], set()
+    taken = set(
+        Task.objects.filter(user=user, title__in=archived.values()).values_list(
+            "title", flat=True
+        )
+    )
+    conflicts = {task_id for task_id, title in archived.items() if title in taken}
+    try:
+        restored = archive.restore_tasks(user, archived.keys() - conflicts)
+    except IntegrityError as exc:
+        # Otra peticion tomo uno de los titulos despues de comprobarlos
+        if not is_duplicate_title(exc):
+            raise
+        raise duplicate_title_error() from exc
+    return restored, conflicts
+
+
+def check_tags(operations):
+    writes = [op for op in valid(operations, "create", "update") if op.tag_ids]
+    requested = {tag_id for op in writes for tag_id in op.tag_ids}
+    existing = get_tag_snapshot().get_many(requested)
+    message = PrimaryKeyRelatedField.default_error_messages["does_not_exist"]
+    for op in writes:
+        missing = [tag_id for tag_id in op.tag_ids if tag_id not in existing]
+        if missing:
+            op.fail(
+                {"tags_id": [message.format(pk_value=tag_id) for tag_id in missing]}
+            )
+
+
+def check_titles(user, operations):
+    """
+    Mantiene los titulos unicos por usuario considerando el lote completo:
+    dos operaciones no pueden reclamar el mismo titulo, y un titulo existente
+    solo queda libre si su tarea se elimina o se renombra en el mismo lote.
+
+    La restriccion unica se comprueba fila a fila, asi que un titulo liberado
+    por un renombrado solo puede reutilizarlo una creacion (se insertan
+    despues de las actualizaciones), no otra actualizacion del mismo lote.
+    """
+    titled = [op for op in valid(operations, "create", "update") if op.title]
+    existing = dict(
+        Task.objects.filter(
+            user=user, title__in={op.title for op in titled}
+        ).values_list("title", "id")
+    )
+
+    # Cada rechazo puede anular un renombrado que liberaba otro titulo
+    changed = True
+    while changed:
+        changed = False
+        deleted = {op.task_id for op in valid(operations, "delete")}
+        renamed = {
+            op.task_id
+            for op in valid(operations, "update")
+            if op.title and op.title != op.task.title
+        }
+        claimed = set()
+        for op in [op for op in titled if op.ok]:
+            owner = existing.get(op.title)
+            freed = deleted | renamed if op.action == "create" else deleted
+            taken = owner is not None and owner != op.task_id and owner not in freed
+            if op.title in claimed or taken:
+                op.fail({"title": [DUPLICATE_TITLE_MESSAGE]})
+                changed = True
+            claimed.add(op.title)
+
+
+def apply(user, operations):
+    """Escribe las operaciones validas. Devuelve los ids creados o modificados."""
+    deletes = valid(operations, "delete")
+    updates = valid(operations, "update")
+    creates = valid(operations, "create")
+
+    # Estadisticas: se descuenta el estado previo y se suma el final
+    change = StatsChange()
+    change.remove(op.task for op in deletes + updates)
+
+    if deletes:
+        Task.objects.filter(id__in=[op.task_id for op in deletes]).delete()
+
+    # bulk_update no aplica auto_now: updated_at se asigna a mano
+    # (igual que completed_at, que normalmente fija pre_save). tag_names se
+    # calcula aqui porque la tabla intermedia se escribe sin m2m_changed
+    tags = get_tag_snapshot().get_many(
+        {tag_id for op in updates + creates for tag_id in op.tag_ids or []}
+    )
+    now = timezone.now()
+    fields = {"updated_at", "completed_at"}
+    for op in updates:
+        op.task.updated_at = now
+        for attr, value in op.data.items():
+            setattr(op.task, attr, value)
+            fields.add(attr)
+        sync_completed_at(op.task, now)
+        if op.tag_ids is not None:
+            op.task.tag_names = join_tag_names(tags[pk].name for pk in op.tag_ids)
+            fields.add("tag_names")
+    if updates:
+        Task.objects.bulk_update([op.task for op in updates], sorted(fields))
+
+    for op in creates:
+        op.task = Task(
+            user=user,
+            tag_names=join_tag_names(tags[pk].name for pk in op.tag_ids or []),
+            **op.data,
+        )
+        sync_completed_at(op.task, now)
+    Task.objects.bulk_create([op.task for op in creates])
+    for op in creates:
+        op.task_id = op.task.pk
+
+    # Etiquetas: se reemplazan las de las tareas actualizadas que las envian
+    # y se insertan todas las relaciones nuevas de una vez
+    through = Task.tags.through
+    replaced = [op.task.pk for op in updates if op.tag_ids is not None]
+    if replaced:
+        through.objects.filter(task_id__in=replaced).delete()
+    through.objects.bulk_create(
+        through(task_id=op.task.pk, tag_id=tag_id)
+        for op in updates + creates
+        for tag_id in op.tag_ids or []
+    )
+    change.add(op.task for op in updates + creates)
+    change.save()
+
+    changed_ids = [op.task.pk for op in updates + creates]
+    if changed_ids:
+        bulk_tasks_changed.send(sender=Task, user=user, task_ids=changed_ids)
+    return changed_ids
@@ -0,0 +1,273 @@
+"""
+Cache de respuestas del listado y detalle de tareas.
+
+Las claves incluyen una version por usuario y una version global de
+etiquetas. Cualquier escritura incrementa la version correspondiente (ver
+``tasks.signals``), de modo que las entradas viejas dejan de ser alcanzables
+sin tener que buscarlas ni borrarlas: expiran o las desaloja el LRU.
+
+Las versiones viven siempre en una cache de Django (``CACHES``), como la del
+snapshot de etiquetas: con Redis una escritura atendida por un worker deja
+inservibles las entradas de todos los demas, tambien las de
+``LocalMemoryBackend``.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+CachedResponse = namedtuple("CachedResponse", ["content", "content_type", "headers"])
+
+# Cabeceras de la respuesta que se guardan junto al contenido
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+TAGS_VERSION = "tags"
+
+
+def new_version():
+    # Si la version se pierde (desalojo, reinicio) la nueva nunca repite una
+    # anterior, asi que no puede resucitar entradas viejas
+    return time.time_ns()
+
+
+class SharedVersions:
+    """Versiones de las claves guardadas en una cache de Django."""
+
+    version_prefix = "tasks:response:version:"
+
+    def __init__(self, version_alias="default"):
+        self.version_alias = version_alias
+
+    @property
+    def version_cache(self):
+        return caches[self.version_alias]
+
+    def get_versions(self, *names):
+        """Versiones vigentes de ``names`` (una sola ida a la cache)."""
+        keys = [self.version_prefix + name for name in names]
+        found = self.version_cache.get_many(keys)
+        for key in keys:
+            if key not in found:
+                self.version_cache.add(key, new_version(), None)
+                found[key] = self.version_cache.get(key)
+        return [found[key] for key in keys]
+
+    def get_version(self, name):
+        return self.get_versions(name)[0]
+
+    def incr_version(self, name):
+        key = self.version_prefix + name
+        try:
+            self.version_cache.incr(key)
+        except ValueError:
+            self.version_cache.set(key, new_version(), None)
+
+
+class LocalMemoryBackend(SharedVersions):
+    """
+    Backend en memoria del proceso con desalojo LRU, acotado por numero de
+    entradas y por bytes de contenido. Las versiones se leen de
+    ``version_alias``; con LocMemCache solo es coherente en un unico proceso
+    (desarrollo).
+    """
+
+    def __init__(
+        self, max_entries=1000, max_bytes=32 * 1024 * 1024, version_alias="default"
+    ):
+        super().__init__(version_alias)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        size = len(value.content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0].content)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size}
+
+
+class DjangoCacheBackend(SharedVersions):
+    """
+    Backend sobre una cache de Django (``CACHES``): Redis en produccion para
+    compartir entradas entre workers, LocMemCache como sustituto local. Los
+    limites de memoria y el desalojo los aplica la propia cache
+    (``maxmemory-policy allkeys-lru`` en Redis, ``MAX_ENTRIES`` en LocMem).
+    """
+
+    prefix = "tasks:response:"
+
+    def __init__(self, alias="default"):
+        super().__init__(alias)
+        self.alias = alias
+        self.evictions = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(self.prefix + key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(self.prefix + key, value, timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+    def info(self):
+        return {}
+
+
+class ResponseCache:
+    """Fachada usada por las vistas: claves, versiones y estadisticas."""
+
+    def __init__(self, backend, timeout=300, enabled=True):
+        self.backend = backend
+        self.timeout = timeout
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "TASK_RESPONSE_CACHE", {})
+        backend_class = import_string(
+            options.get("BACKEND", "tasks.cache.LocalMemoryBackend")
+        )
+        backend_options = {
+            name.lower(): value for name, value in options.get("OPTIONS", {}).items()
+        }
+        return cls(
+            backend_class(**backend_options),
+            timeout=options.get("TIMEOUT", 300),
+            enabled=options.get("ENABLED", True),
+        )
+
+    def key_for(self, request, view_name, **kwargs):
+        """
+        Clave de la respuesta: usuario, versiones vigentes, vista, formato y
+        query string normalizada (parametros ordenados).
+        """
+        user_id = request.user.pk
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        raw = "|".join(
+            [
+                view_name,
+                getattr(request.accepted_renderer, "format", ""),
+                query,
+                urlencode(sorted(kwargs.items())),
+            ]
+        )
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        user_version, tags_version = self.backend.get_versions(
+            f"user:{user_id}", TAGS_VERSION
+        )
+        return f"{user_id}:{user_version}:{tags_version}:{digest}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def set(self, key, response):
+        value = CachedResponse(
+            bytes(response.content),
+            response["Content-Type"],
+            {name: response[name] for name in CACHED_HEADERS if name in response},
+        )
+        self.backend.set(key, value, self.timeout)
+
+    def bump(self, name):
+        """
+        Incrementa una version ahora (lecturas dentro de la misma transaccion)
+        y otra vez al confirmar: una lectura concurrente que vio los datos
+        viejos tras el primer incremento queda guardada bajo una version que
+        ya no se usa.
+        """
+        self.backend.incr_version(name)
+        transaction.on_commit(lambda: self.backend.incr_version(name))
+
+    def invalidate_user(self, user_id):
+        self.bump(f"user:{user_id}")
+
+    def invalidate_tags(self):
+        self.bump(TAGS_VERSION)
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self._hits = self._misses = 0
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            **self.backend.info(),
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Devuelve la cache de respuestas del proceso (se crea al primer uso)."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache.from_settings()
+    return _response_cache
@@ -0,0 +1,337 @@
+"""
+Borrado por lotes de usuarios y etiquetas.
+
+``user.delete()`` y ``tag.delete()`` pasan por el ``Collector`` de Django,
+que carga en memoria todas las filas dependientes (y dispara sus señales una
+a una) dentro de una sola transaccion: con cientos de miles de tareas eso
+dispara la memoria y mantiene los bloqueos durante todo el borrado. Aqui los
+dependientes grandes se eliminan antes, por conjuntos:
+
+* Lotes de ``DELETION["BATCH_SIZE"]`` ids, cada uno en su propia
+  transaccion corta. Usuario: ``DELETE ... WHERE id IN (...)`` de sus tareas
+  activas y archivadas, sus etiquetas y su documento de busqueda, sin
+  instanciar modelos. Etiqueta: se quita de sus tareas y se recalculan
+  ``tag_names``, la busqueda, ``updated_at`` y los contadores por etiqueta
+  de ``tasks.stats`` de cada lote. En PostgreSQL las
+  filas bloqueadas por otra peticion se saltan (``SKIP LOCKED``) y las
+  recoge el ``delete()`` final.
+* Al terminar, el ``delete()`` normal ya no encuentra dependientes grandes
+  (los contadores de ``tasks.stats`` se borran con un solo ``DELETE``).
+* El usuario se desactiva y pierde sus tokens antes del primer lote, asi que
+  no puede crear tareas mientras se borra.
+
+``DELETE /api/tags/<id>/`` de una etiqueta con mas de ``ASYNC_THRESHOLD``
+tareas registra un ``DeletionJob`` (202, avance en ``/api/deletions/<id>/``)
+que se ejecuta fuera de la peticion segun ``RUNNER``: en un hilo del proceso
+que la recibio (``"thread"``) o en ``manage.py run_deletions``
+(``"worker"``); las demas se borran como siempre. ``manage.py delete_user``
+borra usuarios con el mismo motor. El job guarda el avance por lote y los
+lotes son idempotentes: ``run_deletions`` retoma los jobs interrumpidos.
+
+``"thread"`` es para desarrollo y despliegues de un solo proceso: el hilo
+vive dentro del worker web, ocupa una de sus conexiones a la base de datos y
+muere con el (reinicios de gunicorn, ``max_requests``, despliegues). Un job
+cortado asi queda ``running`` hasta que ``run_deletions`` lo retoma; nadie
+mas lo hace. En produccion, ``RUNNER="worker"`` con ``run_deletions`` como
+proceso aparte.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import archive, search, stats
+from .cache import get_response_cache
+from .models import ArchivedTask, ArchivedTaskTag, DeletionJob, Tag, Task
+from .tags import refresh_tag_names
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = (DeletionJob.PENDING, DeletionJob.RUNNING)
+
+
+def delete_rows(model, ids, using="default"):
+    """Borra las filas ``ids`` de ``model`` y sus etiquetas sin leerlas."""
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {model.tags.through._meta.db_table} "
+            f"WHERE task_id IN ({placeholders})",
+            ids,
+        )
+        cursor.execute(
+            f"DELETE FROM {model._meta.db_table} WHERE id IN ({placeholders})", ids
+        )
+
+
+def run_batches(steps, batch_size, pause, using="default", progress=None):
+    """
+    Ejecuta ``steps`` (``(queryset, funcion)``, con ``queryset`` un
+    ``values_list`` plano): la funcion recibe lotes de ``batch_size`` valores,
+    cada uno en su propia transaccion, hasta que el queryset queda vacio.
+    ``progress`` recibe el tamaño de cada lote en esa misma transaccion.
+    Devuelve los valores procesados.
+    """
+    total = 0
+    for queryset, step in steps:
+        while True:
+            with transaction.atomic(using=using):
+                batch = list(
+                    queryset.using(using).select_for_update(skip_locked=True)[
+                        :batch_size
+                    ]
+                )
+                if batch:
+                    step(batch)
+                    if progress is not None:
+                        progress(len(batch))
+            if not batch:
+                break
+            total += len(batch)
+            if pause:
+                # Deja respirar a la base (replicas, autovacuum) entre lotes
+                time.sleep(pause)
+    return total
+
+
+def user_task_ids(model, user_id):
+    # Sin orden: cualquier lote vale y no hay que ordenar todas sus tareas
+    return model.objects.filter(user_id=user_id).values_list("id", flat=True)
+
+
+def count_user_rows(user_id, using="default"):
+    return sum(
+        user_task_ids(model, user_id).using(using).count()
+        for model in (Task, ArchivedTask)
+    )
+
+
+def delete_user(user_id, batch_size=None, pause=None, using="default", progress=None):
+    """
+    Borra el usuario con sus tareas por lotes. ``progress`` recibe las filas
+    de cada lote. Devuelve las tareas borradas.
+    """
+    config = settings.DELETION
+    user = User.objects.using(using).filter(pk=user_id).first()
+    if user is not None and user.is_active:
+        # post_save invalida sus tokens cacheados
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+    Token.objects.using(using).filter(user_id=user_id).delete()
+
+    def delete_tasks(model):
+        def step(ids):
+            delete_rows(model, ids, using)
+            search.remove_search_documents(ids, using=using)
+
+        return step
+
+    total = run_batches(
+        [
+            (user_task_ids(Task, user_id), delete_tasks(Task)),
+            (user_task_ids(ArchivedTask, user_id), delete_tasks(ArchivedTask)),
+        ],
+        batch_size or config["BATCH_SIZE"],
+        config["PAUSE"] if pause is None else pause,
+        using,
+        progress,
+    )
+    User.objects.using(using).filter(pk=user_id).delete()
+    get_response_cache().invalidate_user(user_id)
+    return total
+
+
+def tag_task_ids(model, tag_id):
+    """Tareas de ``model`` con la etiqueta (desde la tabla intermedia)."""
+    through = model.tags.through.objects.filter(tag_id=tag_id)
+    return through.values_list("task_id", flat=True)
+
+
+def count_tag_rows(tag_id, using="default"):
+    return sum(
+        tag_task_ids(model, tag_id).using(using).count()
+        for model in (Task, ArchivedTask)
+    )
+
+
+def tag_exceeds(tag_id, limit, using="default"):
+    """Indica si la etiqueta tiene mas de ``limit`` tareas (sin contarlas todas)."""
+    found = 0
+    for model in (Task, ArchivedTask):
+        found += len(tag_task_ids(model, tag_id).using(using)[: limit + 1 - found])
+        if found > limit:
+            return True
+    return False
+
+
+def delete_tag(tag_id, batch_size=None, pause=None, using="default", progress=None):
+    """
+    Quita la etiqueta de sus tareas por lotes y la borra. ``progress`` recibe
+    las tareas de cada lote. Devuelve cuantas tareas la tenian.
+    """
+    config = settings.DELETION
+
+    def untag_stats(model, task_ids):
+        # Los contadores por etiqueta bajan en la transaccion de cada lote
+        change = stats.StatsChange(using)
+        change.remove_tag(
+            tag_id,
+            model.objects.using(using)
+            .filter(pk__in=task_ids)
+            .values_list("user_id", "completed"),
+        )
+        return change
+
+    def untag_tasks(task_ids):
+        change = untag_stats(Task, task_ids)
+        Task.tags.through.objects.using(using).filter(
+            tag_id=tag_id, task_id__in=task_ids
+        ).delete()
+        change.save()
+        refresh_tag_names(task_ids, using=using)
+        Task.objects.using(using).filter(pk__in=task_ids).update(
+            updated_at=timezone.now()
+        )
+        search.update_search_documents(task_ids, using=using)
+        get_response_cache().invalidate_tags()
+
+    def untag_archived(task_ids):
+        change = untag_stats(ArchivedTask, task_ids)
+        ArchivedTaskTag.objects.using(using).filter(
+            tag_id=tag_id, task_id__in=task_ids
+        ).delete()
+        change.save()
+        archive.refresh_archived_tags(task_ids, using=using)
+        get_response_cache().invalidate_tags()
+
+    total = run_batches(
+        [
+            (tag_task_ids(Task, tag_id), untag_tasks),
+            (tag_task_ids(ArchivedTask, tag_id), untag_archived),
+        ],
+        batch_size or config["BATCH_SIZE"],
+        config["PAUSE"] if pause is None else pause,
+        using,
+        progress,
+    )
+    # Las señales de Tag (snapshot, cache, tag_names) ya no tienen tareas que tocar
+    Tag.objects.using(using).filter(pk=tag_id).delete()
+    return total
+
+
+# kind -> (borrado, estimacion de filas)
+TARGETS = {
+    DeletionJob.USER: (delete_user, count_user_rows),
+    DeletionJob.TAG: (delete_tag, count_tag_rows),
+}
+
+
+def schedule(kind, target_id, requested_by=None, start=True):
+    """
+    Registra el borrado (o devuelve el job sin terminar del mismo objeto) y,
+    con ``start``, lo lanza tras el commit segun ``DELETION["RUNNER"]``.
+    """
+    job = DeletionJob.objects.filter(
+        kind=kind, target_id=target_id, status__in=UNFINISHED
+    ).first()
+    if job is not None:
+        return job
+    job = DeletionJob.objects.create(
+        kind=kind, target_id=target_id, requested_by=requested_by
+    )
+    if start and settings.DELETION["RUNNER"] == "thread":
+        transaction.on_commit(lambda: start_thread(job.pk))
+    return job
+
+
+def start_thread(job_id):
+    thread = threading.Thread(
+        target=run_in_thread, args=(job_id,), name=f"deletion-{job_id}", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def run_in_thread(job_id):
+    try:
+        if claim(job_id):
+            run(DeletionJob.objects.get(pk=job_id))
+    finally:
+        # Conexiones propias de este hilo
+        connections.close_all()
+
+
+def claim(job_id, stale_after=None):
+    """
+    Marca el job como en curso si sigue pendiente (o lleva ``stale_after``
+    segundos sin avanzar). Solo un proceso lo consigue.
+    """
+    now = timezone.now()
+    claimable = Q(status=DeletionJob.PENDING)
+    if stale_after is not None:
+        claimable |= Q(
+            status=DeletionJob.RUNNING,
+            updated_at__lt=now - timedelta(seconds=stale_after),
+        )
+    return bool(
+        DeletionJob.objects.filter(claimable, pk=job_id).update(
+            status=DeletionJob.RUNNING, started_at=now, updated_at=now
+        )
+    )
+
+
+def run(job, report=None, **options):
+    """
+    Ejecuta un job ya reclamado y registra su avance y su resultado.
+    ``report`` recibe el job tras cada lote; ``options`` (``batch_size``,
+    ``pause``) pasan al borrado.
+    """
+    delete, count = TARGETS[job.kind]
+    jobs = DeletionJob.objects.filter(pk=job.pk)
+    # Al retomar un job, lo ya borrado cuenta en el total
+    jobs.update(total=F("deleted") + count(job.target_id))
+    job.refresh_from_db()
+
+    def progress(rows):
+        job.deleted += rows
+        jobs.update(deleted=F("deleted") + rows, updated_at=timezone.now())
+        if report is not None:
+            report(job)
+
+    try:
+        delete(job.target_id, progress=progress, **options)
+    except Exception as exc:
+        logger.exception("Fallo el borrado %s %s", job.kind, job.target_id)
+        jobs.update(
+            status=DeletionJob.FAILED, error=str(exc), finished_at=timezone.now()
+        )
+    else:
+        jobs.update(status=DeletionJob.DONE, finished_at=timezone.now())
+    job.refresh_from_db()
+    return job
+
+
+def run_pending(stale_after=300):
+    """Ejecuta los jobs pendientes o parados, del mas antiguo al mas nuevo."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    ids = (
+        DeletionJob.objects.filter(
+            Q(status=DeletionJob.PENDING)
+            | Q(status=DeletionJob.RUNNING, updated_at__lt=cutoff)
+        )
+        .order_by("created_at")
+        .values_list("id", flat=True)
+    )
+    return [
+        run(DeletionJob.objects.get(pk=job_id))
+        for job_id in list(ids)
+        if claim(job_id, stale_after)
+    ]
@@ -0,0 +1,95 @@
+"""
+Exportacion en streaming de las tareas de un usuario (NDJSON o CSV).
+
+Las filas se leen con un cursor del servidor (``iterator(chunk_size)``) y se
+procesan por bloques. Las etiquetas salen de ``Task.tag_names`` y sus ids
+del snapshot en memoria, asi que solo se lee la tabla de tareas. La memoria
+usada no depende del numero de tareas.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .tags import split_tag_names, tag_ids_by_name
+
+FIELDS = ["id", "title", "description", "completed", "created_at", "updated_at"]
+
+
+def iter_records(queryset, chunk_size=2000):
+    """Genera un diccionario por tarea, con sus etiquetas como ``[{id, name}]``."""
+    rows = queryset.values_list(*FIELDS, "tag_names").iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        by_name = tag_ids_by_name()
+        for *values, tag_names in chunk:
+            record = dict(zip(FIELDS, values))
+            record["tags"] = [
+                {"id": by_name[name], "name": name}
+                for name in split_tag_names(tag_names)
+                if name in by_name
+            ]
+            yield record
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Un objeto JSON por linea (``application/x-ndjson``)."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    @staticmethod
+    def line(data):
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Respuestas normales (errores); la exportacion usa stream()
+        if data is None:
+            return b""
+        return self.line(data).encode(self.charset)
+
+    def stream(self, records):
+        for record in records:
+            yield self.line(record)
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la linea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV con cabecera; las etiquetas van como nombres separados por ``|``."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+    header = [*FIELDS, "tags"]
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        writer = csv.writer(Echo())
+        lines = writer.writerow(data.keys()) + writer.writerow(
+            [str(value) for value in data.values()]
+        )
+        return lines.encode(self.charset)
+
+    def stream(self, records):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header)
+        for record in records:
+            record["tags"] = "|".join(tag["name"] for tag in record["tags"])
+            record["created_at"] = JSONEncoder().default(record["created_at"])
+            record["updated_at"] = JSONEncoder().default(record["updated_at"])
+            yield writer.writerow([record[name] for name in self.header])
@@ -0,0 +1,110 @@
+import django_filters
+from django.db.models import Q, Value
+from django.db.models.functions import StrIndex
+from django.db.models.lookups import GreaterThan
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Task, TaskRecord
+from .search import get_search_backend, parse_terms
+from .tags import get_tag_snapshot, tag_names_token
+
+# Campos de orden publicos que se resuelven con otra columna: los nombres de
+# etiquetas se ordenan por Task.tag_names (sin JOIN ni filas duplicadas)
+ORDERING_ALIASES = {"tags__name": "tag_names"}
+
+
+def resolve_ordering(term):
+    prefix = "-" if term.startswith("-") else ""
+    field = term.lstrip("-")
+    return prefix + ORDERING_ALIASES.get(field, field)
+
+
+def tag_choices():
+    return get_tag_snapshot().derived(
+        "choices", lambda tags: [(str(pk), tag.name) for pk, tag in tags.items()]
+    )
+
+
+class TagNamesFilter(django_filters.MultipleChoiceFilter):
+    """
+    Filtra por id de etiqueta (``?tags=1&tags=2``, cualquiera de ellas) sobre
+    ``Task.tag_names``. Los ids se validan contra el snapshot en memoria.
+
+    La busqueda del fragmento ``|nombre|`` no puede usar el indice
+    ``(user, tag_names)`` por su valor: recorre las tareas del usuario (el
+    prefijo del indice acota la lectura). Se usa ``StrIndex`` (``instr`` en
+    SQLite, ``strpos`` en PostgreSQL) y no ``contains``, cuyo ``LIKE`` en
+    SQLite no distingue mayusculas: ``Casa`` no debe encontrar ``casa``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, choices=tag_choices, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tags = get_tag_snapshot().get_many([int(pk) for pk in value])
+        condition = Q()
+        for pk in value:
+            token = Value(tag_names_token(tags[int(pk)].name))
+            condition |= Q(GreaterThan(StrIndex("tag_names", token), 0))
+        return qs.filter(condition)
+
+
+class TaskFilter(django_filters.FilterSet):
+    tags = TagNamesFilter()
+
+    class Meta:
+        model = Task
+        fields = ["completed", "tags"]
+
+
+class TaskRecordFilter(TaskFilter):
+    """``TaskFilter`` sobre tareas activas y archivadas (``?include_archived``)."""
+
+    class Meta(TaskFilter.Meta):
+        model = TaskRecord
+
+
+class TaskFilterBackend(DjangoFilterBackend):
+    """``DjangoFilterBackend`` que cambia a ``TaskRecordFilter`` segun el queryset."""
+
+    def get_filterset_class(self, view, queryset=None):
+        if queryset is not None and queryset.model is TaskRecord:
+            return TaskRecordFilter
+        return super().get_filterset_class(view, queryset)
+
+
+class TaskOrderingFilter(filters.OrderingFilter):
+    """``OrderingFilter`` que traduce los campos de ``ORDERING_ALIASES``."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        return ordering and [resolve_ordering(term) for term in ordering]
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    Busqueda de texto completo sobre el documento de cada tarea (titulo,
+    descripcion y etiquetas) con coincidencia por prefijo y ranking.
+
+    Si no se pide un ``ordering`` explicito, los resultados se ordenan por
+    relevancia. En motores sin backend de busqueda se usa el ``SearchFilter``
+    de DRF sobre ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = parse_terms(request.query_params.get(self.search_param, ""))
+        if not terms:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = backend.search(queryset, terms)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by("-search_rank", *queryset.query.order_by)
+        return queryset
@@ -0,0 +1,341 @@
+"""
+Importacion masiva de tareas desde NDJSON o CSV.
+
+El archivo se lee de forma incremental y se procesa por lotes: por lote hay
+una consulta de titulos existentes, una resolucion de etiquetas por nombre
+(contra el snapshot en memoria, creando las que faltan con un solo
+``bulk_create``) y la escritura de tareas y relaciones con ``bulk_create``,
+o con ``COPY`` en PostgreSQL. Cada lote se confirma por separado, de modo
+que un archivo de millones de filas no ocupa memoria ni una transaccion
+gigante. Las filas invalidas no se importan y se informan una por una.
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+from itertools import islice
+
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Tag, Task
+from .serializers import DUPLICATE_TITLE_MESSAGE, is_duplicate_title
+from .signals import bulk_tasks_changed
+from .stats import StatsChange, sync_completed_at
+from .tags import TAG_NAMES_SEPARATOR, get_tag_snapshot, join_tag_names, tag_ids_by_name
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+FORMATS = ("ndjson", "csv")
+TRUE_VALUES = {"true", "1", "yes", "si"}
+FALSE_VALUES = {"false", "0", "no", ""}
+UNSUPPORTED_FORMAT_MESSAGE = "Formato no soportado: use un archivo .ndjson o .csv."
+
+TITLE_MAX_LENGTH = Task._meta.get_field("title").max_length
+TAG_MAX_LENGTH = Tag._meta.get_field("name").max_length
+
+
+class ImportFileError(Exception):
+    """Archivo que no se puede leer (formato desconocido o mal codificado)."""
+
+
+def detect_format(name, content_type=""):
+    if name.endswith(".csv") or content_type.startswith("text/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+        return "ndjson"
+    raise ImportFileError(UNSUPPORTED_FORMAT_MESSAGE)
+
+
+def read_rows(stream, fmt):
+    """
+    Genera ``(linea, datos)`` por fila del archivo binario ``stream``, sin
+    cargarlo entero. ``datos`` es un diccionario o un error de formato.
+    """
+    text = codecs.getreader("utf-8")(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            row["tags"] = (row.get("tags") or "").split("|")
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {"_error": "La linea no es un objeto JSON valido."}
+        yield number, data
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError
+
+
+def clean_row(data):
+    """Valida una fila. Devuelve ``(campos, nombres_de_etiquetas, errores)``."""
+    if "_error" in data:
+        return None, None, {"non_field_errors": [data["_error"]]}
+    errors = {}
+    title = data.get("title")
+    if not isinstance(title, str) or not title.strip():
+        errors["title"] = ["El titulo es obligatorio."]
+    elif len(title) > TITLE_MAX_LENGTH:
+        errors["title"] = [f"Maximo {TITLE_MAX_LENGTH} caracteres."]
+    description = data.get("description") or ""
+    if not isinstance(description, str):
+        errors["description"] = ["La descripcion debe ser texto."]
+    try:
+        completed = parse_bool(data.get("completed", False))
+    except ValueError:
+        errors["completed"] = ["Valor booleano invalido."]
+
+    tags = data.get("tags") or []
+    if not isinstance(tags, list):
+        tags = None
+    else:
+        # NDJSON acepta nombres o los objetos {"id", "name"} de la exportacion
+        tags = [tag.get("name") if isinstance(tag, dict) else tag for tag in tags]
+        tags = [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()]
+    if tags is None or any(
+        len(tag) > TAG_MAX_LENGTH or TAG_NAMES_SEPARATOR in tag for tag in tags
+    ):
+        errors["tags"] = ["Lista de nombres de etiqueta invalida."]
+    if errors:
+        return None, None, errors
+    fields = {"title": title, "description": description, "completed": completed}
+    return fields, list(dict.fromkeys(tags)), None
+
+
+class ImportResult:
+    """Contadores de una importacion y salida de los errores por fila."""
+
+    def __init__(self, errors=None, max_errors=None):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.tags_created = 0
+        self.errors = []
+        self.error_file = errors
+        self.max_errors = max_errors
+
+    def error(self, line, errors):
+        self.failed += 1
+        record = {"line": line, "errors": errors}
+        if self.error_file is not None:
+            self.error_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append(record)
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "tags_created": self.tags_created,
+        }
+
+
+def import_tasks(
+    user,
+    stream,
+    fmt,
+    batch_size=BATCH_SIZE,
+    errors=None,
+    max_errors=None,
+    progress=None,
+    using="default",
+):
+    """
+    Importa las tareas de ``stream`` para ``user``. ``errors`` es un archivo
+    de texto opcional donde se escribe un error por linea (NDJSON);
+    ``progress`` se llama tras cada lote con el resultado parcial.
+    """
+    if fmt not in FORMATS:
+        raise ImportFileError(UNSUPPORTED_FORMAT_MESSAGE)
+    result = ImportResult(errors, max_errors)
+    rows = read_rows(stream, fmt)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            import_batch(user, batch, result, using)
+            logger.info("Importacion de tareas de %s: %s", user, result.summary())
+            if progress is not None:
+                progress(result)
+    except UnicodeDecodeError as exc:
+        raise ImportFileError("El archivo debe estar codificado en UTF-8.") from exc
+    return result
+
+
+def import_batch(user, batch, result, using):
+    pending = []
+    for line, data in batch:
+        result.rows += 1
+        fields, tag_names, row_errors = clean_row(data)
+        if row_errors:
+            result.error(line, row_errors)
+        else:
+            pending.append((line, fields, tag_names))
+
+    checked = None
+    while True:
+        accepted = drop_duplicates(user, pending, result, using)
+        try:
+            with transaction.atomic(using=using):
+                task_ids, tags_created = write_batch(user, accepted, using)
+            break
+        except IntegrityError as exc:
+            # Otra escritura ocupo un titulo entre la consulta y el insert: se
+            # vuelve a comprobar el lote (esas filas pasan a ser errores) y se
+            # reintenta. Cada reintento descarta al menos una fila; si no, el
+            # conflicto no es de titulos visibles y se propaga
+            if not is_duplicate_title(exc) or len(accepted) == checked:
+                raise
+            checked = len(accepted)
+    result.created += len(task_ids)
+    result.tags_created += tags_created
+
+
+def drop_duplicates(user, pending, result, using):
+    """Descarta (e informa) los titulos que ya existen o se repiten en el lote."""
+    titles = {fields["title"] for _, fields, _ in pending}
+    taken = set(
+        Task.objects.using(using)
+        .filter(user=user, title__in=titles)
+        .values_list("title", flat=True)
+    )
+    accepted = []
+    for line, fields, tag_names in pending:
+        if fields["title"] in taken:
+            result.error(line, {"title": [DUPLICATE_TITLE_MESSAGE]})
+            continue
+        taken.add(fields["title"])
+        accepted.append((line, fields, tag_names))
+    pending[:] = accepted
+    return accepted
+
+
+def resolve_tags(names, using):
+    """
+    ``nombre -> id`` de las etiquetas del lote, creando las que faltan.
+    Devuelve tambien cuantas se crearon.
+    """
+    if not names:
+        return {}, 0
+    by_name = tag_ids_by_name()
+    resolved = {name: by_name[name] for name in names if name in by_name}
+    missing = names - resolved.keys()
+    if not missing:
+        return resolved, 0
+    Tag.objects.using(using).bulk_create(
+        [Tag(name=name) for name in missing], ignore_conflicts=True
+    )
+    resolved.update(
+        Tag.objects.using(using).filter(name__in=missing).values_list("name", "id")
+    )
+    # bulk_create no emite post_save
+    get_tag_snapshot().invalidate()
+    return resolved, len(missing)
+
+
+def write_batch(user, pending, using):
+    """Escribe las filas validas del lote. Devuelve (ids, etiquetas creadas)."""
+    if not pending:
+        return [], 0
+    tag_ids, tags_created = resolve_tags(
+        {name for _, _, tag_names in pending for name in tag_names}, using
+    )
+    now = timezone.now()
+    tasks = []
+    for _, fields, tag_names in pending:
+        task = Task(
+            user=user,
+            created_at=now,
+            updated_at=now,
+            tag_names=join_tag_names(tag_names),
+            **fields,
+        )
+        sync_completed_at(task, now)
+        tasks.append(task)
+    connection = connections[using]
+    if supports_copy(connection):
+        task_ids = copy_tasks(connection, user, tasks)
+    else:
+        Task.objects.using(using).bulk_create(tasks)
+        task_ids = [task.pk for task in tasks]
+
+    through = Task.tags.through
+    through.objects.using(using).bulk_create(
+        [
+            through(task_id=task_id, tag_id=tag_ids[name])
+            for task_id, (_, _, tag_names) in zip(task_ids, pending)
+            for name in tag_names
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    change = StatsChange(using)
+    change.add(tasks)
+    change.save()
+    bulk_tasks_changed.send(sender=Task, user=user, task_ids=task_ids, using=using)
+    return task_ids, tags_created
+
+
+def supports_copy(connection):
+    return connection.vendor == "postgresql" and connection.Database.__name__ in (
+        "psycopg",
+        "psycopg2",
+    )
+
+
+def copy_tasks(connection, user, tasks):
+    """
+    Inserta las tareas con ``COPY ... FROM STDIN`` y devuelve sus ids en el
+    mismo orden, buscandolos por el titulo (unico por usuario).
+    """
+    columns = [
+        "title",
+        "description",
+        "completed",
+        "completed_at",
+        "created_at",
+        "updated_at",
+        "tag_names",
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for task in tasks:
+        writer.writerow([getattr(task, name) for name in columns] + [user.pk])
+    buffer.seek(0)
+    table = connection.ops.quote_name(Task._meta.db_table)
+    # FORCE_NOT_NULL: en CSV un campo vacio sin comillas seria NULL
+    sql = (
+        f"COPY {table} ({', '.join(columns)}, user_id) FROM STDIN "
+        "WITH (FORMAT csv, FORCE_NOT_NULL (title, description, tag_names))"
+    )
+    with connection.cursor() as cursor:
+        if connection.Database.__name__ == "psycopg2":
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    ids = dict(
+        Task.objects.using(connection.alias)
+        .filter(user=user, title__in=[task.title for task in tasks])
+        .values_list("title", "id")
+    )
+    return [ids[task.title] for task in tasks]
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.archive import archive_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve al archivo las tareas completadas y sin cambios desde hace "
+        "TASK_ARCHIVE_AFTER_DAYS dias (por lotes, en transacciones cortas)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        total = archive_tasks(
+            days=options["older_than_days"],
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            using=options["database"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} tareas archivadas"))
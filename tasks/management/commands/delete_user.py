@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import deletion
+from tasks.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra un usuario y sus tareas por lotes, en transacciones cortas "
+        "(ver tasks.deletion)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--pause", type=float, help="Segundos de espera entre lotes"
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Solo registra el borrado para manage.py run_deletions",
+        )
+
+    def handle(self, *args, **options):
+        user_id = (
+            User.objects.filter(username=options["username"])
+            .values_list("id", flat=True)
+            .first()
+        )
+        if user_id is None:
+            raise CommandError(f"No existe el usuario {options['username']}")
+        job = deletion.schedule(DeletionJob.USER, user_id, start=False)
+        if options["queue"]:
+            self.stdout.write(f"Borrado {job.pk} registrado")
+            return
+        if not deletion.claim(job.pk):
+            raise CommandError(f"El borrado {job.pk} ya esta en curso")
+
+        def report(job):
+            self.stdout.write(f"{job.deleted}/{job.total} tareas borradas")
+
+        job = deletion.run(
+            job, report, batch_size=options["batch_size"], pause=options["pause"]
+        )
+        if job.status == DeletionJob.FAILED:
+            raise CommandError(f"Fallo el borrado {job.pk}: {job.error}")
+        self.stdout.write(self.style.SUCCESS(f"Usuario {options['username']} borrado"))
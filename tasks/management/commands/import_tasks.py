@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import (
+    BATCH_SIZE,
+    FORMATS,
+    ImportFileError,
+    detect_format,
+    import_tasks,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa tareas de un usuario desde un archivo NDJSON o CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .ndjson/.jsonl o .csv")
+        parser.add_argument("--user", required=True, help="Nombre de usuario")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--errors",
+            help="Archivo de errores por fila (por defecto <path>.errors.ndjson)",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.using(options["database"]).get(username=options["user"])
+        except User.DoesNotExist as exc:
+            raise CommandError(f"No existe el usuario {options['user']}") from exc
+        path = options["path"]
+        errors_path = options["errors"] or f"{path}.errors.ndjson"
+
+        def progress(result):
+            self.stdout.write(
+                f"{result.rows} filas: {result.created} creadas, "
+                f"{result.failed} con error"
+            )
+
+        try:
+            with (
+                open(path, "rb") as stream,
+                open(errors_path, "w", encoding="utf-8") as errors,
+            ):
+                result = import_tasks(
+                    user,
+                    stream,
+                    options["format"] or detect_format(path),
+                    batch_size=options["batch_size"],
+                    errors=errors,
+                    max_errors=0,
+                    progress=progress,
+                    using=options["database"],
+                )
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} tareas importadas, "
+                f"{result.tags_created} etiquetas nuevas"
+            )
+        )
+        if result.failed:
+            self.stdout.write(
+                self.style.WARNING(f"{result.failed} filas con error: {errors_path}")
+            )
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.profiling import HEADER, profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un token para perfilar peticiones con la cabecera X-Profile "
+        "(caduca a los PROFILING_TOKEN_MAX_AGE segundos)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/",
+            help="Solo perfila peticiones cuya ruta empiece por este prefijo",
+        )
+
+    def handle(self, *args, **options):
+        token = profile_token(options["path"])
+        minutes = settings.PROFILING["TOKEN_MAX_AGE"] // 60
+        self.stdout.write(f"{HEADER}: {token}")
+        self.stdout.write(f"Valido durante {minutes} minutos para {options['path']}")
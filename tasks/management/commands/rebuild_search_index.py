@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tasks.search import BATCH_SIZE, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el indice de busqueda de texto completo de las tareas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index(
+            using=options["database"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} tareas indexadas"))
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde las tareas los contadores de /api/tasks/stats/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="users",
+            help="Nombre de usuario (repetible; por defecto todos)",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        users = None
+        if options["users"]:
+            users = list(
+                User.objects.using(options["database"]).filter(
+                    username__in=options["users"]
+                )
+            )
+            missing = set(options["users"]) - {user.username for user in users}
+            if missing:
+                raise CommandError(f"No existe el usuario {', '.join(sorted(missing))}")
+        total = rebuild_stats(users, using=options["database"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Estadisticas reconstruidas para {total} usuarios")
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks import deletion
+from tasks.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los borrados por lotes pendientes y retoma los interrumpidos "
+        "(DELETION_RUNNER=worker, o tras reiniciar un proceso)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa los pendientes y termina (por defecto sigue esperando)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Segundos entre comprobaciones",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=300,
+            help="Segundos sin avanzar tras los que un borrado en curso se retoma",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for job in deletion.run_pending(options["stale_after"]):
+                if job.status == DeletionJob.FAILED:
+                    self.stderr.write(f"Fallo el borrado {job}: {job.error}")
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Borrado {job}: {job.deleted} filas")
+                    )
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,209 @@
+"""
+Compresion de respuestas negociada con ``Accept-Encoding``.
+
+Reemplaza a ``GZipMiddleware``: ademas de gzip usa brotli (``br``) y zstd
+si sus paquetes estan instalados, elige la codificacion por los valores
+``q`` del cliente (a igualdad, zstd > br > gzip) y toma el umbral de tamaño
+y los niveles de ``RESPONSE_COMPRESSION``. Solo comprime tipos de texto
+(JSON, NDJSON, CSV, HTML...); las respuestas en streaming (exportacion) se
+comprimen por bloques.
+"""
+
+import zlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Compresor con estado para streaming (ver GzipEncoder.stream)
+Stream = namedtuple("Stream", ["chunk", "finish"])
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/vnd.oai.openapi",
+    "application/xml",
+)
+
+
+class GzipEncoder:
+    """
+    ``compress`` para respuestas completas; ``stream`` devuelve un compresor
+    con estado para streaming: ``chunk(data)`` por bloque (ya vaciado, para
+    que el cliente lo reciba sin esperar al final) y ``finish()`` al cerrar.
+    """
+
+    name = "gzip"
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        stream = self.stream()
+        return stream.chunk(data) + stream.finish()
+
+    def stream(self):
+        # wbits=31: formato gzip (cabecera y CRC)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return Stream(
+            lambda data: (
+                compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            ),
+            compressor.flush,
+        )
+
+
+class BrotliEncoder(GzipEncoder):
+    name = "br"
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.level)
+        return Stream(
+            lambda data: compressor.process(data) + compressor.flush(),
+            compressor.finish,
+        )
+
+
+class ZstdEncoder(GzipEncoder):
+    name = "zstd"
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return Stream(
+            lambda data: (
+                compressor.compress(data)
+                + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            ),
+            compressor.flush,
+        )
+
+
+def to_bytes(data):
+    return data.encode(settings.DEFAULT_CHARSET) if isinstance(data, str) else data
+
+
+def available_encoders(config):
+    """Codificaciones disponibles, en orden de preferencia del servidor."""
+    encoders = []
+    if zstandard is not None:
+        encoders.append(ZstdEncoder(config["ZSTD_LEVEL"]))
+    if brotli is not None:
+        encoders.append(BrotliEncoder(config["BROTLI_QUALITY"]))
+    encoders.append(GzipEncoder(config["GZIP_LEVEL"]))
+    return [encoder for encoder in encoders if encoder.name in config["ENCODINGS"]]
+
+
+def parse_accept_encoding(header):
+    """``{codificacion: q}`` de un ``Accept-Encoding``."""
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoder(header, encoders):
+    """Codificacion con mayor ``q`` (a igualdad, la preferida) o None."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoder in encoders:
+        quality = accepted.get(encoder.name, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoder, quality
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.config = settings.RESPONSE_COMPRESSION
+        self.encoders = available_encoders(self.config)
+
+    def is_compressible(self, response):
+        if not self.config["ENABLED"] or not self.encoders:
+            return False
+        if response.has_header("Content-Encoding"):
+            return False
+        content_type = response.get("Content-Type", "").lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        # No vale la pena comprimir respuestas cortas
+        return response.streaming or len(response.content) >= self.config["MIN_SIZE"]
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoder = choose_encoder(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encoders
+        )
+        if encoder is None:
+            return response
+
+        if response.streaming:
+            stream = encoder.stream()
+            original = response.streaming_content
+            if response.is_async:
+
+                async def compressed():
+                    async for data in original:
+                        yield stream.chunk(to_bytes(data))
+                    yield stream.finish()
+
+            else:
+
+                def compressed():
+                    for data in original:
+                        yield stream.chunk(to_bytes(data))
+                    yield stream.finish()
+
+            response.streaming_content = compressed()
+            # El tamaño comprimido no se conoce hasta terminar
+            del response.headers["Content-Length"]
+        else:
+            content = encoder.compress(response.content)
+            # Solo si de verdad es mas corto
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # RFC 9110 8.8.1: otra codificacion, otra representacion; el ETag
+        # fuerte pasa a debil (If-None-Match compara en debil)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoder.name
+        return response
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Crea el indice de texto completo segun el motor y lo llena con las tareas
+    existentes: indice GIN en PostgreSQL, tabla virtual FTS5 en SQLite.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX tasks_task_search_gin ON tasks_task USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            """
+            UPDATE tasks_task AS t SET search_vector =
+                setweight(to_tsvector('simple', t.title), 'A') ||
+                setweight(to_tsvector('simple', COALESCE((
+                    SELECT string_agg(g.name, ' ')
+                    FROM tasks_task_tags tt JOIN tasks_tag g ON g.id = tt.tag_id
+                    WHERE tt.task_id = t.id
+                ), '')), 'B') ||
+                setweight(to_tsvector('simple', t.description), 'C')
+            """
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tasks_task_fts USING fts5("
+            "title, description, tags, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            """
+            INSERT INTO tasks_task_fts (rowid, title, description, tags)
+            SELECT t.id, t.title, t.description, COALESCE((
+                SELECT group_concat(g.name, ' ')
+                FROM tasks_task_tags tt JOIN tasks_tag g ON g.id = tt.tag_id
+                WHERE tt.task_id = t.id
+            ), '')
+            FROM tasks_task t
+            """
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS tasks_task_search_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS tasks_task_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_rename_create_at_task_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
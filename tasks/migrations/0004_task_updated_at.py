@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+def initialize_updated_at(apps, schema_editor):
+    # Las tareas existentes no tienen historial: se parte de su creacion
+    Task = apps.get_model("tasks", "Task")
+    Task.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(initialize_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rename_duplicate_titles(apps, schema_editor):
+    # La validacion anterior (exists() y luego insert) podia dejar pasar
+    # duplicados concurrentes: se conserva la tarea mas antigua y las demas
+    # reciben el sufijo " (<id>)" para poder crear la restriccion
+    Task = apps.get_model("tasks", "Task")
+    duplicates = (
+        Task.objects.values("user_id", "title")
+        .annotate(first_id=models.Min("id"), count=models.Count("id"))
+        .filter(count__gt=1)
+    )
+    renamed = []
+    for row in duplicates:
+        for task in Task.objects.filter(
+            user_id=row["user_id"], title=row["title"], id__gt=row["first_id"]
+        ):
+            suffix = f" ({task.id})"
+            task.title = task.title[: 200 - len(suffix)] + suffix
+            renamed.append(task)
+    Task.objects.bulk_update(renamed, ["title"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(
+                fields=['user', '-created_at', '-id'], name='task_user_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(
+                fields=['user', 'completed', '-created_at'],
+                name='task_user_completed_idx',
+            ),
+        ),
+        migrations.RunPython(rename_duplicate_titles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'title'), name='unique_task_title_per_user'
+            ),
+        ),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def build_stats(apps, schema_editor):
+    # Las tareas ya completadas no guardaban la fecha: se aproxima con la de
+    # su ultima modificacion. Los contadores se calculan una vez aqui; luego
+    # los mantiene tasks.stats (y rebuild_task_stats los repara)
+    Task = apps.get_model("tasks", "Task")
+    TaskStats = apps.get_model("tasks", "TaskStats")
+    TaskTagStats = apps.get_model("tasks", "TaskTagStats")
+    TaskDailyStats = apps.get_model("tasks", "TaskDailyStats")
+    Through = Task.tags.through
+    completed = models.Count("id", filter=models.Q(completed=True))
+
+    Task.objects.filter(completed=True).update(completed_at=models.F("updated_at"))
+    TaskStats.objects.bulk_create(
+        TaskStats(user_id=row["user"], total=row["total"], completed=row["done"])
+        for row in Task.objects.values("user").annotate(
+            total=models.Count("id"), done=completed
+        )
+    )
+    TaskTagStats.objects.bulk_create(
+        TaskTagStats(
+            user_id=row["task__user"],
+            tag_id=row["tag"],
+            total=row["total"],
+            completed=row["done"],
+        )
+        for row in Through.objects.values("task__user", "tag").annotate(
+            total=models.Count("id"),
+            done=models.Count("id", filter=models.Q(task__completed=True)),
+        )
+    )
+    TaskDailyStats.objects.bulk_create(
+        TaskDailyStats(user_id=row["user"], day=row["day"], completed=row["done"])
+        for row in Task.objects.filter(completed=True)
+        .annotate(day=TruncDate("completed_at"))
+        .values("user", "day")
+        .annotate(done=models.Count("id"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0005_task_indexes_unique_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                (
+                    'user',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='task_stats',
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('day', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('user', 'day'), name='unique_task_daily_stats'
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTagStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                (
+                    'tag',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='tasks.tag',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('user', 'tag'), name='unique_task_tag_stats'
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:25
+
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_tag_names(apps, schema_editor):
+    # "|" separa los nombres en tag_names: las etiquetas que lo usaban pasan a
+    # "/" (con el id si ese nombre ya existe)
+    Tag = apps.get_model("tasks", "Tag")
+    Task = apps.get_model("tasks", "Task")
+    for tag in Tag.objects.filter(name__contains="|"):
+        name = tag.name.replace("|", "/")
+        if Tag.objects.filter(name=name).exists():
+            name = f"{name} ({tag.id})"[:100]
+        tag.name = name
+        tag.save(update_fields=["name"])
+
+    names = defaultdict(list)
+    for task_id, name in Task.tags.through.objects.values_list(
+        "task_id", "tag__name"
+    ):
+        names[task_id].append(name)
+    Task.objects.bulk_update(
+        [
+            Task(id=task_id, tag_names="|" + "|".join(sorted(task_names)) + "|")
+            for task_id, task_names in names.items()
+        ],
+        ["tag_names"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='tag_names',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_tag_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(
+                fields=['user', 'tag_names'], name='task_user_tag_names_idx'
+            ),
+        ),
+    ]
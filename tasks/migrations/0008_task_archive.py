@@ -0,0 +1,152 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:56
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+COLUMNS = (
+    "id, title, description, completed, completed_at, created_at, updated_at, "
+    "search_vector, tag_names, user_id"
+)
+
+
+def create_archive_view(apps, schema_editor):
+    """
+    Vista tasks_task_all (tareas activas y archivadas) e indice de busqueda
+    del archivo en PostgreSQL. En SQLite las tareas archivadas conservan su
+    fila en tasks_task_fts (mismo id).
+    """
+    schema_editor.execute(
+        f"""
+        CREATE VIEW tasks_task_all AS
+        SELECT {COLUMNS}, FALSE AS archived FROM tasks_task
+        UNION ALL
+        SELECT {COLUMNS}, TRUE AS archived FROM tasks_archivedtask
+        """
+    )
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX tasks_archivedtask_search_gin "
+            "ON tasks_archivedtask USING gin (search_vector)"
+        )
+
+
+def drop_archive_view(apps, schema_editor):
+    schema_editor.execute("DROP VIEW IF EXISTS tasks_task_all")
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS tasks_archivedtask_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_tag_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('completed', models.BooleanField()),
+                ('completed_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                (
+                    'search_vector',
+                    django.contrib.postgres.search.SearchVectorField(null=True),
+                ),
+                ('tag_names', models.TextField()),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'tasks_task_all',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('completed', models.BooleanField(default=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                (
+                    'search_vector',
+                    django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True
+                    ),
+                ),
+                ('tag_names', models.TextField(blank=True, default='', editable=False)),
+                ('archived_at', models.DateTimeField()),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='archived_tasks',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTaskTag',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'tag',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to='tasks.tag'
+                    ),
+                ),
+                (
+                    'task',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='tasks.archivedtask',
+                    ),
+                ),
+            ],
+            options={
+                'db_table': 'tasks_archivedtask_tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tags',
+            field=models.ManyToManyField(
+                blank=True,
+                related_name='archived_tasks',
+                through='tasks.ArchivedTaskTag',
+                to='tasks.tag',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedtasktag',
+            constraint=models.UniqueConstraint(
+                fields=('task', 'tag'), name='unique_archived_task_tag'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(
+                fields=['user', '-created_at', '-id'], name='archived_user_created_idx'
+            ),
+        ),
+        migrations.RunPython(create_archive_view, drop_archive_view),
+    ]
@@ -0,0 +1,440 @@
+import hashlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config.metrics import timed
+
+from .cache import get_response_cache
+from .filters import resolve_ordering
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def task_etag(pk, updated_at):
+    """ETag fuerte del detalle: id y updated_at en microsegundos."""
+    return f'"{pk}-{to_micros(updated_at)}"'
+
+
+def parse_etags(header):
+    """Lista de ETags de If-Match / If-None-Match (sin separar por comillas)."""
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def split_param(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "La tarea fue modificada por otra peticion (If-Match)."
+    default_code = "precondition_failed"
+
+
+class ConditionalRequestMixin:
+    """
+    ETag y Last-Modified para tareas.
+
+    * Listado: los validadores salen de un solo agregado
+      ``MAX(updated_at), COUNT(*)`` sobre el queryset filtrado (o de la
+      propia pagina en modo cursor), de modo que un
+      ``If-None-Match``/``If-Modified-Since`` se responde con 304 sin
+      serializar ni renderizar. El paginador reutiliza ese COUNT en lugar
+      de lanzar el suyo.
+    * Detalle: el ETag codifica ``updated_at``; en PUT/PATCH/DELETE
+      ``If-Match`` se comprueba sobre la fila bloqueada y, si no coincide,
+      se responde 412 en lugar de pisar cambios ajenos.
+    """
+
+    etag = None
+    last_modified = None
+
+    @staticmethod
+    def is_conditional(request):
+        return "If-None-Match" in request.headers or (
+            "If-Modified-Since" in request.headers
+        )
+
+    def not_modified(self, request):
+        """Devuelve un 304 si los validadores coinciden, o None."""
+        last_modified = self.last_modified and int(self.last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=last_modified
+        )
+        if response is not None and response.status_code == 304:
+            return response
+        return None
+
+    def list_etag(self, request, *parts):
+        raw = "|".join(
+            [
+                *map(str, parts),
+                request.get_full_path(),
+                getattr(request.accepted_renderer, "format", ""),
+            ]
+        )
+        return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+    # Validadores del listado
+    VALIDATORS = {"last_modified": Max("updated_at"), "count": Count("pk")}
+
+    def uses_keyset(self, request):
+        use_keyset = getattr(self.paginator, "use_keyset", None)
+        return use_keyset is not None and use_keyset(request)
+
+    def set_list_validators(self, request, validators):
+        self.last_modified = validators["last_modified"]
+        self.etag = self.list_etag(
+            request,
+            validators["count"],
+            self.last_modified and to_micros(self.last_modified),
+        )
+
+    def set_page_validators(self, request, page):
+        # Por cursor no se cuenta la tabla: los validadores salen de las
+        # filas de la pagina (ya leidas con LIMIT) y de sus enlaces
+        keyset = self.paginator.keyset
+        rows = [(task.id, to_micros(task.updated_at)) for task in page]
+        self.last_modified = max((task.updated_at for task in page), default=None)
+        self.etag = self.list_etag(
+            request, rows, keyset.get_next_link(), keyset.get_previous_link()
+        )
+
+    # Ganchos de lectura: TaskRowsMixin (tasks.rows) los cambia por filas
+    def read_queryset(self, queryset):
+        return queryset
+
+    def represent(self, data, many=False):
+        return self.get_serializer(data, many=many).data
+
+    # Pasos comunes de list/retrieve y de sus versiones asincronas
+    # (alist/aretrieve, servidas por tasks.async_views): solo cambia como se
+    # espera a la base de datos
+    def object_lookup(self):
+        """Filtro del detalle: ``{lookup_field: valor de la URL}``."""
+        return {
+            self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        }
+
+    def check_list_validators(self, request, page=None, validators=None):
+        """
+        Fija ETag y Last-Modified del listado, desde la pagina por cursor o
+        desde el agregado ``VALIDATORS``, y devuelve el 304 si coinciden.
+        """
+        if page is not None:
+            self.set_page_validators(request, page)
+        else:
+            self.set_list_validators(request, validators)
+        return self.not_modified(request)
+
+    def check_detail_validators(self, request, updated_at):
+        """304 del detalle a partir de su ``updated_at`` (None si no existe)."""
+        if updated_at is None:
+            return None
+        self.etag = task_etag(self.object_lookup()[self.lookup_field], updated_at)
+        self.last_modified = updated_at
+        return self.not_modified(request)
+
+    def found_object(self, request, obj):
+        """Comprueba permisos sobre el objeto leido (404 si no hay)."""
+        if obj is None:
+            raise Http404
+        self.check_object_permissions(request, obj)
+        self.object = obj
+        return obj
+
+    def list_response(self, page, queryset):
+        with timed("serialize"):
+            if page is not None:
+                return self.get_paginated_response(self.represent(page, many=True))
+            return Response(self.represent(queryset, many=True))
+
+    def detail_response(self, instance):
+        with timed("serialize"):
+            return Response(self.represent(instance))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = count = None
+        if self.uses_keyset(request):
+            page = self.paginate_queryset(self.read_queryset(queryset))
+            not_modified = self.check_list_validators(request, page=page)
+        else:
+            validators = queryset.aggregate(**self.VALIDATORS)
+            not_modified = self.check_list_validators(request, validators=validators)
+            count = validators["count"]
+        if not_modified is not None:
+            return not_modified
+
+        queryset = self.read_queryset(queryset)
+        if page is None:
+            page = self.paginator.paginate_queryset(
+                queryset, request, view=self, count=count
+            )
+        return self.list_response(page, queryset)
+
+    async def alist(self, request, *args, **kwargs):
+        # El filtro de etiquetas lee el snapshot, cuya version puede estar en Redis
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        rows = self.read_queryset(queryset)
+        page = count = None
+        if self.uses_keyset(request):
+            page = await self.paginator.apaginate_queryset(rows, request, self)
+            not_modified = self.check_list_validators(request, page=page)
+        else:
+            validators = await queryset.aaggregate(**self.VALIDATORS)
+            not_modified = self.check_list_validators(request, validators=validators)
+            count = validators["count"]
+        if not_modified is not None:
+            return not_modified
+
+        if page is None:
+            page = await self.paginator.apaginate_queryset(
+                rows, request, self, count=count
+            )
+        # Las etiquetas salen del snapshot, que puede tener que recargarse
+        return await sync_to_async(self.list_response)(page, rows)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.is_conditional(request):
+            # Solo se lee updated_at; el objeto completo solo si cambio
+            updated_at = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**self.object_lookup())
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+            not_modified = self.check_detail_validators(request, updated_at)
+            if not_modified is not None:
+                return not_modified
+        return self.detail_response(self.get_object())
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        lookup = self.object_lookup()
+        if self.is_conditional(request):
+            updated_at = (
+                await queryset.filter(**lookup)
+                .values_list("updated_at", flat=True)
+                .afirst()
+            )
+            not_modified = self.check_detail_validators(request, updated_at)
+            if not_modified is not None:
+                return not_modified
+        instance = await self.read_queryset(queryset).filter(**lookup).afirst()
+        self.found_object(request, instance)
+        return await sync_to_async(self.detail_response)(instance)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+    def get_object(self):
+        if_match = self.request.headers.get("If-Match")
+        if if_match is None or self.request.method in SAFE_METHODS:
+            obj = super().get_object()
+        else:
+            obj = self.get_object_if_match(parse_etags(if_match))
+        self.object = obj
+        return obj
+
+    def get_object_if_match(self, etags):
+        """
+        Bloquea la fila y comprueba ``If-Match`` (comparacion fuerte) antes de
+        modificarla, dentro de la transaccion de update/destroy.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).select_for_update()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, obj)
+        # La compresion (tasks.middleware) debilita el ETag (W/); la version
+        # de la fila que identifica es la misma
+        etags = [tag.removeprefix("W/") for tag in etags]
+        if "*" not in etags and task_etag(obj.pk, obj.updated_at) not in etags:
+            raise PreconditionFailed()
+        return obj
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code not in (200, 201, 304):
+            return response
+        obj = getattr(self, "object", None)
+        if obj is not None:
+            self.etag, self.last_modified = (
+                task_etag(obj.id, obj.updated_at),
+                obj.updated_at,
+            )
+        if self.etag is not None:
+            response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        # Respuestas por usuario: solo cache privada y siempre revalidando
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Cachea las respuestas GET exitosas de ``list``/``retrieve`` por usuario.
+    Un acierto devuelve el contenido ya renderizado sin tocar la base de
+    datos ni los serializers, y responde 304 si el cliente ya tiene esa
+    version (con el ETag guardado junto al contenido).
+    """
+
+    cache_header = "X-Cache"
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached(super().aretrieve, request, *args, **kwargs)
+
+    def cached(self, handler, request, *args, **kwargs):
+        hit = self.cached_response(request, **kwargs)
+        if hit is not None:
+            return hit
+        return handler(request, *args, **kwargs)
+
+    async def acached(self, handler, request, *args, **kwargs):
+        # La cache de respuestas puede ser Redis: se lee en el hilo sincrono
+        hit = await sync_to_async(self.cached_response)(request, **kwargs)
+        if hit is not None:
+            return hit
+        return await handler(request, *args, **kwargs)
+
+    def cached_response(self, request, **kwargs):
+        """
+        Respuesta (200 o 304) si la peticion esta en cache; si no, None y la
+        clave queda pendiente para guardar la respuesta en finalize_response.
+        """
+        cache = get_response_cache()
+        if not cache.enabled:
+            return None
+
+        key = cache.key_for(request, type(self).__name__, **kwargs)
+        hit = cache.get(key)
+        if hit is None:
+            # Se guarda en finalize_response, cuando ya hay renderer negociado
+            self.response_cache_key = key
+            return None
+
+        response = HttpResponse(hit.content, content_type=hit.content_type)
+        for name, value in hit.headers.items():
+            response[name] = value
+        response[self.cache_header] = "HIT"
+        last_modified = parse_http_date_safe(hit.headers.get("Last-Modified", ""))
+        return get_conditional_response(
+            request,
+            etag=hit.headers.get("ETag"),
+            last_modified=last_modified,
+            response=response,
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key is not None and response.status_code == 200:
+            response.render()
+            get_response_cache().set(key, response)
+            response[self.cache_header] = "MISS"
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=id,title`` y ``?omit=description`` en los GET: el serializer
+    solo incluye los campos pedidos y el queryset solo lee sus columnas
+    (``only()``). Sin ``tags`` no se lee ``tag_names`` ni se renderizan
+    etiquetas.
+    """
+
+    fields_param = "fields"
+    omit_param = "omit"
+    # Columnas que necesita cada campo del serializer
+    fieldset_columns = {}
+    # Columnas que se leen siempre (permisos, ETag, paginacion por cursor)
+    required_columns = ()
+
+    def get_fieldset(self):
+        """Campos pedidos (frozenset) o None si se quieren todos."""
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = self.parse_fieldset(self.request)
+        return self._fieldset
+
+    def parse_fieldset(self, request):
+        if getattr(self, "swagger_fake_view", False):
+            return None
+        if request.method not in SAFE_METHODS:
+            return None
+        fields = split_param(request.query_params.get(self.fields_param))
+        omit = split_param(request.query_params.get(self.omit_param))
+        if not fields and not omit:
+            return None
+
+        readable = [
+            name
+            for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        ]
+        errors = {}
+        for param, names in ((self.fields_param, fields), (self.omit_param, omit)):
+            unknown = [name for name in names if name not in readable]
+            if unknown:
+                errors[param] = [f"Campos desconocidos: {', '.join(unknown)}."]
+        if errors:
+            raise ValidationError(errors)
+        return frozenset(fields or readable) - set(omit)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fieldset"] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        # Aqui y no en get_queryset, que las vistas redefinen
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if fieldset is None or not self.fieldset_columns:
+            return queryset
+        columns = {*self.required_columns, *self.ordering_columns()}
+        for name in fieldset:
+            columns.update(self.fieldset_columns.get(name, ()))
+        return queryset.only(*columns)
+
+    def ordering_columns(self):
+        # La paginacion por cursor lee de cada fila los campos de orden
+        valid = getattr(self, "ordering_fields", None) or ()
+        terms = split_param(self.request.query_params.get(api_settings.ORDERING_PARAM))
+        return [
+            resolve_ordering(term).lstrip("-")
+            for term in terms
+            if term.lstrip("-") in valid
+        ]
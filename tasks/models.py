@@ -1,6 +1,10 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+# Titulos unicos por usuario (ver TaskSerializer, que traduce el error)
+TITLE_CONSTRAINT = "unique_task_title_per_user"
+
 
 # Create your models here.
 class Tag(models.Model):
@@ -28,14 +32,222 @@ class Task(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     completed = models.BooleanField(default=False)
+    # Momento en que se completo (None si esta pendiente); agrupa las
+    # completadas por dia en TaskDailyStats
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Ultima modificacion (incluye cambios de etiquetas); base de ETag y
+    # Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+    # Documento de busqueda (PostgreSQL). Lo mantiene tasks.search; en SQLite
+    # el indice vive en la tabla FTS5 tasks_task_fts.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Nombres de las etiquetas, ordenados y delimitados ("|casa|trabajo|").
+    # Copia de tags que mantienen tasks.signals, tasks.bulk y tasks.importer;
+    # ordenar, filtrar y renderizar etiquetas no necesita JOIN.
+    tag_names = models.TextField(blank=True, default="", editable=False)
 
     # Relaciones
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tasks")
     tags = models.ManyToManyField(Tag, blank=True)
 
+    class Meta:
+        # Indices para los accesos frecuentes: listado del usuario por fecha
+        # (tambien cubre la paginacion por cursor), filtro por completadas y
+        # orden por etiquetas
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="task_user_created_idx"
+            ),
+            models.Index(
+                fields=["user", "completed", "-created_at"],
+                name="task_user_completed_idx",
+            ),
+            models.Index(fields=["user", "tag_names"], name="task_user_tag_names_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "title"], name=TITLE_CONSTRAINT),
+        ]
+
     def __str__(self):
         """
         Representación en string de la tarea, util para la depuracion y el admin.
         """
         return self.title
+
+
+# Archivo: tasks.archive mueve aqui las tareas completadas hace tiempo para
+# que tasks_task y sus indices solo contengan datos "calientes".
+
+
+class ArchivedTask(models.Model):
+    """
+    Tarea completada archivada. Conserva el id, las fechas, ``tag_names`` y
+    el documento de busqueda de la fila original.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    completed = models.BooleanField(default=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    search_vector = SearchVectorField(null=True, editable=False)
+    tag_names = models.TextField(blank=True, default="", editable=False)
+    archived_at = models.DateTimeField()
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_tasks"
+    )
+    tags = models.ManyToManyField(
+        Tag, blank=True, through="ArchivedTaskTag", related_name="archived_tasks"
+    )
+
+    class Meta:
+        # Solo se lee por id o con ?include_archived=true (por usuario y fecha)
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="archived_user_created_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedTaskTag(models.Model):
+    """Etiquetas de una tarea archivada (mismas columnas que ``Task.tags``)."""
+
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "tasks_archivedtask_tags"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "tag"], name="unique_archived_task_tag"
+            ),
+        ]
+
+
+class TaskRecord(models.Model):
+    """
+    Tareas activas y archivadas juntas (vista ``tasks_task_all``, un UNION
+    ALL de ambas tablas). Solo lectura: la usan el detalle y
+    ``?include_archived=true``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    completed = models.BooleanField()
+    completed_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    search_vector = SearchVectorField(null=True)
+    tag_names = models.TextField()
+    archived = models.BooleanField()
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+
+    class Meta:
+        managed = False
+        db_table = "tasks_task_all"
+
+    def __str__(self):
+        return self.title
+
+
+# Contadores por usuario que mantiene tasks.stats en la misma transaccion que
+# las escrituras de tareas. Se reconstruyen con rebuild_task_stats.
+
+
+class TaskStats(models.Model):
+    """Totales de tareas de un usuario."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="task_stats"
+    )
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+
+class TaskTagStats(models.Model):
+    """Tareas (totales y completadas) de un usuario con una etiqueta."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "tag"], name="unique_task_tag_stats"
+            ),
+        ]
+
+
+class TaskDailyStats(models.Model):
+    """Tareas de un usuario completadas cada dia (segun completed_at)."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day"], name="unique_task_daily_stats"
+            ),
+        ]
+
+
+class DeletionJob(models.Model):
+    """
+    Borrado por lotes de un usuario o una etiqueta (``tasks.deletion``).
+    ``deleted`` avanza con cada lote; ``total`` es la estimacion al empezar.
+    """
+
+    USER = "user"
+    TAG = "tag"
+    KIND_CHOICES = [(USER, "Usuario"), (TAG, "Etiqueta")]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pendiente"),
+        (RUNNING, "En curso"),
+        (DONE, "Terminado"),
+        (FAILED, "Fallido"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Sin FK: el objeto desaparece al terminar el borrado
+    target_id = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.IntegerField(default=0)
+    deleted = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Latido: se actualiza con cada lote (run_deletions retoma los parados)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="deletion_status_idx"),
+            models.Index(fields=["kind", "target_id"], name="deletion_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.target_id} ({self.status})"
@@ -0,0 +1,294 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import resolve_ordering
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginacion por cursor (keyset) sobre (campo de orden, id).
+
+    Nunca ejecuta COUNT(*) ni OFFSET: cada pagina es un
+    ``WHERE campo <= x AND (campo < x OR (campo = x AND id < y))
+    ORDER BY campo, id LIMIT n`` (ver ``build_filter``), asi que el costo es
+    el mismo en la primera pagina que en la pagina diez mil.
+    Los cursores son opacos (base64) y recuerdan el orden con el que se
+    generaron.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    ordering_param = api_settings.ORDERING_PARAM
+    # Campos por los que se puede paginar con keyset (columnas no nulas)
+    keyset_fields = ("created_at", "title", "tag_names")
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Version asincrona: la pagina se lee con el ORM asincrono."""
+        return self.set_page(
+            [obj async for obj in self.page_queryset(queryset, request)]
+        )
+
+    def page_queryset(self, queryset, request):
+        """Queryset de la pagina pedida (sin evaluar), con un elemento extra."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        self.model = queryset.model
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            self.reverse, self.position = False, None
+        else:
+            self.reverse, self.position = cursor
+
+        order = self.invert(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if self.position is not None:
+            queryset = queryset.filter(self.build_filter(order, self.position))
+        # Pedimos un elemento extra para saber si hay mas paginas
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def get_ordering(self, request):
+        """
+        Devuelve el orden del keyset, p. ej. ``["-created_at", "-id"]``.
+        Usa el primer campo valido del parametro ``ordering``; el id se
+        agrega siempre como desempate en la misma direccion.
+        """
+        params = request.query_params.get(self.ordering_param, "")
+        term = self.default_ordering
+        for candidate in (param.strip() for param in params.split(",")):
+            candidate = resolve_ordering(candidate)
+            if candidate.lstrip("-") in self.keyset_fields:
+                term = candidate
+                break
+        prefix = "-" if term.startswith("-") else ""
+        return [term, f"{prefix}id"]
+
+    @staticmethod
+    def invert(ordering):
+        return [term[1:] if term.startswith("-") else f"-{term}" for term in ordering]
+
+    @staticmethod
+    def build_filter(ordering, position):
+        """
+        Construye la condicion "despues de ``position``" para el orden dado:
+        ``a >= x AND ((a > x) OR (a = x AND b > y))``.
+
+        No es una comparacion de filas ``(a, b) > (x, y)``: el ORM no la
+        expone y SQLite la reescribiria igual. La cota redundante sobre el
+        primer campo (``a >= x``) es la que permite al planificador empezar
+        el recorrido del indice compuesto en la posicion del cursor en lugar
+        de filtrar las filas una a una con el OR.
+        """
+        condition = Q()
+        equal = {}
+        for term, value in zip(ordering, position):
+            field = term.lstrip("-")
+            lookup = "lt" if term.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+    def position_from(self, obj):
+        return [getattr(obj, term.lstrip("-")) for term in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        values = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in position
+        ]
+        payload = {"o": self.ordering[0], "p": values}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            if payload["o"] != self.ordering[0]:
+                raise ValueError("orden distinto al del cursor")
+            fields = [term.lstrip("-") for term in self.ordering]
+            values = payload["p"]
+            if len(values) != len(fields):
+                raise ValueError("posicion incompleta")
+            position = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except (
+            binascii.Error,
+            DjangoValidationError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(payload.get("r")), position
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position_from(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.position_from(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Paginacion de tareas: por numero de pagina (compatible con clientes
+    antiguos) o por cursor cuando se envia ``?cursor=`` o
+    ``?pagination=cursor``.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None, count=None):
+        """
+        ``count``: total del queryset si ya se conto (p. ej. en el agregado de
+        los validadores del listado); evita el COUNT del paginador.
+        """
+        self.keyset = self.keyset_class() if self.use_keyset(request) else None
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if count is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.counted_paginator(queryset, page_size, count)
+        self.page = paginator.page(self.valid_page_number(request, paginator))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    async def apaginate_queryset(self, queryset, request, view=None, count=None):
+        """
+        Version asincrona de ``paginate_queryset``: el COUNT (si no se pasa
+        ``count``) y la pagina se leen con el ORM asincrono.
+        """
+        self.keyset = self.keyset_class() if self.use_keyset(request) else None
+        if self.keyset is not None:
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        if count is None:
+            count = await queryset.acount()
+        paginator = self.counted_paginator(queryset, page_size, count)
+        number = self.valid_page_number(request, paginator)
+        bottom = (number - 1) * page_size
+        rows = [obj async for obj in queryset[bottom : bottom + page_size]]
+        self.page = paginator._get_page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def counted_paginator(self, queryset, page_size, count):
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count es un cached_property: se asigna el valor ya contado
+        paginator.count = count
+        return paginator
+
+    def valid_page_number(self, request, paginator):
+        page_number = self.get_page_number(request, paginator)
+        try:
+            return paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Usar 'cursor' para paginar por cursor (sin COUNT).",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+            {
+                "name": self.keyset_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor opaco devuelto en 'next'/'previous'.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -8,4 +8,5 @@ class IsOwner(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Comprueba si el usuario del objeto es mismo que el usuario autenticado
-        return obj.user == request.user
+        # (por id: no hace falta cargar obj.user)
+        return obj.user_id == request.user.pk
@@ -0,0 +1,90 @@
+"""
+Renderer y parser JSON de la API con un codificador rapido (orjson) cuando
+esta instalado y el modulo ``json`` estandar si no.
+
+La salida es la misma que la de ``rest_framework.renderers.JSONRenderer``
+byte a byte: compacta, UTF-8 sin escapar y con U+2028/U+2029 escapados. Lo
+que orjson no sabe codificar como DRF (fechas, Decimal, objetos perezosos)
+pasa por el ``JSONEncoder`` de DRF. Con ``?indent`` en el Accept (p. ej. la
+API navegable) o ``API_JSON_BACKEND=stdlib`` se usa el renderer de DRF.
+"""
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from config.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+# Fechas y dataclasses con el formato de DRF (no el nativo de orjson)
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+    if orjson is not None
+    else 0
+)
+
+
+def json_backend():
+    """``"orjson"`` o ``"stdlib"`` segun ``API_JSON_BACKEND`` y lo instalado."""
+    if (
+        settings.API_JSON_BACKEND == "stdlib"
+        or orjson is None
+        # orjson solo produce la salida compacta y sin escapar de DRF
+        or not api_settings.COMPACT_JSON
+        or not api_settings.UNICODE_JSON
+    ):
+        return "stdlib"
+    return "orjson"
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("render"):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if json_backend() == "stdlib" or self.get_indent(
+            accepted_media_type, renderer_context
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # Igual que DRF: estos separadores no son validos en JavaScript
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        # orjson solo lee UTF-8 y siempre rechaza NaN/Infinity (STRICT_JSON)
+        if (
+            json_backend() == "stdlib"
+            or codecs.lookup(encoding).name != "utf-8"
+            or not api_settings.STRICT_JSON
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,133 @@
+"""
+Ruta rapida de lectura de tareas.
+
+Los GET de listado y detalle no construyen instancias de ``Task`` ni pasan
+cada fila por ``TaskSerializer``: leen tuplas con ``values_list`` (solo las
+columnas de los campos pedidos) y arman los diccionarios directamente. La
+salida es la misma que la del serializer, byte a byte: mismos campos y en
+el mismo orden (se toman de una instancia del serializer por peticion, con
+``?fields=``/``?omit=`` ya aplicados) y las fechas se formatean con sus
+propios campos. Las etiquetas salen de ``tag_names`` y del snapshot, sin
+consultas, y cada combinacion se renderiza una sola vez por pagina.
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .serializers import SnapshotTagsField, render_tags
+from .tags import tag_ids_for_names
+
+# Campo de TaskSerializer -> columna de tasks_task de la que sale
+FIELD_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "completed": "completed",
+    "created_at": "created_at",
+    "tags": "tag_names",
+}
+# Columnas que se leen siempre: propietario (IsOwner), ETag/Last-Modified
+ROW_COLUMNS = ("id", "user_id", "updated_at", "created_at")
+
+
+class TaskRows:
+    """
+    Representacion de ``TaskSerializer`` construida desde filas de
+    ``values_list(named=True)``. ``for_serializer`` devuelve None si el
+    serializer tiene algun campo legible que no sabe leer de una columna.
+    """
+
+    def __init__(self, fields):
+        # [(nombre, columna, conversion)]; conversion None = valor tal cual
+        self.fields = fields
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name not in FIELD_COLUMNS:
+                return None
+            if isinstance(field, SnapshotTagsField):
+                convert = "tags"
+            elif isinstance(field, (serializers.DateTimeField, serializers.DateField)):
+                convert = field.to_representation
+            else:
+                convert = None
+            fields.append((name, FIELD_COLUMNS[name], convert))
+        return cls(fields)
+
+    def queryset(self, queryset, extra=()):
+        """``queryset`` como filas con las columnas de los campos y ``extra``."""
+        columns = [*ROW_COLUMNS, *extra, *(column for _, column, _ in self.fields)]
+        self.columns = list(dict.fromkeys(columns))
+        return queryset.values_list(*self.columns, named=True)
+
+    def represent(self, rows):
+        """Un diccionario por fila, igual a ``TaskSerializer(many=True).data``."""
+        index = {column: i for i, column in enumerate(self.columns)}
+        rendered = {}
+
+        def tags(value):
+            if value not in rendered:
+                rendered[value] = render_tags(tag_ids_for_names(value))
+            return list(rendered[value])
+
+        plan = [
+            (name, index[column], tags if convert == "tags" else convert)
+            for name, column, convert in self.fields
+        ]
+        results = []
+        for row in rows:
+            item = {}
+            for name, i, convert in plan:
+                value = row[i]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            results.append(item)
+        return results
+
+
+class TaskRowsMixin:
+    """
+    Lee los GET de tareas con ``TaskRows`` en vez de instancias y
+    ``TaskSerializer`` (``TASK_FAST_READ_PATH=False`` vuelve al serializer).
+    Se apoya en los ganchos ``read_queryset``/``represent`` de
+    ``ConditionalRequestMixin``; las escrituras no cambian.
+    """
+
+    def get_task_rows(self):
+        if not hasattr(self, "_task_rows"):
+            self._task_rows = None
+            if (
+                settings.TASK_FAST_READ_PATH
+                and self.request.method in SAFE_METHODS
+                and not getattr(self, "swagger_fake_view", False)
+            ):
+                self._task_rows = TaskRows.for_serializer(self.get_serializer())
+        return self._task_rows
+
+    def read_queryset(self, queryset):
+        rows = self.get_task_rows()
+        if rows is None:
+            return super().read_queryset(queryset)
+        # La paginacion por cursor lee de cada fila los campos de orden
+        return rows.queryset(queryset, extra=self.ordering_columns())
+
+    def represent(self, data, many=False):
+        rows = self.get_task_rows()
+        if rows is None:
+            return super().represent(data, many=many)
+        if many:
+            return rows.represent(data)
+        return rows.represent([data])[0]
+
+    def get_object(self):
+        if self.get_task_rows() is None:
+            return super().get_object()
+        queryset = self.read_queryset(self.filter_queryset(self.get_queryset()))
+        row = queryset.filter(**self.object_lookup()).first()
+        return self.found_object(self.request, row)
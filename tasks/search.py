@@ -0,0 +1,183 @@
+"""
+Motor de busqueda de texto completo para tareas.
+
+Cada tarea mantiene un documento de busqueda con su titulo, descripcion y
+nombres de etiquetas (de ``Task.tag_names``, sin JOIN):
+
+* PostgreSQL: columna ``tasks_task.search_vector`` (tsvector con pesos
+  A/B/C) e indice GIN; ranking con ``ts_rank``.
+* SQLite: tabla virtual FTS5 ``tasks_task_fts`` con ``rowid`` = id de la
+  tarea; ranking con ``bm25``.
+
+Las tareas archivadas (``tasks.archive``) conservan su documento: la fila
+de ``tasks_archivedtask`` lleva su ``search_vector`` y en FTS5 el ``rowid``
+no cambia. ``model`` elige la tabla de la que se lee cada tarea.
+
+Otros motores no tienen backend y la busqueda vuelve al ``SearchFilter``
+de DRF (``ILIKE``).
+"""
+
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import ArchivedTask, Task
+
+FTS_TABLE = "tasks_task_fts"
+# Tamaño de lote para no superar el limite de parametros de SQLite
+BATCH_SIZE = 500
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_terms(text):
+    """
+    Separa el texto de busqueda en palabras, descartando cualquier sintaxis
+    del motor (comillas, operadores, parentesis).
+    """
+    return _WORD_RE.findall(text or "")
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start : start + BATCH_SIZE]
+
+
+class PostgresSearchBackend:
+    """Busqueda con tsvector/tsquery e indice GIN."""
+
+    def __init__(self, using):
+        self.using = using
+        self.config = getattr(settings, "TASK_SEARCH_CONFIG", "simple")
+
+    def update(self, task_ids, model=Task):
+        sql = f"""
+            UPDATE {model._meta.db_table} AS t SET search_vector =
+                setweight(to_tsvector(%s::regconfig, t.title), 'A') ||
+                setweight(to_tsvector(%s::regconfig,
+                    replace(t.tag_names, '|', ' ')), 'B') ||
+                setweight(to_tsvector(%s::regconfig, t.description), 'C')
+            WHERE t.id = ANY(%s)
+        """
+        with connections[self.using].cursor() as cursor:
+            for batch in _batches(task_ids):
+                cursor.execute(sql, [self.config] * 3 + [batch])
+
+    def remove(self, task_ids):
+        # El tsvector vive en la propia fila: se borra con la tarea
+        pass
+
+    def search(self, queryset, terms):
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            search_type="raw",
+            config=self.config,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+        )
+
+
+class SQLiteSearchBackend:
+    """Busqueda con una tabla virtual FTS5 (entornos locales y tests)."""
+
+    # Pesos bm25 por columna: titulo, descripcion, etiquetas
+    weights = (10.0, 1.0, 5.0)
+
+    def __init__(self, using):
+        self.using = using
+
+    def update(self, task_ids, model=Task):
+        tasks = model._meta.db_table
+        with connections[self.using].cursor() as cursor:
+            for batch in _batches(task_ids):
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO {FTS_TABLE} (rowid, title, description, tags)
+                    SELECT t.id, t.title, t.description,
+                        replace(t.tag_names, '|', ' ')
+                    FROM {tasks} t WHERE t.id IN ({placeholders})
+                    """,
+                    batch,
+                )
+
+    def remove(self, task_ids):
+        with connections[self.using].cursor() as cursor:
+            for batch in _batches(task_ids):
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+                )
+
+    def search(self, queryset, terms):
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(weight) for weight in self.weights)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s "
+                f"AND rowid = {queryset.model._meta.db_table}.id)",
+                [match],
+            )
+        )
+
+
+BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    """Devuelve el backend para la base de datos, o None si no hay soporte."""
+    backend_class = BACKENDS.get(connections[using].vendor)
+    return backend_class(using) if backend_class else None
+
+
+def update_search_documents(task_ids, using="default", model=Task):
+    """Recalcula el documento de busqueda de las tareas indicadas."""
+    backend = get_search_backend(using)
+    if backend is not None and task_ids:
+        backend.update(task_ids, model=model)
+
+
+def remove_search_documents(task_ids, using="default"):
+    backend = get_search_backend(using)
+    if backend is not None and task_ids:
+        backend.remove(task_ids)
+
+
+def rebuild_search_index(using="default", batch_size=BATCH_SIZE):
+    """
+    Reconstruye el indice completo (tareas activas y archivadas) por lotes.
+    Devuelve las tareas indexadas.
+    """
+    total = 0
+    for model in (Task, ArchivedTask):
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.using(using)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            update_search_documents(ids, using=using, model=model)
+            total += len(ids)
+            last_id = ids[-1]
+    return total
@@ -1,17 +1,95 @@
+from django.db import IntegrityError, transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from .models import Tag, Task
+from .models import TITLE_CONSTRAINT, DeletionJob, Tag, Task
+from .stats import StatsChange
+from .tags import TAG_NAMES_SEPARATOR, get_tag_snapshot, task_tag_ids
 
+DUPLICATE_TITLE_MESSAGE = "ya existe una tarea con este titulo."
 
-class TagSerializer(serializers.ModelSerializer):
+
+def is_duplicate_title(error):
+    """Indica si un IntegrityError viene de la restriccion (user, title)."""
+    # PostgreSQL nombra la restriccion; SQLite enumera las columnas
+    message = str(error)
+    return TITLE_CONSTRAINT in message or "tasks_task.title" in message
+
+
+def duplicate_title_error():
+    return serializers.ValidationError({"title": [DUPLICATE_TITLE_MESSAGE]})
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Quita los campos que no estan en ``context["fieldset"]`` (lo fija
+    ``SparseFieldsetMixin`` a partir de ``?fields=`` / ``?omit=``).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fieldset")
+        if fieldset is not None:
+            for name in [name for name in self.fields if name not in fieldset]:
+                if not self.fields[name].write_only:
+                    self.fields.pop(name)
+
+
+class TagSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name"]
 
+    def validate_name(self, value):
+        # El separador de Task.tag_names no puede formar parte de un nombre
+        if TAG_NAMES_SEPARATOR in value:
+            raise serializers.ValidationError(
+                f"El nombre no puede contener '{TAG_NAMES_SEPARATOR}'."
+            )
+        return value
+
+
+def render_tags(tag_ids):
+    """Representacion de las etiquetas a partir de sus ids, desde el snapshot."""
+    snapshot = get_tag_snapshot()
+    snapshot.get_many(tag_ids)
+    rendered = snapshot.derived(
+        "rendered",
+        lambda tags: {pk: TagSerializer(tag).data for pk, tag in tags.items()},
+    )
+    return [rendered[pk] for pk in tag_ids if pk in rendered]
+
+
+@extend_schema_field(TagSerializer(many=True))
+class SnapshotTagsField(serializers.Field):
+    """Etiquetas de la tarea renderizadas a partir de ``tag_names`` (sin consultas)."""
 
-class TaskSerializer(serializers.ModelSerializer):
-    tags = TagSerializer(many=True, read_only=True)
-    tags_id = serializers.PrimaryKeyRelatedField(
+    def __init__(self, **kwargs):
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, task):
+        return render_tags(task_tag_ids(task))
+
+
+class SnapshotTagPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Id de etiqueta validado contra el snapshot en memoria (sin consultas)."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        tag = get_tag_snapshot().get(pk)
+        if tag is None:
+            self.fail("does_not_exist", pk_value=data)
+        return tag
+
+
+class TaskSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    tags = SnapshotTagsField()
+    tags_id = SnapshotTagPrimaryKeyField(
         many=True,
         queryset=Tag.objects.all(),
         write_only=True,
@@ -31,16 +109,28 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "tags", "user"]
 
-    def validate_title(self, value):
+    def save(self, **kwargs):
         """
-        Evitar titulos duplicados para el mismo usuario
+        Los titulos duplicados del mismo usuario los rechaza la restriccion
+        unica de la base de datos (sin consulta previa y sin carreras entre
+        peticiones concurrentes); el error se devuelve como de validacion.
+        Las estadisticas del usuario (``tasks.stats``) se actualizan en la
+        misma transaccion.
         """
-        user = self.context["request"].user
-        # si estas actualizando, exclude la instancia actual
-        task_id = self.instance.id if self.instance else None
-        if Task.objects.filter(user=user, title=value).exclude(id=task_id).exists():
-            raise serializers.ValidationError("ya existe una tarea con este titulo.")
-        return value
+        try:
+            with transaction.atomic():
+                # Los contadores de estadisticas cambian en la misma transaccion
+                change = StatsChange()
+                if self.instance is not None:
+                    change.remove([self.instance])
+                task = super().save(**kwargs)
+                change.add([task])
+                change.save()
+                return task
+        except IntegrityError as exc:
+            if not is_duplicate_title(exc):
+                raise
+            raise duplicate_title_error() from exc
 
     def create(self, validated_data):
         tags_data = validated_data.pop("tags", [])
@@ -56,3 +146,91 @@ class TaskSerializer(serializers.ModelSerializer):
         if tags_data is not None:
             instance.tags.set(tags_data)
         return instance
+
+
+class BulkTaskDataSerializer(serializers.ModelSerializer):
+    """
+    Datos de una tarea dentro de una operacion masiva. Solo valida los campos;
+    titulos duplicados y etiquetas se validan por lote en ``tasks.bulk``.
+    """
+
+    tags_id = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+
+    class Meta:
+        model = Task
+        fields = ["title", "description", "completed", "tags_id"]
+
+
+class BulkOperationSerializer(serializers.Serializer):
+    ACTIONS = ["create", "update", "delete"]
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    id = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs["action"] != "create" and "id" not in attrs:
+            raise serializers.ValidationError({"id": "Este campo es requerido."})
+        return attrs
+
+
+class BulkRequestSerializer(serializers.Serializer):
+    operations = serializers.ListField(child=serializers.DictField(), min_length=1)
+
+    def validate_operations(self, value):
+        limit = self.context["max_operations"]
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f"Se permiten como maximo {limit} operaciones por peticion."
+            )
+        return value
+
+
+class TaskImportSerializer(serializers.Serializer):
+    file = serializers.FileField(
+        help_text="Archivo .ndjson (un objeto por linea) o .csv con cabecera"
+    )
+
+
+class TagStatsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    total = serializers.IntegerField()
+    completed = serializers.IntegerField()
+
+
+class DailyStatsSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    completed = serializers.IntegerField()
+
+
+class TaskStatsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    completed = serializers.IntegerField()
+    pending = serializers.IntegerField()
+    tags = TagStatsSerializer(many=True)
+    completed_per_day = DailyStatsSerializer(many=True)
+
+
+class TaskStatsQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=366, default=30)
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            "id",
+            "kind",
+            "target_id",
+            "status",
+            "total",
+            "deleted",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
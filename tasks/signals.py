@@ -0,0 +1,223 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import archive, search
+from .cache import get_response_cache
+from .models import Tag, Task
+from .stats import sync_completed_at
+from .tags import get_tag_snapshot, refresh_tag_names
+
+# Se emite tras escrituras masivas (bulk_create/bulk_update) que no disparan
+# post_save ni m2m_changed. Argumentos: user, task_ids (creadas o
+# modificadas).
+bulk_tasks_changed = Signal()
+
+
+# Campos que forman parte del documento de busqueda
+SEARCH_FIELDS = {"title", "description"}
+TAG_CHANGES = ("post_add", "post_remove", "post_clear")
+
+
+def changed_task_ids(instance, action, reverse, pk_set):
+    """Tareas afectadas por un m2m_changed de Task.tags (en cualquier sentido)."""
+    if not reverse:
+        return [instance.pk]
+    if action == "post_clear":
+        return getattr(instance, "_cleared_task_ids", [])
+    return list(pk_set)
+
+
+# tag_names: se recalcula antes de reindexar, porque el documento de busqueda
+# toma los nombres de las etiquetas de esa columna
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def refresh_task_tag_names(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in TAG_CHANGES:
+        return
+    task_ids = changed_task_ids(instance, action, reverse, pk_set)
+    values = refresh_tag_names(task_ids, using=kwargs["using"])
+    if not reverse:
+        # La instancia en memoria no debe pisar la columna en un save() posterior
+        instance.tag_names = values[instance.pk]
+
+
+@receiver(post_save, sender=Tag)
+def refresh_renamed_tag_names(sender, instance, created, **kwargs):
+    if not created:
+        task_ids = instance.task_set.values_list("id", flat=True)
+        refresh_tag_names(task_ids, using=kwargs["using"])
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_deleted_tag_names(sender, instance, **kwargs):
+    refresh_tag_names(getattr(instance, "_deleted_task_ids", []), using=kwargs["using"])
+
+
+# Tareas archivadas: renombrar o borrar una etiqueta tambien cambia sus
+# tag_names, documento de busqueda y updated_at (tasks.archive)
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_archived_tasks(sender, instance, **kwargs):
+    instance._deleted_archived_ids = list(
+        instance.archived_tasks.values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Tag)
+def refresh_renamed_tag_archived(sender, instance, created, **kwargs):
+    if not created:
+        archive.refresh_archived_tags(
+            instance.archived_tasks.values_list("id", flat=True),
+            using=kwargs["using"],
+        )
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_deleted_tag_archived(sender, instance, **kwargs):
+    archive.refresh_archived_tags(
+        getattr(instance, "_deleted_archived_ids", []), using=kwargs["using"]
+    )
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, update_fields=None, **kwargs):
+    """Reindexa la tarea cuando cambia su titulo o descripcion."""
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    search.update_search_documents([instance.pk], using=kwargs["using"])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    search.remove_search_documents([instance.pk], using=kwargs["using"])
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def remember_cleared_tasks(sender, instance, action, reverse, **kwargs):
+    # Despues de tag.task_set.clear() ya no se sabe que tareas tenia
+    if action == "pre_clear" and reverse:
+        instance._cleared_task_ids = list(
+            instance.task_set.values_list("id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def index_task_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Reindexa las tareas afectadas al asignar o quitar etiquetas, tanto desde
+    la tarea (task.tags.set) como desde la etiqueta (tag.task_set.clear).
+    """
+    if action not in TAG_CHANGES:
+        return
+    task_ids = changed_task_ids(instance, action, reverse, pk_set)
+    search.update_search_documents(task_ids, using=kwargs["using"])
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, **kwargs):
+    """Al renombrar una etiqueta se reindexan las tareas que la usan."""
+    if created:
+        return
+    task_ids = instance.task_set.values_list("id", flat=True)
+    search.update_search_documents(task_ids, using=kwargs["using"])
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_tasks(sender, instance, **kwargs):
+    instance._deleted_task_ids = list(instance.task_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag(sender, instance, **kwargs):
+    search.update_search_documents(
+        getattr(instance, "_deleted_task_ids", []), using=kwargs["using"]
+    )
+
+
+@receiver(bulk_tasks_changed)
+def index_bulk_tasks(sender, task_ids, **kwargs):
+    search.update_search_documents(task_ids, using=kwargs.get("using", "default"))
+
+
+@receiver(pre_save, sender=Task)
+def set_completed_at(sender, instance, **kwargs):
+    sync_completed_at(instance)
+
+
+# updated_at: los cambios de etiquetas alteran la representacion de la tarea
+# sin pasar por Task.save(), asi que se marcan aqui.
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def touch_task_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in TAG_CHANGES:
+        return
+    now = timezone.now()
+    if not reverse:
+        instance.updated_at = now
+    task_ids = changed_task_ids(instance, action, reverse, pk_set)
+    Task.objects.using(kwargs["using"]).filter(pk__in=task_ids).update(updated_at=now)
+
+
+@receiver(post_save, sender=Tag)
+def touch_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        Task.objects.using(kwargs["using"]).filter(tags=instance).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Tag)
+def touch_deleted_tag(sender, instance, **kwargs):
+    Task.objects.using(kwargs["using"]).filter(
+        pk__in=getattr(instance, "_deleted_task_ids", [])
+    ).update(updated_at=timezone.now())
+
+
+# Invalidacion de la cache de respuestas: cualquier cambio en las tareas de
+# un usuario incrementa su version; cualquier cambio de etiquetas (que se
+# renderizan dentro de las tareas de todos) incrementa la version global.
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_responses(sender, instance, **kwargs):
+    get_response_cache().invalidate_user(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def invalidate_task_tags_responses(sender, instance, action, reverse, **kwargs):
+    if action not in TAG_CHANGES:
+        return
+    if reverse:
+        get_response_cache().invalidate_tags()
+    else:
+        get_response_cache().invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_responses(sender, instance, created=False, **kwargs):
+    if not created:
+        get_response_cache().invalidate_tags()
+
+
+@receiver(bulk_tasks_changed)
+def invalidate_bulk_responses(sender, user, **kwargs):
+    get_response_cache().invalidate_user(user.pk)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reload_tag_snapshot(sender, **kwargs):
+    # Altas incluidas: un tags_id nuevo debe validar en todos los workers
+    get_tag_snapshot().invalidate()
@@ -0,0 +1,217 @@
+"""
+Estadisticas por usuario mantenidas de forma incremental.
+
+``/api/tasks/stats/`` lee tres tablas de contadores (``TaskStats``,
+``TaskTagStats`` y ``TaskDailyStats``) en vez de agregar todas las tareas
+del usuario. Cada escritura de tareas (serializer, borrado, operaciones
+masivas, importacion) registra el aporte de las tareas afectadas antes y
+despues de escribirlas con ``StatsChange`` y aplica la diferencia con
+``UPDATE ... SET x = x + n`` en la misma transaccion, de modo que los
+contadores se confirman o revierten junto con las tareas.
+
+Los cambios hechos por fuera de esas rutas (admin, ``tag.task_set``, SQL
+directo) no se contabilizan: ``rebuild_task_stats`` recalcula los contadores
+desde las tareas.
+
+Archivar una tarea (``tasks.archive``) no cambia los contadores: las tareas
+archivadas siguen contando.
+"""
+
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    ArchivedTaskTag,
+    Task,
+    TaskDailyStats,
+    TaskRecord,
+    TaskStats,
+    TaskTagStats,
+)
+from .tags import task_tag_ids
+
+# Lo que una tarea suma a los contadores de su usuario
+Contribution = namedtuple("Contribution", ["user_id", "completed", "day", "tag_ids"])
+
+
+def sync_completed_at(task, now=None):
+    """``completed_at`` sigue a ``completed``: se fija al completar y se borra al reabrir."""
+    if not task.completed:
+        task.completed_at = None
+    elif task.completed_at is None:
+        task.completed_at = now or timezone.now()
+
+
+def contribution(task):
+    day = timezone.localdate(task.completed_at) if task.completed_at else None
+    return Contribution(task.user_id, task.completed, day, set(task_tag_ids(task)))
+
+
+class StatsChange:
+    """
+    Diferencia acumulada en los contadores. ``remove`` recibe las tareas
+    antes de escribirlas y ``add`` despues (las etiquetas salen de
+    ``tag_names``); ``save`` aplica el neto, asi que las tareas que no cambian
+    ningun contador no generan escrituras.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+        self.totals = Counter()
+        self.tags = Counter()
+        self.days = Counter()
+
+    def add(self, tasks, sign=1):
+        for item in map(contribution, tasks):
+            done = sign if item.completed else 0
+            self.totals[item.user_id, "total"] += sign
+            self.totals[item.user_id, "completed"] += done
+            for tag_id in item.tag_ids:
+                self.tags[(item.user_id, tag_id), "total"] += sign
+                self.tags[(item.user_id, tag_id), "completed"] += done
+            if item.day is not None:
+                self.days[(item.user_id, item.day), "completed"] += done
+
+    def remove(self, tasks):
+        self.add(tasks, sign=-1)
+
+    def remove_tag(self, tag_id, rows):
+        """
+        Descuenta ``tag_id`` de las tareas ``rows`` (pares
+        ``(user_id, completed)``) al quitarles esa etiqueta; sus demas
+        contadores no cambian.
+        """
+        for user_id, completed in rows:
+            self.tags[(user_id, tag_id), "total"] -= 1
+            if completed:
+                self.tags[(user_id, tag_id), "completed"] -= 1
+
+    def save(self):
+        self._apply(TaskStats, self.totals, lambda user_id: {"user_id": user_id})
+        self._apply(
+            TaskTagStats,
+            self.tags,
+            lambda key: {"user_id": key[0], "tag_id": key[1]},
+        )
+        self._apply(
+            TaskDailyStats, self.days, lambda key: {"user_id": key[0], "day": key[1]}
+        )
+        self.totals.clear()
+        self.tags.clear()
+        self.days.clear()
+
+    def _apply(self, model, counter, lookup):
+        deltas = {}
+        for (key, field), value in counter.items():
+            if value:
+                deltas.setdefault(key, {})[field] = value
+        if not deltas:
+            return
+        manager = model.objects.using(self.using)
+        # Las filas que suben se crean si faltan; las que bajan ya deberian
+        # existir (si no, hay deriva y solo rebuild_task_stats la corrige)
+        manager.bulk_create(
+            [
+                model(**lookup(key))
+                for key, fields in deltas.items()
+                if any(value > 0 for value in fields.values())
+            ],
+            ignore_conflicts=True,
+        )
+        # Orden fijo de filas para que dos escrituras no se bloqueen mutuamente
+        for key, fields in sorted(deltas.items()):
+            manager.filter(**lookup(key)).update(
+                **{field: F(field) + value for field, value in fields.items()}
+            )
+
+
+def get_stats(user, days=30, using="default"):
+    """Contadores del usuario: totales, por etiqueta y completadas por dia."""
+    totals = (
+        TaskStats.objects.using(using)
+        .filter(user=user)
+        .values("total", "completed")
+        .first()
+    ) or {"total": 0, "completed": 0}
+    tags = (
+        TaskTagStats.objects.using(using)
+        .filter(user=user, total__gt=0)
+        .order_by("tag_id")
+        .values("tag_id", "total", "completed")
+    )
+    since = timezone.localdate() - timedelta(days=days - 1)
+    per_day = (
+        TaskDailyStats.objects.using(using)
+        .filter(user=user, day__gte=since, completed__gt=0)
+        .order_by("day")
+        .values("day", "completed")
+    )
+    return {
+        **totals,
+        "pending": totals["total"] - totals["completed"],
+        "tags": list(tags),
+        "completed_per_day": list(per_day),
+    }
+
+
+def rebuild_stats(users=None, using="default"):
+    """
+    Recalcula desde las tareas (activas y archivadas) los contadores de
+    ``users`` (todos si es None). Devuelve cuantos usuarios con tareas se
+    reconstruyeron.
+    """
+    tasks = TaskRecord.objects.using(using)
+    throughs = [
+        Task.tags.through.objects.using(using),
+        ArchivedTaskTag.objects.using(using),
+    ]
+    scoped = [
+        TaskStats.objects.using(using),
+        TaskTagStats.objects.using(using),
+        TaskDailyStats.objects.using(using),
+    ]
+    if users is not None:
+        tasks = tasks.filter(user__in=users)
+        throughs = [through.filter(task__user__in=users) for through in throughs]
+        scoped = [manager.filter(user__in=users) for manager in scoped]
+    completed = Count("id", filter=Q(completed=True))
+
+    with transaction.atomic(using=using):
+        for manager in scoped:
+            manager.delete()
+        totals = [
+            TaskStats(user_id=row["user"], total=row["total"], completed=row["done"])
+            for row in tasks.values("user").annotate(total=Count("id"), done=completed)
+        ]
+        TaskStats.objects.using(using).bulk_create(totals)
+        tag_counts = Counter()
+        for through in throughs:
+            for row in through.values("task__user", "tag").annotate(
+                total=Count("id"), done=Count("id", filter=Q(task__completed=True))
+            ):
+                key = (row["task__user"], row["tag"])
+                tag_counts[key, "total"] += row["total"]
+                tag_counts[key, "completed"] += row["done"]
+        TaskTagStats.objects.using(using).bulk_create(
+            TaskTagStats(
+                user_id=user_id,
+                tag_id=tag_id,
+                total=total,
+                completed=tag_counts[(user_id, tag_id), "completed"],
+            )
+            for ((user_id, tag_id), field), total in tag_counts.items()
+            if field == "total"
+        )
+        TaskDailyStats.objects.using(using).bulk_create(
+            TaskDailyStats(user_id=row["user"], day=row["day"], completed=row["done"])
+            for row in tasks.filter(completed=True, completed_at__isnull=False)
+            .annotate(day=TruncDate("completed_at"))
+            .values("user", "day")
+            .annotate(done=Count("id"))
+        )
+    return len(totals)
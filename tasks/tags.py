@@ -0,0 +1,222 @@
+"""
+Snapshot en memoria de la tabla de etiquetas.
+
+Las etiquetas son pocas y globales: cada proceso guarda una copia
+(``id -> Tag``) y la usa para renderizar las etiquetas de las tareas a partir
+de sus nombres (``Task.tag_names``), para validar ``tags_id`` y para servir
+``/api/tags/``. La copia lleva la version leida de una cache de Django
+(``CACHES``, compartida entre workers si es Redis); crear, renombrar o borrar
+una etiqueta incrementa esa version y cada proceso recarga la tabla completa
+en su siguiente acceso.
+"""
+
+import threading
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .cache import new_version
+from .models import Tag, Task
+
+VERSION_KEY = "tasks:tags:snapshot-version"
+
+_State = namedtuple("_State", ["version", "tags", "derived"])
+
+
+class TagSnapshot:
+    """Copia de la tabla de etiquetas del proceso, recargada por version."""
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self._state = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def shared_version(self):
+        version = self.cache.get(VERSION_KEY)
+        if version is None:
+            self.cache.add(VERSION_KEY, new_version(), None)
+            version = self.cache.get(VERSION_KEY)
+        return version
+
+    def state(self, force=False):
+        version = self.shared_version()
+        state = self._state
+        if state is not None and state.version == version and not force:
+            return state
+        with self._lock:
+            state = self._state
+            if force or state is None or state.version != version:
+                # Siempre del primario: una replica atrasada dejaria el
+                # snapshot viejo guardado con la version nueva
+                tags = {
+                    tag.pk: tag
+                    for tag in Tag.objects.using(DEFAULT_DB_ALIAS).order_by("id")
+                }
+                state = self._state = _State(version, tags, {})
+                self.reloads += 1
+            return state
+
+    def all(self):
+        """Etiquetas ordenadas por id."""
+        return list(self.state().tags.values())
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    async def astate(self, force=False):
+        """
+        Version asincrona de ``state``: version con la API asincrona de la
+        cache y recarga con el ORM asincrono (sin el lock: dos recargas
+        simultaneas solo repiten trabajo).
+        """
+        version = await self.cache.aget(VERSION_KEY)
+        if version is None:
+            await self.cache.aadd(VERSION_KEY, new_version(), None)
+            version = await self.cache.aget(VERSION_KEY)
+        state = self._state
+        if state is not None and state.version == version and not force:
+            return state
+        tags = {
+            tag.pk: tag
+            async for tag in Tag.objects.using(DEFAULT_DB_ALIAS).order_by("id")
+        }
+        self._state = state = _State(version, tags, {})
+        self.reloads += 1
+        return state
+
+    async def aall(self):
+        return list((await self.astate()).tags.values())
+
+    async def aget(self, pk):
+        tags = (await self.astate()).tags
+        if pk not in tags:
+            tags = (await self.astate(force=True)).tags
+        return tags.get(pk)
+
+    def get_many(self, ids):
+        """
+        Diccionario ``id -> Tag`` vigente. Si falta algun id se recarga una
+        vez por si la etiqueta es mas nueva que la version leida.
+        """
+        tags = self.state().tags
+        if any(pk not in tags for pk in ids):
+            tags = self.state(force=True).tags
+        return tags
+
+    def derived(self, name, factory):
+        """
+        Valor calculado a partir de las etiquetas (p. ej. su representacion
+        JSON), memorizado hasta la siguiente recarga.
+        """
+        state = self.state()
+        if name not in state.derived:
+            state.derived[name] = factory(state.tags)
+        return state.derived[name]
+
+    def invalidate(self):
+        """
+        Incrementa la version ahora y otra vez al confirmar la transaccion,
+        igual que la cache de respuestas (``ResponseCache.bump``).
+        """
+        self._bump()
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        try:
+            self.cache.incr(VERSION_KEY)
+        except ValueError:
+            self.cache.set(VERSION_KEY, new_version(), None)
+
+    def clear(self):
+        self._state = None
+
+
+# Task.tag_names: nombres de las etiquetas ordenados y delimitados
+# ("|casa|trabajo|", "" sin etiquetas). Con ellos se ordena, filtra y
+# renderiza sin leer la tabla intermedia.
+TAG_NAMES_SEPARATOR = "|"
+# Tamaño de lote para no superar el limite de parametros de SQLite
+BATCH_SIZE = 500
+
+
+def join_tag_names(names):
+    names = sorted(set(names))
+    if not names:
+        return ""
+    return TAG_NAMES_SEPARATOR + TAG_NAMES_SEPARATOR.join(names) + TAG_NAMES_SEPARATOR
+
+
+def split_tag_names(value):
+    return value.strip(TAG_NAMES_SEPARATOR).split(TAG_NAMES_SEPARATOR) if value else []
+
+
+def tag_names_token(name):
+    """Fragmento de ``tag_names`` que identifica una etiqueta (para filtrar)."""
+    return f"{TAG_NAMES_SEPARATOR}{name}{TAG_NAMES_SEPARATOR}"
+
+
+def tag_ids_by_name():
+    """``nombre -> id`` de todas las etiquetas, desde el snapshot."""
+    return get_tag_snapshot().derived(
+        "by_name", lambda tags: {tag.name: pk for pk, tag in tags.items()}
+    )
+
+
+def tag_ids_for_names(tag_names):
+    """Ids de las etiquetas de un valor de ``tag_names``, ordenados por nombre."""
+    by_name = tag_ids_by_name()
+    return [by_name[name] for name in split_tag_names(tag_names) if name in by_name]
+
+
+def task_tag_ids(task):
+    """Ids de las etiquetas de una tarea (por nombre), ordenados por nombre."""
+    return tag_ids_for_names(task.tag_names)
+
+
+def refresh_tag_names(task_ids, using="default", model=Task):
+    """
+    Recalcula ``tag_names`` de las tareas desde la tabla intermedia (una
+    consulta y un UPDATE por lote). Devuelve ``task_id -> tag_names``.
+    ``model`` es ``Task`` o ``ArchivedTask``.
+    """
+    task_ids = list(task_ids)
+    values = {}
+    for start in range(0, len(task_ids), BATCH_SIZE):
+        batch = task_ids[start : start + BATCH_SIZE]
+        names = defaultdict(list)
+        for task_id, name in (
+            model.tags.through.objects.using(using)
+            .filter(task_id__in=batch)
+            .values_list("task_id", "tag__name")
+        ):
+            names[task_id].append(name)
+        batch_values = {task_id: join_tag_names(names[task_id]) for task_id in batch}
+        model.objects.using(using).bulk_update(
+            [model(pk=pk, tag_names=value) for pk, value in batch_values.items()],
+            ["tag_names"],
+        )
+        values.update(batch_values)
+    return values
+
+
+_tag_snapshot = None
+_tag_snapshot_lock = threading.Lock()
+
+
+def get_tag_snapshot():
+    """Devuelve el snapshot de etiquetas del proceso (se crea al primer uso)."""
+    global _tag_snapshot
+    if _tag_snapshot is None:
+        with _tag_snapshot_lock:
+            if _tag_snapshot is None:
+                _tag_snapshot = TagSnapshot(
+                    getattr(settings, "TASK_TAG_SNAPSHOT_CACHE", "default")
+                )
+    return _tag_snapshot
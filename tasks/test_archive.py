@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.archive import archive_tasks
+from tasks.models import ArchivedTask, Tag, Task
+from tasks.stats import get_stats, rebuild_stats
+
+
+@pytest.mark.django_db
+class TestTaskArchive:
+    """
+    Tests para el archivo de tareas completadas antiguas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.work = Tag.objects.create(name="trabajo")
+
+    def create(self, title, old=False, **data):
+        response = self.client.post(
+            "/api/tasks/",
+            {"title": title, "tags_id": [self.work.id], **data},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        task_id = response.data["id"]
+        if old:
+            long_ago = timezone.now() - timedelta(days=200)
+            Task.objects.filter(id=task_id).update(
+                completed_at=long_ago, updated_at=long_ago
+            )
+            # El UPDATE directo no pasa por los contadores de completadas por dia
+            rebuild_stats([self.user])
+        return task_id
+
+    def ids(self, url):
+        response = self.client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        return {task["id"] for task in response.data["results"]}
+
+    def test_archives_old_completed_tasks(self):
+        """Test: solo se mueven las completadas antiguas, con sus etiquetas"""
+        old = self.create("vieja", old=True, completed=True)
+        pending = self.create("pendiente", old=True)
+        recent = self.create("reciente", completed=True)
+
+        assert archive_tasks(days=90) == 1
+
+        archived = ArchivedTask.objects.get(id=old)
+        assert list(archived.tags.all()) == [self.work]
+        assert archived.tag_names == "|trabajo|"
+        assert not Task.objects.filter(id=old).exists()
+        assert set(Task.objects.values_list("id", flat=True)) == {pending, recent}
+
+    def test_list_hides_archived_unless_requested(self):
+        """Test: el listado solo lee tareas activas salvo ?include_archived=true"""
+        old = self.create("informe viejo", old=True, completed=True)
+        recent = self.create("informe nuevo")
+        archive_tasks(days=90)
+
+        assert self.ids("/api/tasks/") == {recent}
+        assert self.ids("/api/tasks/?include_archived=true") == {old, recent}
+        assert self.ids("/api/tasks/?include_archived=true&search=viejo") == {old}
+        assert self.ids(
+            f"/api/tasks/?include_archived=true&tags={self.work.id}&completed=true"
+        ) == {old}
+
+    def test_detail_reads_archive(self):
+        """Test: el detalle de una tarea archivada no cambia al archivarla"""
+        task_id = self.create("vieja", old=True, completed=True)
+        before = self.client.get(f"/api/tasks/{task_id}/")
+        archive_tasks(days=90)
+
+        response = self.client.get(f"/api/tasks/{task_id}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == before.data
+        assert response["ETag"] == before["ETag"]
+
+    def test_write_restores_archived_task(self):
+        """Test: modificar una tarea archivada la devuelve a las tareas activas"""
+        task_id = self.create("vieja", old=True, completed=True)
+        archive_tasks(days=90)
+
+        response = self.client.patch(
+            f"/api/tasks/{task_id}/", {"title": "renombrada"}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Task.objects.get(id=task_id).title == "renombrada"
+        assert list(Task.objects.get(id=task_id).tags.all()) == [self.work]
+        assert not ArchivedTask.objects.exists()
+        assert self.ids("/api/tasks/") == {task_id}
+
+    def test_delete_archived_task_updates_stats(self):
+        """Test: borrar una tarea archivada la descuenta de las estadisticas"""
+        task_id = self.create("vieja", old=True, completed=True)
+        archive_tasks(days=90)
+        assert get_stats(self.user)["completed"] == 1
+
+        response = self.client.delete(f"/api/tasks/{task_id}/")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not ArchivedTask.objects.exists()
+        incremental = get_stats(self.user)
+        assert incremental["total"] == 0
+        rebuild_stats([self.user])
+        assert get_stats(self.user) == incremental
+
+    def test_restore_title_conflict(self):
+        """Test: si otra tarea activa tomo el titulo, la escritura falla con 400"""
+        task_id = self.create("vieja", old=True, completed=True)
+        archive_tasks(days=90)
+        self.create("vieja")
+
+        response = self.client.patch(
+            f"/api/tasks/{task_id}/", {"completed": False}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "title" in response.data
+        assert ArchivedTask.objects.filter(id=task_id).exists()
+
+    def test_rebuild_stats_counts_archive(self):
+        """Test: las tareas archivadas siguen contando al reconstruir"""
+        self.create("vieja", old=True, completed=True)
+        self.create("nueva")
+        archive_tasks(days=90)
+
+        rebuild_stats([self.user])
+        data = get_stats(self.user)
+
+        assert (data["total"], data["completed"]) == (2, 1)
+        assert data["tags"][0]["total"] == 2
+
+    def test_renamed_tag_updates_archived_tasks(self):
+        """Test: renombrar una etiqueta actualiza las tareas archivadas"""
+        task_id = self.create("vieja", old=True, completed=True)
+        archive_tasks(days=90)
+
+        self.client.patch(f"/api/tags/{self.work.id}/", {"name": "oficina"})
+        response = self.client.get(f"/api/tasks/{task_id}/")
+
+        assert response.data["tags"] == [{"id": self.work.id, "name": "oficina"}]
+        assert self.ids("/api/tasks/?include_archived=true&search=oficina") == {task_id}
+
+    def test_command_runs_in_batches(self):
+        """Test: el comando archiva por lotes y es incremental"""
+        for number in range(5):
+            self.create(f"vieja {number}", old=True, completed=True)
+        out = StringIO()
+
+        call_command("archive_tasks", "--batch-size", "2", stdout=out)
+        call_command("archive_tasks", stdout=out)
+
+        assert "5 tareas archivadas" in out.getvalue()
+        assert "0 tareas archivadas" in out.getvalue()
+        assert ArchivedTask.objects.count() == 5
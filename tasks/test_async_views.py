@@ -0,0 +1,153 @@
+import json
+from inspect import iscoroutinefunction
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory
+from rest_framework import status
+from rest_framework.test import APIClient, force_authenticate
+
+from tasks.async_views import (
+    AsyncTagListCreateView,
+    AsyncTagRetrieveUpdateDestroyView,
+    AsyncTaskListCreateView,
+    AsyncTaskRetrieveUpdateDestroyView,
+)
+from tasks.models import Tag, Task
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """
+    Tests para las vistas asincronas: mismas respuestas que las sincronas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.factory = AsyncRequestFactory()
+
+        self.tag = Tag.objects.create(name="trabajo")
+        for i in range(15):
+            task = Task.objects.create(
+                title=f"reunion {i:02d}", user=self.user1, completed=i % 2 == 0
+            )
+            if i % 3 == 0:
+                task.tags.add(self.tag)
+        self.other_task = Task.objects.create(title="ajena", user=self.user2)
+
+    def call(
+        self, view_class, method, path, user=None, data=None, headers=None, **kwargs
+    ):
+        if method == "get":
+            request = self.factory.get(path, data, headers=headers)
+        else:
+            request = getattr(self.factory, method)(
+                path, data=data, content_type="application/json", headers=headers
+            )
+        force_authenticate(request, user=user or self.user1)
+        response = async_to_sync(view_class.as_view())(request, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_views_are_async(self):
+        """Test: Django reconoce las vistas como corrutinas"""
+        assert iscoroutinefunction(AsyncTaskListCreateView.as_view())
+        assert iscoroutinefunction(AsyncTagRetrieveUpdateDestroyView.as_view())
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "?page=2",
+            "?completed=true&ordering=title",
+            "?search=reunion&tags={tag}",
+            "?pagination=cursor&ordering=-title",
+            "?fields=id,title,tags&ordering=title",
+        ],
+    )
+    def test_list_matches_sync_view(self, query):
+        """Test: filtros, busqueda, orden y paginacion iguales a la vista sincrona"""
+        url = "/api/tasks/" + query.format(tag=self.tag.id)
+        expected = self.client.get(url)
+        response = self.call(AsyncTaskListCreateView, "get", url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content) == json.loads(expected.content)
+
+    def test_detail_respects_owner(self):
+        """Test: el detalle de una tarea ajena responde 404"""
+        task = Task.objects.filter(user=self.user1).first()
+        own = self.call(AsyncTaskRetrieveUpdateDestroyView, "get", "/", pk=task.pk)
+        other = self.call(
+            AsyncTaskRetrieveUpdateDestroyView, "get", "/", pk=self.other_task.pk
+        )
+
+        assert json.loads(own.content)["title"] == task.title
+        assert other.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_conditional_get(self):
+        """Test: If-None-Match responde 304 tambien en la vista asincrona"""
+        task = Task.objects.filter(user=self.user1).first()
+        etag = self.call(AsyncTaskRetrieveUpdateDestroyView, "get", "/", pk=task.pk)[
+            "ETag"
+        ]
+        response = self.call(
+            AsyncTaskRetrieveUpdateDestroyView,
+            "get",
+            "/",
+            headers={"If-None-Match": etag},
+            pk=task.pk,
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_writes_go_through_sync_handlers(self):
+        """Test: POST y PATCH funcionan igual a traves de la vista asincrona"""
+        created = self.call(
+            AsyncTaskListCreateView,
+            "post",
+            "/api/tasks/",
+            data={"title": "nueva", "tags_id": [self.tag.id]},
+        )
+        assert created.status_code == status.HTTP_201_CREATED
+        task_id = json.loads(created.content)["id"]
+
+        updated = self.call(
+            AsyncTaskRetrieveUpdateDestroyView,
+            "patch",
+            "/",
+            data={"completed": True},
+            pk=task_id,
+        )
+        assert json.loads(updated.content)["completed"] is True
+
+    def test_tags_served_from_snapshot(self):
+        """Test: listado y detalle de etiquetas asincronos"""
+        listing = self.call(AsyncTagListCreateView, "get", "/api/tags/")
+        detail = self.call(
+            AsyncTagRetrieveUpdateDestroyView, "get", "/", pk=self.tag.id
+        )
+
+        assert json.loads(listing.content)["results"] == [
+            {"id": self.tag.id, "name": "trabajo"}
+        ]
+        assert json.loads(detail.content) == {"id": self.tag.id, "name": "trabajo"}
+
+    def test_list_and_detail_served_from_response_cache(self):
+        """Test: la vista asincrona guarda y sirve la cache de respuestas"""
+        task = Task.objects.filter(user=self.user1).first()
+        for view_class, kwargs in (
+            (AsyncTaskListCreateView, {}),
+            (AsyncTaskRetrieveUpdateDestroyView, {"pk": task.pk}),
+        ):
+            first = self.call(view_class, "get", "/api/tasks/", **kwargs)
+            second = self.call(view_class, "get", "/api/tasks/", **kwargs)
+
+            assert first["X-Cache"] == "MISS"
+            assert second["X-Cache"] == "HIT"
+            assert second.content == first.content
@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.archive import archive_tasks
+from tasks.models import ArchivedTask, Tag, Task
+
+URL = "/api/tasks/bulk/"
+
+
+@pytest.mark.django_db
+class TestTaskBulk:
+    """
+    Tests para el endpoint de operaciones masivas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.tag_trabajo = Tag.objects.create(name="trabajo")
+        self.tag_personal = Tag.objects.create(name="personal")
+        self.task = Task.objects.create(title="existente", user=self.user1)
+        self.task.tags.add(self.tag_personal)
+        self.other_task = Task.objects.create(title="ajena", user=self.user2)
+
+    def post(self, *operations):
+        response = self.client.post(
+            URL, {"operations": list(operations)}, format="json"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.data["results"]
+
+    def test_create_update_delete_in_one_request(self):
+        """Test: crear, actualizar y eliminar en una sola peticion"""
+        victim = Task.objects.create(title="borrar", user=self.user1)
+        results = self.post(
+            {
+                "action": "create",
+                "data": {"title": "nueva", "tags_id": [self.tag_trabajo.id]},
+            },
+            {
+                "action": "update",
+                "id": self.task.id,
+                "data": {"completed": True, "tags_id": [self.tag_trabajo.id]},
+            },
+            {"action": "delete", "id": victim.id},
+        )
+
+        assert [r["status"] for r in results] == [201, 200, 204]
+        created = Task.objects.get(title="nueva", user=self.user1)
+        assert results[0]["data"]["tags"] == [
+            {"id": self.tag_trabajo.id, "name": "trabajo"}
+        ]
+        assert list(created.tags.all()) == [self.tag_trabajo]
+
+        self.task.refresh_from_db()
+        assert self.task.completed
+        assert list(self.task.tags.all()) == [self.tag_trabajo]
+        assert not Task.objects.filter(id=victim.id).exists()
+
+    def test_per_item_errors_do_not_block_valid_items(self):
+        """Test: los errores se informan por operacion"""
+        results = self.post(
+            {"action": "create", "data": {"title": "existente"}},
+            {"action": "create", "data": {"title": "otra", "tags_id": [999]}},
+            {"action": "create", "data": {"title": "valida"}},
+            {"action": "create", "data": {"title": "valida"}},
+            {"action": "create", "data": {}},
+        )
+
+        assert [r["status"] for r in results] == [400, 400, 201, 400, 400]
+        assert "ya existe una tarea con este titulo" in str(results[0]["errors"])
+        assert "tags_id" in results[1]["errors"]
+        assert "title" in results[4]["errors"]
+        assert Task.objects.filter(user=self.user1, title="valida").count() == 1
+
+    def test_other_users_tasks_are_not_found(self):
+        """Test: no se pueden tocar tareas de otro usuario"""
+        results = self.post(
+            {"action": "update", "id": self.other_task.id, "data": {"title": "x"}},
+            {"action": "delete", "id": self.other_task.id},
+        )
+
+        assert [r["status"] for r in results] == [404, 404]
+        assert Task.objects.filter(id=self.other_task.id, title="ajena").exists()
+
+    def test_archived_tasks_restored_before_writing(self):
+        """Test: actualizar o eliminar tareas archivadas las restaura antes"""
+        kept = Task.objects.create(title="vieja", user=self.user1, completed=True)
+        victim = Task.objects.create(title="borrar", user=self.user1, completed=True)
+        taken = Task.objects.create(title="repetida", user=self.user1, completed=True)
+        long_ago = timezone.now() - timedelta(days=200)
+        Task.objects.filter(completed=True).update(
+            completed_at=long_ago, updated_at=long_ago
+        )
+        assert archive_tasks(days=90) == 3
+        Task.objects.create(title="repetida", user=self.user1)
+
+        results = self.post(
+            {"action": "update", "id": kept.id, "data": {"completed": False}},
+            {"action": "delete", "id": victim.id},
+            {"action": "delete", "id": taken.id},
+        )
+
+        assert [r["status"] for r in results] == [200, 204, 400]
+        assert "title" in results[2]["errors"]
+        assert results[0]["data"]["completed"] is False
+        assert Task.objects.filter(id=kept.id, completed=False).exists()
+        assert not Task.objects.filter(id=victim.id).exists()
+        assert list(ArchivedTask.objects.values_list("id", flat=True)) == [taken.id]
+
+    def test_title_freed_in_same_batch(self):
+        """Test: un titulo liberado por un renombrado puede reutilizarse"""
+        results = self.post(
+            {"action": "update", "id": self.task.id, "data": {"title": "renombrada"}},
+            {"action": "create", "data": {"title": "existente"}},
+        )
+
+        assert [r["status"] for r in results] == [200, 201]
+
+    def test_validation_queries_are_set_based(self):
+        """Test: el numero de consultas no crece con el numero de operaciones"""
+
+        def run(count, prefix):
+            operations = [
+                {
+                    "action": "create",
+                    "data": {"title": f"{prefix}{i}", "tags_id": [self.tag_trabajo.id]},
+                }
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                self.post(*operations)
+            return len(ctx.captured_queries)
+
+        # La primera peticion carga el snapshot de etiquetas
+        run(1, "w")
+        assert run(2, "a") == run(20, "b")
+
+    @override_settings(TASK_BULK_MAX_OPERATIONS=2)
+    def test_operation_limit(self):
+        """Test: se rechazan lotes por encima del maximo"""
+        operations = [
+            {"action": "create", "data": {"title": f"t{i}"}} for i in range(3)
+        ]
+        response = self.client.post(URL, {"operations": operations}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
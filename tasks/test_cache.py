@@ -0,0 +1,124 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.cache import (
+    CachedResponse,
+    DjangoCacheBackend,
+    LocalMemoryBackend,
+    ResponseCache,
+    get_response_cache,
+)
+from tasks.models import Tag, Task
+
+
+@pytest.mark.django_db
+class TestTaskResponseCache:
+    """
+    Tests para la cache de respuestas del listado y detalle de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        self.task = Task.objects.create(title="tarea 1", user=self.user1)
+        self.task.tags.add(self.tag)
+
+    def test_second_request_is_served_from_cache(self):
+        """Test: la segunda peticion identica no consulta la base de datos"""
+        first = self.client.get("/api/tasks/?completed=false")
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get("/api/tasks/?completed=false")
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second["X-Cache"] == "HIT"
+        assert second.content == first.content
+        assert len(ctx.captured_queries) == 0
+        assert get_response_cache().stats()["hits"] == 1
+
+    def test_query_string_is_normalized(self):
+        """Test: el orden de los parametros no cambia la clave"""
+        self.client.get("/api/tasks/?completed=false&page=1")
+        response = self.client.get("/api/tasks/?page=1&completed=false")
+
+        assert response["X-Cache"] == "HIT"
+
+    def test_write_through_api_invalidates(self):
+        """Test: crear una tarea invalida el listado cacheado del usuario"""
+        self.client.get("/api/tasks/")
+        self.client.post("/api/tasks/", {"title": "tarea 2"})
+
+        response = self.client.get("/api/tasks/")
+        assert response["X-Cache"] == "MISS"
+        assert response.data["count"] == 2
+
+    def test_detail_update_invalidates(self):
+        """Test: editar una tarea invalida su detalle cacheado"""
+        url = f"/api/tasks/{self.task.id}/"
+        self.client.get(url)
+        self.client.patch(url, {"completed": True})
+
+        assert self.client.get(url).data["completed"] is True
+
+    def test_tag_rename_invalidates_all_users(self):
+        """Test: renombrar una etiqueta invalida las respuestas que la incluyen"""
+        self.client.get("/api/tasks/")
+        self.client.patch(f"/api/tags/{self.tag.id}/", {"name": "oficina"})
+
+        response = self.client.get("/api/tasks/")
+        assert response.data["results"][0]["tags"][0]["name"] == "oficina"
+
+    def test_cache_is_per_user(self):
+        """Test: un usuario nunca recibe la respuesta cacheada de otro"""
+        self.client.get("/api/tasks/")
+        self.client.force_authenticate(user=self.user2)
+
+        response = self.client.get("/api/tasks/")
+        assert response["X-Cache"] == "MISS"
+        assert response.data["count"] == 0
+
+
+class TestResponseCacheBackends:
+    """
+    Tests unitarios de los backends de la cache de respuestas
+    """
+
+    def test_local_backend_evicts_lru_by_bytes(self):
+        """Test: el backend local respeta el limite de bytes con LRU"""
+        backend = LocalMemoryBackend(max_entries=10, max_bytes=10)
+        backend.set("a", CachedResponse(b"12345", "application/json", {}), 60)
+        backend.set("b", CachedResponse(b"12345", "application/json", {}), 60)
+        backend.get("a")
+        backend.set("c", CachedResponse(b"12345", "application/json", {}), 60)
+
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert backend.info() == {"entries": 2, "bytes": 10}
+        assert backend.evictions == 1
+
+    @pytest.mark.django_db
+    def test_django_cache_backend_versions(self):
+        """Test: el backend compartido incrementa versiones en la cache"""
+        cache = ResponseCache(DjangoCacheBackend("default"))
+        before = cache.backend.get_version("user:1")
+        cache.invalidate_user(1)
+
+        assert cache.backend.get_version("user:1") > before
+
+    @pytest.mark.django_db
+    def test_local_backend_versions_are_shared(self):
+        """Test: una escritura en un worker invalida la cache local de los demas"""
+        worker = ResponseCache(LocalMemoryBackend())
+        other = ResponseCache(LocalMemoryBackend())
+        before = other.backend.get_version("user:1")
+        worker.invalidate_user(1)
+
+        assert other.backend.get_version("user:1") > before
@@ -0,0 +1,126 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.cache import get_response_cache
+from tasks.models import Tag, Task
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    """
+    Tests para ETag / Last-Modified en el listado y detalle de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        self.task = Task.objects.create(title="tarea 1", user=self.user)
+        self.url = f"/api/tasks/{self.task.id}/"
+
+    def test_detail_returns_validators(self):
+        """Test: el detalle incluye ETag, Last-Modified y Cache-Control"""
+        response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith(f'"{self.task.id}-')
+        assert "Last-Modified" in response
+        assert "no-cache" in response["Cache-Control"]
+
+    def test_detail_not_modified(self):
+        """Test: If-None-Match con el ETag vigente devuelve 304 sin cuerpo"""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response["ETag"] == etag
+
+    def test_list_not_modified_uses_single_query(self):
+        """Test: el 304 del listado sale de un solo agregado"""
+        etag = self.client.get("/api/tasks/?completed=false")["ETag"]
+        get_response_cache().clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                "/api/tasks/?completed=false", HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 1
+
+    def test_list_count_comes_from_validators(self):
+        """Test: el listado no lanza un COUNT aparte del agregado de validadores"""
+        self.client.get("/api/tasks/?completed=false")
+        get_response_cache().clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/?completed=false")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "ETag" in response
+        assert len(ctx.captured_queries) == 2
+        assert 'MAX("tasks_task"."updated_at")' in ctx.captured_queries[0]["sql"]
+
+    def test_list_etag_changes_on_write(self):
+        """Test: crear o editar una tarea cambia el ETag del listado"""
+        etag = self.client.get("/api/tasks/")["ETag"]
+        self.client.patch(self.url, {"completed": True})
+
+        response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_cached_response_answers_not_modified(self):
+        """Test: un acierto de la cache de respuestas tambien responde 304"""
+        etag = self.client.get("/api/tasks/")["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 0
+
+    def test_if_modified_since(self):
+        """Test: If-Modified-Since con la fecha vigente devuelve 304"""
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_if_match_mismatch_is_rejected(self):
+        """Test: PATCH/DELETE con un ETag viejo responden 412 sin modificar"""
+        etag = self.client.get(self.url)["ETag"]
+        # Otro cliente modifica la tarea entre la lectura y la escritura
+        self.task.save()
+
+        response = self.client.patch(self.url, {"completed": True}, HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        response = self.client.delete(self.url, HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert Task.objects.filter(pk=self.task.pk, completed=False).exists()
+
+    def test_if_match_current_etag_updates(self):
+        """Test: PATCH con el ETag vigente se aplica y devuelve el nuevo ETag"""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.patch(self.url, {"completed": True}, HTTP_IF_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert self.client.get(self.url)["ETag"] == response["ETag"]
+
+    def test_tag_changes_update_timestamp(self):
+        """Test: asignar o renombrar etiquetas cambia updated_at de la tarea"""
+        before = Task.objects.get(pk=self.task.pk).updated_at
+        self.task.tags.add(self.tag)
+        after_add = Task.objects.get(pk=self.task.pk).updated_at
+        assert after_add > before
+
+        self.tag.name = "oficina"
+        self.tag.save()
+        assert Task.objects.get(pk=self.task.pk).updated_at > after_add
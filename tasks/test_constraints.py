@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+class TestTaskConstraints:
+    """
+    Tests para la restriccion de titulo unico y los indices de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title="reunion", user=self.user)
+
+    def test_database_rejects_duplicate_title(self):
+        """Test: la base de datos rechaza titulos repetidos del mismo usuario"""
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Task.objects.create(title="reunion", user=self.user)
+
+    def test_duplicate_title_is_validation_error(self):
+        """Test: la violacion de la restriccion se devuelve como 400"""
+        response = self.client.post("/api/tasks/", {"title": "reunion"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {"title": ["ya existe una tarea con este titulo."]}
+        # La transaccion sigue utilizable despues del error
+        response = self.client.post("/api/tasks/", {"title": "otra"})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_bulk_update_cannot_reuse_title_renamed_in_same_batch(self):
+        """Test: un titulo liberado por un renombrado no lo toma otra actualizacion"""
+        other = Task.objects.create(title="llamada", user=self.user)
+        response = self.client.post(
+            "/api/tasks/bulk/",
+            {
+                "operations": [
+                    {"action": "update", "id": self.task.id, "data": {"title": "x"}},
+                    {"action": "update", "id": other.id, "data": {"title": "reunion"}},
+                ]
+            },
+            format="json",
+        )
+
+        assert [r["status"] for r in response.data["results"]] == [200, 400]
+
+    def test_list_query_uses_composite_index(self):
+        """Test: el listado del usuario usa el indice (user, -created_at, -id)"""
+        queryset = Task.objects.filter(user=self.user).order_by("-created_at", "-id")
+
+        assert "task_user_created_idx" in queryset.explain()
@@ -0,0 +1,100 @@
+import sys
+
+import pytest
+from django.db import DatabaseError, connections
+from django.test import Client
+
+from config.database import configure_connections, replica_databases
+from config.health import pool_stats
+
+
+class TestConnectionSettings:
+    """
+    Tests para la configuracion de conexiones desde variables de entorno
+    """
+
+    def test_persistent_connections_by_default(self, monkeypatch):
+        """Test: conexiones persistentes comprobadas antes de reutilizarse"""
+        monkeypatch.delenv("DB_POOL", raising=False)
+        monkeypatch.setenv("DB_CONN_MAX_AGE", "120")
+        monkeypatch.setenv("DB_STATEMENT_TIMEOUT", "5000")
+
+        database = configure_connections({"ENGINE": "django.db.backends.postgresql"})
+
+        assert database["CONN_MAX_AGE"] == 120
+        assert database["CONN_HEALTH_CHECKS"] is True
+        assert database["OPTIONS"] == {
+            "connect_timeout": 5,
+            "options": "-c statement_timeout=5000",
+        }
+
+    def test_pool_requires_psycopg_pool(self, monkeypatch):
+        """Test: DB_POOL sin psycopg_pool instalado falla con un mensaje claro"""
+        monkeypatch.setenv("DB_POOL", "True")
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            with pytest.raises(ImportError, match="psycopg"):
+                configure_connections({})
+        else:
+            database = configure_connections({})
+            assert database["CONN_MAX_AGE"] == 0
+            assert database["OPTIONS"]["pool"]["max_size"] == 10
+
+    def test_replica_urls_parsed_only_when_set(self, monkeypatch):
+        """Test: sin replicas no se importa dj_database_url"""
+        monkeypatch.setitem(sys.modules, "dj_database_url", None)
+
+        assert replica_databases(" , ") == {}
+        with pytest.raises(ImportError):
+            replica_databases("sqlite:///replica.sqlite3")
+
+    def test_pool_stats(self):
+        """Test: metricas del pool: en uso, libres y espera media"""
+
+        class Pool:
+            def get_stats(self):
+                return {
+                    "pool_min": 2,
+                    "pool_max": 10,
+                    "pool_size": 6,
+                    "pool_available": 2,
+                    "requests_num": 40,
+                    "requests_queued": 4,
+                    "requests_wait_ms": 30,
+                }
+
+        class Connection:
+            pool = Pool()
+
+        stats = pool_stats(Connection())
+
+        assert (stats["in_use"], stats["idle"], stats["wait_ms_avg"]) == (4, 2, 7.5)
+
+
+@pytest.mark.django_db
+class TestDatabaseHealthcheck:
+    """
+    Tests para /health/db/
+    """
+
+    def test_reports_each_alias(self):
+        """Test: comprueba cada alias y no expone un pool inexistente"""
+        response = Client().get("/health/db/")
+
+        assert response.status_code == 200
+        assert response.json()["databases"]["default"]["status"] == "healthy"
+        assert response.json()["databases"]["default"]["pool"] is None
+
+    def test_error_details_not_exposed(self, monkeypatch):
+        """Test: un alias caido responde 503 sin el mensaje de la base de datos"""
+
+        def fail():
+            raise DatabaseError('could not connect to "db.internal" as "admin"')
+
+        monkeypatch.setattr(connections["default"], "cursor", fail)
+        response = Client().get("/health/db/")
+
+        assert response.status_code == 503
+        assert response.json()["databases"]["default"] == {"status": "unhealthy"}
+        assert "db.internal" not in response.content.decode()
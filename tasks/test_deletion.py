@@ -0,0 +1,237 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from config.query_budget import track_queries
+from tasks import deletion
+from tasks.archive import archive_tasks
+from tasks.models import (
+    ArchivedTask,
+    DeletionJob,
+    Tag,
+    Task,
+    TaskStats,
+    TaskTagStats,
+)
+
+
+@pytest.mark.django_db
+class TestChunkedDeletion:
+    """
+    Tests para el borrado por lotes de usuarios y etiquetas
+    """
+
+    @pytest.fixture(autouse=True)
+    def worker_runner(self, settings):
+        """Los borrados en segundo plano se ejecutan con run_deletions"""
+        settings.DELETION = {
+            **settings.DELETION,
+            "BATCH_SIZE": 2,
+            "ASYNC_THRESHOLD": 2,
+            "RUNNER": "worker",
+        }
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.other = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.work = Tag.objects.create(name="trabajo")
+        self.home = Tag.objects.create(name="casa")
+
+    def create(self, user, title, tags=(), completed=False):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(
+            "/api/tasks/",
+            {
+                "title": title,
+                "tags_id": [tag.id for tag in tags],
+                "completed": completed,
+            },
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.data["id"]
+
+    def archive(self, task_id):
+        long_ago = timezone.now() - timedelta(days=200)
+        Task.objects.filter(id=task_id).update(
+            completed_at=long_ago, updated_at=long_ago
+        )
+        assert archive_tasks(days=90) == 1
+
+    def search(self, client, term):
+        response = client.get(f"/api/tasks/?search={term}&include_archived=true")
+        return sorted(task["title"] for task in response.data["results"])
+
+    def test_delete_user_in_batches(self):
+        """Test: las tareas activas y archivadas se borran por lotes con el usuario"""
+        for number in range(5):
+            self.create(self.user, f"tarea {number}", [self.work])
+        self.archive(self.create(self.user, "vieja", [self.work], completed=True))
+        kept = self.create(self.other, "ajena", [self.work])
+        Token.objects.create(user=self.user)
+        batches = []
+
+        assert deletion.delete_user(self.user.pk, progress=batches.append) == 6
+
+        assert batches == [2, 2, 1, 1]
+        assert not User.objects.filter(pk=self.user.pk).exists()
+        assert not Token.objects.filter(user_id=self.user.pk).exists()
+        assert not TaskStats.objects.filter(user_id=self.user.pk).exists()
+        assert not ArchivedTask.objects.exists()
+        assert list(Task.objects.values_list("id", flat=True)) == [kept]
+        assert list(Task.tags.through.objects.values_list("task_id", flat=True)) == [
+            kept
+        ]
+
+    def test_delete_user_queries_per_batch(self, settings):
+        """Test: las consultas dependen de los lotes, no de las tareas"""
+        settings.DELETION = {**settings.DELETION, "BATCH_SIZE": 100}
+        for number in range(3):
+            self.create(self.user, f"tarea {number}", [self.work])
+        for number in range(30):
+            self.create(self.other, f"tarea {number}", [self.work, self.home])
+
+        with track_queries() as few:
+            deletion.delete_user(self.user.pk)
+        with track_queries() as many:
+            deletion.delete_user(self.other.pk)
+
+        assert many.count == few.count
+        assert not Task.objects.exists()
+
+    def test_delete_tag_refreshes_tasks(self):
+        """Test: la etiqueta sale de tag_names y de la busqueda de sus tareas"""
+        for number in range(3):
+            self.create(self.user, f"tarea {number}", [self.work, self.home])
+        self.archive(self.create(self.user, "vieja", [self.work], completed=True))
+        assert len(self.search(self.client, "trabajo")) == 4
+
+        assert deletion.delete_tag(self.work.pk) == 4
+
+        assert not Tag.objects.filter(pk=self.work.pk).exists()
+        assert set(Task.objects.values_list("tag_names", flat=True)) == {"|casa|"}
+        assert ArchivedTask.objects.get().tag_names == ""
+        assert self.search(self.client, "trabajo") == []
+        assert len(self.search(self.client, "casa")) == 3
+
+    def test_delete_tag_updates_tag_stats_per_batch(self):
+        """Test: cada lote descuenta sus tareas de los contadores por etiqueta"""
+        for number in range(3):
+            self.create(self.user, f"tarea {number}", [self.work], completed=True)
+        self.archive(self.create(self.user, "vieja", [self.work], completed=True))
+        counts = []
+
+        def progress(size):
+            row = TaskTagStats.objects.get(user=self.user, tag=self.work)
+            counts.append((row.total, row.completed))
+
+        deletion.delete_tag(self.work.pk, progress=progress)
+
+        assert counts == [(2, 2), (1, 1), (0, 0)]
+        assert TaskStats.objects.get(user=self.user).total == 4
+
+    def test_small_tag_deleted_inline(self):
+        """Test: una etiqueta con pocas tareas se borra en la peticion"""
+        self.create(self.user, "tarea", [self.work])
+
+        response = self.client.delete(f"/api/tags/{self.work.pk}/")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Tag.objects.filter(pk=self.work.pk).exists()
+        assert not DeletionJob.objects.exists()
+
+    def test_large_tag_deleted_in_background(self):
+        """Test: con muchas tareas responde 202 y run_deletions la borra"""
+        for number in range(3):
+            self.create(self.user, f"tarea {number}", [self.work])
+
+        response = self.client.delete(f"/api/tags/{self.work.pk}/")
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["status"] == DeletionJob.PENDING
+        assert Tag.objects.filter(pk=self.work.pk).exists()
+        again = self.client.delete(f"/api/tags/{self.work.pk}/")
+        assert again.data["id"] == response.data["id"]
+
+        call_command("run_deletions", "--once", stdout=StringIO())
+
+        job = self.client.get(response["Location"]).data
+        assert job["status"] == DeletionJob.DONE
+        assert job["deleted"] == job["total"] == 3
+        assert not Tag.objects.filter(pk=self.work.pk).exists()
+        assert set(Task.objects.values_list("tag_names", flat=True)) == {""}
+
+    def test_job_visible_to_requester_and_staff(self):
+        """Test: el avance solo lo ven quien pidio el borrado y staff"""
+        job = deletion.schedule(DeletionJob.TAG, self.work.pk, self.user)
+        url = f"/api/deletions/{job.pk}/"
+        other = APIClient()
+        other.force_authenticate(user=self.other)
+
+        assert self.client.get(url).status_code == status.HTTP_200_OK
+        assert other.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+        self.other.is_staff = True
+        self.other.save()
+        assert other.get(url).status_code == status.HTTP_200_OK
+
+    def test_run_deletions_resumes_stale_jobs(self):
+        """Test: se retoman los borrados parados, no los que avanzan"""
+        stale = deletion.schedule(DeletionJob.TAG, self.work.pk)
+        active = deletion.schedule(DeletionJob.TAG, self.home.pk)
+        DeletionJob.objects.filter(pk__in=[stale.pk, active.pk]).update(
+            status=DeletionJob.RUNNING
+        )
+        DeletionJob.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+
+        call_command("run_deletions", "--once", stdout=StringIO())
+
+        assert DeletionJob.objects.get(pk=stale.pk).status == DeletionJob.DONE
+        assert DeletionJob.objects.get(pk=active.pk).status == DeletionJob.RUNNING
+        assert list(Tag.objects.all()) == [self.home]
+
+    def test_failed_job_records_error(self, monkeypatch):
+        """Test: un error deja el job fallido con el mensaje"""
+
+        def broken(tag_id, **options):
+            raise RuntimeError("sin conexion")
+
+        monkeypatch.setitem(
+            deletion.TARGETS, DeletionJob.TAG, (broken, deletion.count_tag_rows)
+        )
+        job = deletion.schedule(DeletionJob.TAG, self.work.pk)
+        err = StringIO()
+
+        call_command("run_deletions", "--once", stdout=StringIO(), stderr=err)
+
+        job.refresh_from_db()
+        assert job.status == DeletionJob.FAILED
+        assert job.error == "sin conexion"
+        assert "sin conexion" in err.getvalue()
+
+    def test_delete_user_command(self):
+        """Test: el comando informa el avance y borra el usuario"""
+        for number in range(3):
+            self.create(self.user, f"tarea {number}", [self.work])
+        out = StringIO()
+
+        call_command("delete_user", "usuario1", stdout=out)
+
+        assert "2/3 tareas borradas" in out.getvalue()
+        assert not User.objects.filter(username="usuario1").exists()
+        assert DeletionJob.objects.get().status == DeletionJob.DONE
+        with pytest.raises(CommandError, match="No existe el usuario"):
+            call_command("delete_user", "usuario1", stdout=out)
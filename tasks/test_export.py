@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+
+URL = "/api/tasks/export/"
+
+
+@pytest.mark.django_db
+class TestTaskExport:
+    """
+    Tests para la exportacion en streaming de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        for i in range(25):
+            task = Task.objects.create(
+                title=f"tarea {i:02d}", user=self.user1, completed=i % 2 == 0
+            )
+            if i % 5 == 0:
+                task.tags.add(self.tag)
+        Task.objects.create(title="ajena", user=self.user2)
+
+    def read(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_exports_all_tasks(self):
+        """Test: NDJSON con todas las tareas del usuario y sus etiquetas"""
+        response = self.client.get(URL)
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        assert len(lines) == 25
+        assert lines[0]["title"] == "tarea 24"
+        assert lines[-1]["tags"] == [{"id": self.tag.id, "name": "trabajo"}]
+
+    def test_csv_format(self):
+        """Test: ?format=csv devuelve cabecera y una fila por tarea"""
+        response = self.client.get(URL, {"format": "csv"})
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+
+        assert response["Content-Type"].startswith("text/csv")
+        assert len(rows) == 25
+        assert rows[-1]["tags"] == "trabajo"
+        assert rows[-1]["completed"] == "True"
+
+    def test_accepts_list_filters(self):
+        """Test: la exportacion respeta los filtros y el ordenamiento del listado"""
+        response = self.client.get(
+            URL, {"completed": "true", "tags": self.tag.id, "ordering": "title"}
+        )
+        titles = [
+            json.loads(line)["title"] for line in self.read(response).splitlines()
+        ]
+
+        assert titles == ["tarea 00", "tarea 10", "tarea 20"]
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=10)
+    def test_tags_read_from_task_rows(self):
+        """Test: las etiquetas salen de tag_names, sin leer la tabla intermedia"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.read(self.client.get(URL))
+
+        through = [q for q in ctx.captured_queries if "tasks_task_tags" in q["sql"]]
+        assert through == []
+
+    def test_requires_authentication(self):
+        """Test: sin autenticacion se responde 401"""
+        self.client.force_authenticate(user=None)
+
+        assert self.client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,96 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+
+
+def task_selects(ctx):
+    return [
+        query["sql"]
+        for query in ctx.captured_queries
+        if query["sql"].startswith("SELECT") and 'FROM "tasks_task"' in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """
+    Tests para ?fields= y ?omit= en tareas y etiquetas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        for i in range(12):
+            task = Task.objects.create(
+                title=f"tarea {i:02d}", description="x" * 500, user=self.user
+            )
+            task.tags.add(self.tag)
+
+    def test_fields_prune_response_and_columns(self):
+        """Test: solo se serializan y se leen las columnas pedidas"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/", {"fields": "id,title,completed"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"id", "title", "completed"}
+        selects = task_selects(ctx)
+        assert selects
+        assert not any('"description"' in sql for sql in selects)
+        assert not any('"tag_names"' in sql for sql in selects)
+
+    def test_omit(self):
+        """Test: omit quita campos de la representacion completa"""
+        response = self.client.get("/api/tasks/", {"omit": "description,tags"})
+
+        assert "description" not in response.data["results"][0]
+        assert "tags" not in response.data["results"][0]
+        assert "completed" in response.data["results"][0]
+
+    def test_detail_and_conditional_headers(self):
+        """Test: el detalle respeta fields y sigue enviando ETag"""
+        task = Task.objects.first()
+        response = self.client.get(f"/api/tasks/{task.id}/", {"fields": "title,tags"})
+
+        assert response.data == {
+            "title": task.title,
+            "tags": [{"id": self.tag.id, "name": "trabajo"}],
+        }
+        assert response["ETag"]
+
+    def test_cursor_pagination_without_extra_queries(self):
+        """Test: el orden del cursor se lee de la fila aunque no se pida"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                "/api/tasks/",
+                {"fields": "id", "pagination": "cursor", "ordering": "title"},
+            )
+        assert len(task_selects(ctx)) == 1
+
+        next_page = self.client.get(response.data["next"])
+        assert [task["id"] for task in next_page.data["results"]] == [
+            task.id for task in Task.objects.order_by("title")[10:]
+        ]
+
+    def test_unknown_fields(self):
+        """Test: un campo desconocido o de solo escritura responde 400"""
+        response = self.client.get("/api/tasks/", {"fields": "title,tags_id"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "fields" in response.data
+
+    def test_tags_endpoints(self):
+        """Test: las etiquetas tambien aceptan fields"""
+        listing = self.client.get("/api/tags/", {"fields": "name"})
+        detail = self.client.get(f"/api/tags/{self.tag.id}/", {"omit": "name"})
+
+        assert listing.data["results"] == [{"name": "trabajo"}]
+        assert detail.data == {"id": self.tag.id}
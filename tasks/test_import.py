@@ -0,0 +1,133 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks import importer
+from tasks.models import Tag, Task
+
+URL = "/api/tasks/import/"
+
+
+def ndjson(*rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+@pytest.mark.django_db
+class TestTaskImport:
+    """
+    Tests para la importacion masiva de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        Task.objects.create(title="existente", user=self.user)
+
+    def upload(self, name, content):
+        response = self.client.post(
+            URL, {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_ndjson_import_resolves_and_creates_tags(self):
+        """Test: se crean tareas y las etiquetas que faltan"""
+        data = self.upload(
+            "tareas.ndjson",
+            ndjson(
+                {"title": "a", "tags": ["trabajo", "nueva"], "completed": True},
+                {"title": "b", "description": "desc", "tags": [{"name": "nueva"}]},
+            ),
+        )
+
+        assert data["created"] == 2
+        assert data["tags_created"] == 1
+        task = Task.objects.get(user=self.user, title="a")
+        assert task.completed
+        assert sorted(task.tags.values_list("name", flat=True)) == ["nueva", "trabajo"]
+        # La etiqueta nueva ya valida en tags_id
+        nueva = Tag.objects.get(name="nueva")
+        response = self.client.post(
+            "/api/tasks/", {"title": "c", "tags_id": [nueva.id]}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_invalid_and_duplicate_rows_are_reported(self):
+        """Test: filas invalidas y titulos repetidos se informan por linea"""
+        content = ndjson({"title": "existente"}, {"title": "x"}, {"title": "x"})
+        content += b"no es json\n" + ndjson({"description": "sin titulo"})
+        data = self.upload("tareas.jsonl", content)
+
+        assert data["created"] == 1
+        assert data["failed"] == 4
+        assert [error["line"] for error in data["errors"]] == [4, 5, 1, 3]
+
+    def test_titles_taken_during_import_become_row_errors(self, monkeypatch):
+        """Test: titulos ocupados por otra escritura durante el lote se informan"""
+        drop_duplicates = importer.drop_duplicates
+        concurrent = ["a", "b"]
+
+        def racing_drop_duplicates(user, pending, result, using):
+            accepted = drop_duplicates(user, pending, result, using)
+            if concurrent:
+                # Otra peticion crea la tarea despues de la comprobacion
+                Task.objects.create(title=concurrent.pop(0), user=self.user)
+            return accepted
+
+        monkeypatch.setattr(importer, "drop_duplicates", racing_drop_duplicates)
+        stream = io.BytesIO(ndjson({"title": "a"}, {"title": "b"}, {"title": "c"}))
+        result = importer.import_tasks(self.user, stream, "ndjson")
+
+        assert result.created == 1
+        assert [error["line"] for error in result.errors] == [1, 2]
+        assert Task.objects.filter(user=self.user).count() == 4
+
+    def test_csv_import(self):
+        """Test: CSV con cabecera y etiquetas separadas por |"""
+        content = (
+            "title,description,completed,tags\n"
+            "uno,,true,trabajo|casa\n"
+            'dos,"con, coma",false,\n'
+        ).encode()
+        data = self.upload("tareas.csv", content)
+
+        assert data["created"] == 2
+        assert Task.objects.get(title="dos").description == "con, coma"
+        assert Task.objects.get(title="uno").tags.count() == 2
+
+    def test_imported_tasks_are_searchable(self):
+        """Test: las tareas importadas se indexan para la busqueda"""
+        self.upload("tareas.ndjson", ndjson({"title": "reunion con clientes"}))
+
+        response = self.client.get("/api/tasks/", {"search": "clientes"})
+        assert response.data["count"] == 1
+
+    def test_unsupported_format(self):
+        """Test: un archivo con extension desconocida se rechaza"""
+        response = self.client.post(
+            URL, {"file": SimpleUploadedFile("tareas.txt", b"x")}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_management_command(self, tmp_path):
+        """Test: el comando importa por lotes y escribe el archivo de errores"""
+        path = tmp_path / "tareas.ndjson"
+        path.write_bytes(
+            ndjson(*[{"title": f"t{i}"} for i in range(5)], {"title": "existente"})
+        )
+        call_command("import_tasks", str(path), user="usuario1", batch_size=2)
+
+        assert Task.objects.filter(user=self.user).count() == 6
+        errors = (tmp_path / "tareas.ndjson.errors.ndjson").read_text().splitlines()
+        assert json.loads(errors[0])["line"] == 6
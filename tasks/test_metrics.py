@@ -0,0 +1,216 @@
+import re
+import subprocess
+import sys
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from config import metrics
+from config.metrics import MetricsRegistry, RequestTimings
+from tasks.models import Tag
+
+
+def sample(text, name, **labels):
+    """Valor de la serie ``name`` con esas etiquetas en el texto de /metrics."""
+    for line in text.splitlines():
+        series, _, value = line.rpartition(" ")
+        if not series.startswith(name + "{"):
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', series))
+        if found == {key: str(value) for key, value in labels.items()}:
+            return float(value)
+    return None
+
+
+def dead_pid():
+    """Pid de un proceso que ya termino."""
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    """
+    Tests para la cabecera Server-Timing y el endpoint /metrics
+    """
+
+    @pytest.fixture(autouse=True)
+    def registry(self, monkeypatch, settings):
+        """Registro vacio por test (el del proceso acumula entre tests)"""
+        settings.METRICS = {**settings.METRICS, "DIR": "", "TOKEN": ""}
+        self.registry = MetricsRegistry()
+        monkeypatch.setattr(metrics, "_registry", self.registry)
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.work = Tag.objects.create(name="trabajo")
+
+    def timing(self, response):
+        return {
+            entry.split(";")[0]: entry
+            for entry in response["Server-Timing"].split(", ")
+        }
+
+    def test_server_timing_header(self):
+        """Test: la respuesta lleva las fases de la peticion en Server-Timing"""
+        response = self.client.get("/api/tasks/")
+
+        assert response.status_code == status.HTTP_200_OK
+        entries = self.timing(response)
+        assert {"app", "db", "auth", "serialize", "render"} <= set(entries)
+        assert re.fullmatch(r'db;dur=[\d.]+;desc="\d+ queries"', entries["db"])
+
+    def test_query_count_matches_executed_queries(self):
+        """Test: el contador de consultas coincide con las ejecutadas"""
+        self.client.get("/api/tags/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tags/")
+
+        entry = self.timing(response)["db"]
+        assert f'desc="{len(queries)} queries"' in entry
+
+    def test_metrics_endpoint(self, settings):
+        """Test: /metrics agrega por ruta, metodo y codigo de estado"""
+        settings.DEBUG = True
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/999999/")
+
+        text = self.client.get("/metrics").content.decode()
+
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        assert (
+            sample(
+                text,
+                "http_requests_total",
+                method="GET",
+                route="api/tasks/",
+                status=200,
+            )
+            == 2
+        )
+        assert (
+            sample(
+                text,
+                "http_requests_total",
+                method="GET",
+                route="api/tasks/<int:pk>/",
+                status=404,
+            )
+            == 1
+        )
+        labels = {"method": "GET", "route": "api/tasks/"}
+        assert sample(text, "http_request_duration_seconds_count", **labels) == 2
+        assert sample(text, "http_request_db_queries_count", **labels) == 2
+        assert sample(text, "http_response_size_bytes_total", **labels) > 0
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test: los buckets son acumulados y +Inf cuenta todas las peticiones"""
+        labels = (("method", "GET"), ("route", "api/"))
+        for duration in (0.001, 0.02, 0.3, 20):
+            self.registry.record("GET", "api/", 200, duration, RequestTimings(), 0)
+
+        text = self.registry.exposition()
+        name = "http_request_duration_seconds_bucket"
+        counts = [
+            sample(text, name, **dict(labels), le=bound)
+            for bound in (*metrics.LATENCY_BUCKETS, "+Inf")
+        ]
+
+        assert counts == sorted(counts)
+        assert sample(text, name, **dict(labels), le=0.005) == 1
+        assert sample(text, name, **dict(labels), le=0.5) == 3
+        assert counts[-1] == 4
+
+    def test_merges_worker_files(self, tmp_path):
+        """Test: /metrics suma el estado que guarda cada worker en METRICS_DIR"""
+        worker = MetricsRegistry(tmp_path)
+        other = MetricsRegistry(tmp_path)
+        for registry in (worker, other, other):
+            registry.record("GET", "api/", 200, 0.01, RequestTimings(), 10)
+        other.flush()
+
+        text = worker.exposition()
+
+        labels = {"method": "GET", "route": "api/"}
+        assert sample(text, "http_requests_total", **labels, status=200) == 3
+        assert sample(text, "http_response_size_bytes_total", **labels) == 30
+
+    def test_dead_worker_files_are_folded(self, tmp_path):
+        """Test: los archivos de workers terminados se suman a uno solo"""
+        worker = MetricsRegistry(tmp_path)
+        for number in range(2):
+            retired = MetricsRegistry(tmp_path)
+            retired.record("GET", "api/", 200, 0.01, RequestTimings(), 10)
+            retired.flush()
+            # El archivo queda como el de un proceso que ya no existe
+            (tmp_path / retired.filename).rename(
+                tmp_path / f"metrics-{dead_pid()}-{number}.json"
+            )
+
+        first = worker.exposition()
+        second = worker.exposition()
+
+        labels = {"method": "GET", "route": "api/", "status": 200}
+        assert sample(first, "http_requests_total", **labels) == 2
+        assert sample(second, "http_requests_total", **labels) == 2
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == [
+            "metrics-retired.json"
+        ]
+
+    def test_cache_stats(self, settings):
+        """Test: /metrics exporta aciertos y fallos de las caches del proceso"""
+        self.registry.caches = settings.METRICS["CACHES"]
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/")
+
+        text = self.registry.exposition()
+
+        assert sample(text, "cache_hits_total", cache="task_response") == 1
+        assert sample(text, "cache_misses_total", cache="task_response") == 1
+        assert sample(text, "cache_evictions_total", cache="task_response") == 0
+        assert sample(text, "cache_hits_total", cache="auth_token") == 1
+        assert sample(text, "cache_misses_total", cache="auth_token") == 1
+
+    def test_label_values_are_escaped(self):
+        """Test: comillas y barras de las etiquetas se escapan"""
+        self.registry.record("GET", 'a"b\\c', 200, 0.01, RequestTimings(), 0)
+
+        text = self.registry.exposition()
+
+        assert 'route="a\\"b\\\\c"' in text
+
+    def test_token_required(self, settings):
+        """Test: con METRICS_TOKEN, /metrics exige el token Bearer"""
+        settings.METRICS = {**settings.METRICS, "TOKEN": "secreto"}
+        client = APIClient()
+
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/plain")
+
+    def test_fails_closed_without_token(self, settings):
+        """Test: sin METRICS_TOKEN, /metrics solo responde con DEBUG"""
+        client = APIClient()
+
+        assert client.get("/metrics").status_code == status.HTTP_403_FORBIDDEN
+        settings.DEBUG = True
+        assert client.get("/metrics").status_code == status.HTTP_200_OK
+
+    def test_streaming_response(self):
+        """Test: la exportacion en streaming se mide sin consumir el cuerpo"""
+        response = self.client.get("/api/tasks/export/")
+
+        assert response.streaming
+        assert "app" in self.timing(response)
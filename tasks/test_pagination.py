@@ -0,0 +1,101 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+from tasks.pagination import KeysetPagination
+
+
+@pytest.mark.django_db
+class TestTaskCursorPagination:
+    """
+    Tests para la paginacion por cursor (keyset) del listado de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tag = Tag.objects.create(name="trabajo")
+        # 25 tareas: las pares estan completadas y tienen la etiqueta
+        for i in range(25):
+            task = Task.objects.create(
+                title=f"tarea {i:02d}", completed=i % 2 == 0, user=self.user
+            )
+            if i % 2 == 0:
+                task.tags.add(self.tag)
+
+    def walk(self, url):
+        """Recorre todas las paginas siguiendo los enlaces 'next'"""
+        titles = []
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            titles += [task["title"] for task in response.data["results"]]
+            url = response.data["next"]
+        return titles
+
+    def test_page_number_is_default(self):
+        """Test: sin parametros se mantiene la paginacion por numero"""
+        response = self.client.get("/api/tasks/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 25
+        assert len(response.data["results"]) == 10
+
+    def test_cursor_walks_all_tasks_without_duplicates(self):
+        """Test: recorrer por cursor devuelve todas las tareas una sola vez"""
+        titles = self.walk("/api/tasks/?pagination=cursor")
+
+        expected = list(
+            Task.objects.filter(user=self.user)
+            .order_by("-created_at", "-id")
+            .values_list("title", flat=True)
+        )
+        assert titles == expected
+
+    def test_cursor_mode_never_counts_or_offsets(self):
+        """Test: ninguna pagina por cursor ejecuta COUNT ni OFFSET"""
+        first = self.client.get("/api/tasks/?pagination=cursor")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first.data["next"])
+
+        sql = " ".join(query["sql"].upper() for query in ctx.captured_queries)
+        assert "COUNT(" not in sql
+        assert "OFFSET" not in sql
+
+    def test_keyset_filter_bounds_leading_column(self):
+        """Test: el filtro acota el primer campo para recorrer el indice"""
+        condition = KeysetPagination.build_filter(["title", "id"], ["b", 5])
+        sql = str(Task.objects.filter(condition).query)
+
+        assert '"tasks_task"."title" >= b AND' in sql
+        assert '"tasks_task"."title" > b' in sql
+        assert '"tasks_task"."id" > 5' in sql
+
+    def test_cursor_with_filters_and_ordering(self):
+        """Test: el cursor respeta filtros y ordenamiento por titulo"""
+        url = f"/api/tasks/?pagination=cursor&completed=true&tags={self.tag.id}&ordering=title"
+        titles = self.walk(url)
+
+        assert titles == [f"tarea {i:02d}" for i in range(0, 25, 2)]
+
+    def test_previous_link_returns_previous_page(self):
+        """Test: el enlace 'previous' devuelve la pagina anterior"""
+        first = self.client.get("/api/tasks/?pagination=cursor")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        assert back.data["results"] == first.data["results"]
+        assert second.data["previous"] is not None
+
+    def test_invalid_cursor_returns_404(self):
+        """Test: un cursor corrupto devuelve 404"""
+        response = self.client.get("/api/tasks/?cursor=no-es-un-cursor")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
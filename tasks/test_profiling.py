@@ -0,0 +1,174 @@
+import pstats
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from config.profiling import ProfiledRequest, ProfilingMiddleware, profile_token
+from tasks.models import Tag
+
+
+@pytest.mark.django_db
+class TestRequestProfiling:
+    """
+    Tests para el perfilado bajo demanda y los endpoints de perfiles
+    """
+
+    @pytest.fixture(autouse=True)
+    def profiles_dir(self, settings, tmp_path):
+        """Perfiles en un directorio temporal, sin muestreo"""
+        settings.PROFILING = {
+            **settings.PROFILING,
+            "DIR": str(tmp_path),
+            "SAMPLE_RATE": 0,
+            "MAX_PROFILES": 50,
+        }
+        self.profiles = tmp_path
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.admin = User.objects.create_user(
+            username="admin", password="pass123", is_staff=True
+        )
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(user=self.admin)
+        Tag.objects.create(name="trabajo")
+
+    def profiled_get(self, url, path="/"):
+        return self.client.get(url, HTTP_X_PROFILE=profile_token(path))
+
+    def test_not_profiled_without_trigger(self):
+        """Test: sin cabecera ni muestreo no se guarda nada"""
+        response = self.client.get("/api/tasks/")
+
+        assert "X-Profile-Id" not in response
+        assert list(self.profiles.iterdir()) == []
+
+    def test_signed_header_profiles_request(self):
+        """Test: con un token valido se guarda el perfil con su SQL"""
+        response = self.profiled_get("/api/tags/?page=1")
+
+        profile_id = response["X-Profile-Id"]
+        stats = pstats.Stats(str(self.profiles / f"{profile_id}.prof"))
+        assert stats.total_calls > 0
+
+        detail = self.admin_client.get(f"/api/profiles/{profile_id}/").data
+        assert detail["path"] == "/api/tags/"
+        assert detail["query_string"] == "page=1"
+        assert detail["trigger"] == "header"
+        assert detail["user_id"] == self.user.pk
+        assert detail["query_count"] == len(detail["queries"]) > 0
+        assert 'FROM "tasks_tag"' in detail["queries"][-1]["sql"]
+        assert "cumulative" in detail["summary"]
+
+    def test_concurrent_request_served_without_profile(self):
+        """Test: mientras otra peticion se perfila, la nueva responde sin perfil"""
+        active = ProfiledRequest("header")
+        assert active.start()
+        try:
+            response = self.profiled_get("/api/tags/")
+        finally:
+            active.stop()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "X-Profile-Id" not in response
+        assert "X-Profile-Id" in self.profiled_get("/api/tags/")
+
+    def test_invalid_or_other_path_token_ignored(self):
+        """Test: un token alterado o de otra ruta no perfila"""
+        tampered = self.client.get("/api/tasks/", HTTP_X_PROFILE="x:y:z")
+        other_path = self.profiled_get("/api/tasks/", path="/api/tags/")
+
+        assert "X-Profile-Id" not in tampered
+        assert "X-Profile-Id" not in other_path
+
+    def test_sampling_only_for_staff(self, settings):
+        """Test: el muestreo solo perfila peticiones de staff"""
+        settings.PROFILING = {**settings.PROFILING, "SAMPLE_RATE": 1.0}
+        staff_token = Token.objects.create(user=self.admin)
+        user_token = Token.objects.create(user=self.user)
+        client = APIClient()
+
+        staff = client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Token {staff_token.key}")
+        user = client.get("/api/tasks/", HTTP_AUTHORIZATION=f"Token {user_token.key}")
+
+        assert "X-Profile-Id" in staff
+        assert "X-Profile-Id" not in user
+
+    def test_sampling_under_asgi(self, settings):
+        """Test: bajo ASGI el muestreo autentica y guarda fuera del event loop"""
+        settings.PROFILING = {**settings.PROFILING, "SAMPLE_RATE": 1.0}
+        staff_token = Token.objects.create(user=self.admin)
+
+        async def get_response(request):
+            return HttpResponse("ok")
+
+        middleware = ProfilingMiddleware(get_response)
+        request = RequestFactory().get(
+            "/api/tasks/", HTTP_AUTHORIZATION=f"Token {staff_token.key}"
+        )
+        response = async_to_sync(middleware)(request)
+
+        profile_id = response["X-Profile-Id"]
+        assert (self.profiles / f"{profile_id}.prof").exists()
+
+    def test_ring_buffer_keeps_latest(self, settings):
+        """Test: solo se conservan los MAX_PROFILES perfiles mas recientes"""
+        settings.PROFILING = {**settings.PROFILING, "MAX_PROFILES": 2}
+        ids = [self.profiled_get("/api/tags/")["X-Profile-Id"] for _ in range(3)]
+
+        response = self.admin_client.get("/api/profiles/")
+
+        assert [profile["id"] for profile in response.data] == ids[:0:-1]
+        assert len(list(self.profiles.glob("*.prof"))) == 2
+        assert "queries" not in response.data[0]
+
+    def test_download(self):
+        """Test: el volcado de cProfile se descarga como adjunto"""
+        profile_id = self.profiled_get("/api/tags/")["X-Profile-Id"]
+
+        response = self.admin_client.get(f"/api/profiles/{profile_id}/download/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert f'filename="{profile_id}.prof"' in response["Content-Disposition"]
+        assert (
+            b"".join(response.streaming_content)
+            == (self.profiles / f"{profile_id}.prof").read_bytes()
+        )
+
+    def test_endpoints_admin_only(self):
+        """Test: los perfiles solo los ven administradores"""
+        profile_id = self.profiled_get("/api/tags/")["X-Profile-Id"]
+
+        for url in (
+            "/api/profiles/",
+            f"/api/profiles/{profile_id}/",
+            f"/api/profiles/{profile_id}/download/",
+        ):
+            assert self.client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_unknown_or_invalid_id(self):
+        """Test: ids inexistentes o con otra forma devuelven 404"""
+        assert self.admin_client.get("/api/profiles/1-1/").status_code == 404
+        response = self.admin_client.get("/api/profiles/..%2Fsecret/download/")
+        assert response.status_code == 404
+
+    def test_profile_token_command(self):
+        """Test: el comando genera un token valido para la cabecera"""
+        out = StringIO()
+        call_command("profile_token", "--path", "/api/tags/", stdout=out)
+        token = out.getvalue().splitlines()[0].removeprefix("X-Profile: ")
+
+        response = self.client.get("/api/tags/", HTTP_X_PROFILE=token)
+
+        assert "X-Profile-Id" in response
@@ -0,0 +1,115 @@
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import get_resolver
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from config.query_budget import QueryBudgetExceeded, query_shape, track_queries
+from tasks.models import Tag, Task
+from tasks.views import TagListCreateView, TaskImportView
+
+# Sin presupuesto fijo: las consultas crecen con los lotes del archivo
+UNBUDGETED_VIEWS = {TaskImportView}
+
+
+def api_views(resolver=None):
+    """Vistas DRF de las URLs del proyecto."""
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from api_views(pattern)
+            continue
+        view = getattr(pattern.callback, "view_class", None)
+        if view is not None and issubclass(view, APIView):
+            yield view
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """
+    Tests para el presupuesto de consultas y la deteccion de N+1
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.work = Tag.objects.create(name="trabajo")
+
+    def test_query_shape_collapses_lists(self):
+        """Test: la forma no depende del numero de parametros de IN y VALUES"""
+        assert query_shape("SELECT 1 WHERE id IN (%s, %s, %s)") == query_shape(
+            "SELECT 1 WHERE id IN (%s)"
+        )
+        assert query_shape("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == (
+            "INSERT INTO t (a, b) VALUES (...)"
+        )
+
+    def test_views_declare_budgets(self):
+        """Test: todas las vistas de la API declaran su presupuesto"""
+        views = set(api_views()) - UNBUDGETED_VIEWS
+        missing = [
+            view.__name__
+            for view in views
+            if view.__module__.startswith(("tasks", "accounts"))
+            and getattr(view, "query_budget", None) is None
+        ]
+        assert missing == []
+
+    def test_over_budget_raises(self, monkeypatch):
+        """Test: en modo raise una vista por encima de su presupuesto falla"""
+        monkeypatch.setattr(TagListCreateView, "query_budget", {"POST": 0})
+
+        with pytest.raises(QueryBudgetExceeded, match="presupuesto 0"):
+            self.client.post("/api/tags/", {"name": "casa"})
+
+    def test_log_mode(self, monkeypatch, settings, caplog):
+        """Test: en modo log se avisa con el informe y la peticion sigue"""
+        settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, "MODE": "log"}
+        monkeypatch.setattr(TagListCreateView, "query_budget", {"POST": 0})
+
+        with caplog.at_level(logging.WARNING, logger="config.query_budget"):
+            response = self.client.post("/api/tags/", {"name": "casa"})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert "POST /api/tags/" in caplog.text
+        assert "INSERT INTO" in caplog.text
+
+    def test_detects_n_plus_one_with_call_site(self):
+        """Test: la misma consulta en un bucle se informa con su origen"""
+        for number in range(5):
+            Task.objects.create(title=f"tarea {number}", user=self.user)
+
+        with track_queries() as log:
+            for task in Task.objects.all():
+                task.user.username
+
+        [(shape, times, site)] = log.repeated(threshold=5)
+        assert times == 5
+        assert 'FROM "auth_user"' in shape
+        assert site.startswith("tasks/test_query_budget.py:")
+
+    def test_fixture_within_budget(self, query_budget):
+        """Test: el listado cabe en su presupuesto con muchas tareas"""
+        for number in range(30):
+            self.client.post(
+                "/api/tasks/",
+                {"title": f"tarea {number}", "tags_id": [self.work.id]},
+                format="json",
+            )
+
+        with query_budget(3) as log:
+            response = self.client.get("/api/tasks/?page_size=30")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert log.count <= 3
+
+    def test_fixture_fails_over_budget(self, query_budget):
+        """Test: el fixture falla con el informe si se supera el presupuesto"""
+        with pytest.raises(pytest.fail.Exception, match="2 consultas, presupuesto 1"):
+            with query_budget(1):
+                Tag.objects.count()
+                Task.objects.count()
@@ -0,0 +1,151 @@
+import gzip
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from tasks.middleware import GzipEncoder, choose_encoder
+from tasks.models import Task
+from tasks.renderers import FastJSONRenderer
+
+
+class TestFastJSONRenderer:
+    """
+    Tests para el renderer JSON con orjson
+    """
+
+    def test_output_matches_drf_renderer(self):
+        """Test: misma salida byte a byte que JSONRenderer de DRF"""
+        data = {
+            "title": "reunión   café",
+            "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456, dt_timezone.utc),
+            "amount": Decimal("1.50"),
+            "lazy": gettext_lazy("texto"),
+            1: [True, None, 2.5, {"nested": []}],
+        }
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_falls_back_to_drf(self):
+        """Test: con indent (API navegable) se usa el renderer de DRF"""
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=4"
+
+        assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(
+            data, media_type
+        )
+
+
+@pytest.mark.django_db
+class TestJSONAndCompression:
+    """
+    Tests para el parser JSON y la compresion negociada de respuestas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for i in range(10):
+            Task.objects.create(
+                title=f"tarea {i}", description="descripcion " * 10, user=self.user
+            )
+
+    def test_list_identical_with_stdlib_backend(self):
+        """Test: el listado es identico con orjson y con json estandar"""
+        fast = self.client.get("/api/tasks/?ordering=title")
+        with override_settings(
+            API_JSON_BACKEND="stdlib", TASK_RESPONSE_CACHE={"ENABLED": False}
+        ):
+            slow = self.client.get("/api/tasks/?ordering=title")
+
+        assert fast.content == slow.content
+
+    def test_parser_accepts_and_rejects_json(self):
+        """Test: cuerpo JSON valido crea la tarea; invalido responde 400"""
+        created = self.client.post(
+            "/api/tasks/", {"title": "nueva ñ", "tags_id": []}, format="json"
+        )
+        invalid = self.client.generic(
+            "POST", "/api/tasks/", "{titulo", content_type="application/json"
+        )
+
+        assert created.status_code == status.HTTP_201_CREATED
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+        assert "JSON parse error" in invalid.data["detail"]
+
+    def test_gzip_negotiated(self):
+        """Test: con Accept-Encoding gzip el listado se comprime"""
+        plain = self.client.get("/api/tasks/")
+        compressed = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip")
+
+        assert "Content-Encoding" not in plain
+        assert compressed["Content-Encoding"] == "gzip"
+        assert compressed["Vary"].endswith("Accept-Encoding")
+        assert compressed["ETag"].startswith('W/"')
+        assert gzip.decompress(compressed.content) == plain.content
+
+    def test_threshold_and_refusal(self):
+        """Test: respuestas cortas o gzip;q=0 no se comprimen"""
+        task = Task.objects.first()
+        small = self.client.get(f"/api/tasks/{task.id}/", HTTP_ACCEPT_ENCODING="gzip")
+        refused = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip;q=0, br")
+
+        assert "Content-Encoding" not in small
+        assert "Content-Encoding" not in refused
+
+    @override_settings(
+        RESPONSE_COMPRESSION={
+            "ENABLED": True,
+            "ENCODINGS": ["gzip"],
+            "MIN_SIZE": 0,
+            "GZIP_LEVEL": 1,
+            "BROTLI_QUALITY": 4,
+            "ZSTD_LEVEL": 3,
+        }
+    )
+    def test_weak_etag_accepted_by_if_match(self):
+        """Test: el ETag debilitado por la compresion sirve para If-Match"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        task = Task.objects.first()
+        etag = client.get(f"/api/tasks/{task.id}/", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        response = client.patch(
+            f"/api/tasks/{task.id}/",
+            {"completed": True},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+
+        assert etag.startswith("W/")
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_streaming_export_compressed(self):
+        """Test: la exportacion en streaming se comprime por bloques"""
+        plain = b"".join(self.client.get("/api/tasks/export/").streaming_content)
+        response = self.client.get("/api/tasks/export/", HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(b"".join(response.streaming_content)) == plain
+
+    def test_choose_encoder_by_quality(self):
+        """Test: gana el mayor q; a igualdad, el orden del servidor"""
+
+        class Brotli(GzipEncoder):
+            name = "br"
+
+        encoders = [Brotli(4), GzipEncoder(6)]
+
+        assert choose_encoder("gzip, br", encoders).name == "br"
+        assert choose_encoder("gzip;q=1, br;q=0.5", encoders).name == "gzip"
+        assert choose_encoder("*;q=0.1, br;q=0", encoders).name == "gzip"
+        assert choose_encoder("identity", encoders) is None
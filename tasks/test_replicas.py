@@ -0,0 +1,222 @@
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from config import replicas
+from config.replicas import ReplicaRouter, ReplicaRoutingMiddleware, ReplicaSet
+from tasks.models import Task
+
+REPLICAS = {
+    "ALIASES": ["replica1"],
+    "PIN_SECONDS": 10,
+    "MAX_LAG": 5,
+    "LAG_CHECK_INTERVAL": 60,
+    "PIN_CACHE": "default",
+}
+
+
+class StubReplicaSet(ReplicaSet):
+    """Retrasos fijos en lugar de consultar las replicas."""
+
+    def __init__(self, lags, **kwargs):
+        super().__init__(list(lags), **kwargs)
+        self.lags = lags
+        self.measured = 0
+
+    def measure_lag(self, alias):
+        self.measured += 1
+        return self.lags[alias]
+
+
+class TestReplicaRouting:
+    """
+    Tests para el enrutado de lecturas a replicas con fijacion al primario
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        caches["default"].clear()
+
+    @pytest.fixture(autouse=True)
+    def replica_set(self, monkeypatch, settings):
+        settings.DATABASE_REPLICAS = REPLICAS
+        monkeypatch.setattr(replicas, "_replica_set", StubReplicaSet({"replica1": 0.0}))
+
+    def view(self, status=200):
+        """Vista que responde con el alias al que iria una lectura."""
+
+        def get_response(request):
+            return HttpResponse(self.router.db_for_read(Task), status=status)
+
+        return get_response
+
+    def call(self, method, token, status=200):
+        request = getattr(self.factory, method)(
+            "/api/tasks/", HTTP_AUTHORIZATION=f"Token {token}"
+        )
+        response = ReplicaRoutingMiddleware(self.view(status))(request)
+        return response.content.decode()
+
+    def test_lag_aware_choice(self):
+        """Test: replicas atrasadas o caidas se descartan; sin ninguna, primario"""
+        replica_set = StubReplicaSet(
+            {"replica1": 0.5, "replica2": 30.0, "replica3": None}, max_lag=5
+        )
+        down = StubReplicaSet({"replica1": None})
+
+        assert replica_set.healthy() == ["replica1"]
+        assert down.choose() == "default"
+        # El retraso se mide una vez por intervalo
+        replica_set.choose()
+        assert replica_set.measured == 3
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test: sin middleware (comandos, escrituras) se lee del primario"""
+        assert self.router.db_for_read(Task) == "default"
+        assert self.router.db_for_write(Task) == "default"
+
+    def test_safe_reads_go_to_replica(self):
+        """Test: GET lee de la replica; POST siempre del primario"""
+        assert self.call("get", "a") == "replica1"
+        assert self.call("post", "a") == "default"
+
+    def test_client_pinned_after_write(self):
+        """Test: tras escribir, ese cliente lee del primario; los demas no"""
+        self.call("post", "a", status=201)
+
+        assert self.call("get", "a") == "default"
+        assert self.call("get", "b") == "replica1"
+
+    def test_failed_write_does_not_pin(self):
+        """Test: una escritura fallida (400) no fija al cliente"""
+        self.call("post", "a", status=400)
+
+        assert self.call("get", "a") == "replica1"
+
+    def test_async_middleware(self):
+        """Test: bajo ASGI la decision llega al hilo sincrono del ORM"""
+
+        async def get_response(request):
+            alias = await sync_to_async(self.router.db_for_read)(Task)
+            return HttpResponse(alias)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = self.factory.get("/", HTTP_AUTHORIZATION="Token a")
+
+        assert async_to_sync(middleware)(request).content == b"replica1"
+
+
+REPLICA = "replica_test"
+
+
+@pytest.fixture(scope="module")
+def replica_database(django_db_setup, django_db_blocker):
+    """
+    Segunda base SQLite en memoria registrada como alias ``replica_test``
+    solo durante este modulo. No replica nada: lo que se escribe en el
+    primario no aparece en ella, asi que los resultados delatan que
+    conexion atendio cada lectura.
+    """
+    database = {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+    connections.settings[REPLICA] = connections.configure_settings(
+        {"default": connections.settings["default"], REPLICA: database}
+    )[REPLICA]
+    creation = connections[REPLICA].creation
+    with django_db_blocker.unblock():
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    yield REPLICA
+    with django_db_blocker.unblock():
+        creation.destroy_test_db(":memory:", verbosity=0)
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+
+
+@pytest.mark.django_db(databases=["default", REPLICA])
+class TestReplicaDatabases:
+    """
+    Tests del enrutado con dos bases de datos reales (primario y replica)
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, replica_database, monkeypatch, settings):
+        """Usuario y token en ambas bases; la tarea solo en el primario"""
+        settings.DATABASE_REPLICAS = {**REPLICAS, "ALIASES": [REPLICA]}
+        monkeypatch.setattr(replicas, "_replica_set", ReplicaSet([REPLICA]))
+        caches["default"].clear()
+
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.user.save(using=REPLICA)
+        self.token.save(using=REPLICA)
+        Task.objects.create(title="solo en el primario", user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_tasks(self, client=None):
+        """Listado y consultas de tasks_task de cada conexion."""
+        with (
+            CaptureQueriesContext(connections["default"]) as primary,
+            CaptureQueriesContext(connections[REPLICA]) as replica,
+        ):
+            response = (client or self.client).get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+
+        def task_queries(ctx):
+            return [q for q in ctx.captured_queries if '"tasks_task"' in q["sql"]]
+
+        return response, task_queries(primary), task_queries(replica)
+
+    def test_reads_are_served_by_replica(self):
+        """Test: el GET lee de la replica, que no tiene la tarea del primario"""
+        response, primary, replica = self.get_tasks()
+
+        assert response.data["count"] == 0
+        assert replica
+        assert not primary
+
+    def test_export_streams_from_replica(self):
+        """Test: la exportacion lee sus bloques de la replica al enviarse"""
+        response = self.client.get("/api/tasks/export/")
+        assert response.status_code == status.HTTP_200_OK
+
+        with (
+            CaptureQueriesContext(connections["default"]) as primary,
+            CaptureQueriesContext(connections[REPLICA]) as replica,
+        ):
+            content = b"".join(response.streaming_content)
+
+        assert content == b""
+        assert any('"tasks_task"' in q["sql"] for q in replica.captured_queries)
+        assert not any('"tasks_task"' in q["sql"] for q in primary.captured_queries)
+
+    def test_write_pins_client_to_primary(self):
+        """Test: tras un POST el cliente lee del primario; otro cliente no"""
+        created = self.client.post("/api/tasks/", {"title": "nueva"})
+        assert created.status_code == status.HTTP_201_CREATED
+        assert not Task.objects.using(REPLICA).exists()
+
+        response, primary, replica = self.get_tasks()
+        assert response.data["count"] == 2
+        assert primary
+        assert not replica
+
+        other = User.objects.create_user(username="usuario2", password="pass123")
+        other_token = Token.objects.create(user=other)
+        other.save(using=REPLICA)
+        other_token.save(using=REPLICA)
+        other_client = APIClient()
+        other_client.credentials(HTTP_AUTHORIZATION=f"Token {other_token.key}")
+        _, primary, replica = self.get_tasks(other_client)
+        assert replica
+        assert not primary
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.cache import get_response_cache
+from tasks.models import Tag, Task
+from tasks.rows import TaskRows
+from tasks.serializers import TaskSerializer
+
+
+@pytest.mark.django_db
+class TestTaskRows:
+    """
+    Tests para la ruta rapida de lectura (filas en vez de TaskSerializer)
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.work = Tag.objects.create(name="trabajo")
+        self.home = Tag.objects.create(name="casa")
+        for i in range(12):
+            task = Task.objects.create(
+                title=f"reunion {i:02d}",
+                description="" if i % 4 else f"notas ñ {i}",
+                user=self.user1,
+                completed=i % 2 == 0,
+            )
+            if i % 3 == 0:
+                task.tags.add(self.work, self.home)
+            elif i % 3 == 1:
+                task.tags.add(self.home)
+        self.other_task = Task.objects.create(title="ajena", user=self.user2)
+
+    def get_both(self, url):
+        """Respuesta por filas y por TaskSerializer (sin cache entre ambas)."""
+        fast = self.client.get(url)
+        get_response_cache().clear()
+        with override_settings(TASK_FAST_READ_PATH=False):
+            slow = self.client.get(url)
+        return fast, slow
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "",
+            "?page=2&ordering=title",
+            "?completed=true&ordering=-tags__name",
+            "?search=reunion",
+            "?pagination=cursor&ordering=tags__name",
+            "?fields=id,tags,created_at&ordering=created_at",
+            "?omit=description,tags",
+        ],
+    )
+    def test_list_is_byte_for_byte_identical(self, query):
+        """Test: el listado por filas es identico al del serializer"""
+        fast, slow = self.get_both("/api/tasks/" + query)
+
+        assert fast.status_code == status.HTTP_200_OK
+        assert fast.content == slow.content
+        assert fast["ETag"] == slow["ETag"]
+
+    def test_detail_is_byte_for_byte_identical(self):
+        """Test: el detalle por filas es identico y respeta al propietario"""
+        task = Task.objects.filter(user=self.user1, completed=True).first()
+        fast, slow = self.get_both(f"/api/tasks/{task.id}/")
+        other = self.client.get(f"/api/tasks/{self.other_task.id}/")
+
+        assert fast.content == slow.content
+        assert fast["ETag"] == slow["ETag"]
+        assert other.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_page_is_read_with_one_query(self):
+        """Test: la pagina se lee en una consulta, sin instancias ni JOIN"""
+        # Carga el snapshot de etiquetas
+        self.client.get("/api/tasks/")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/?pagination=cursor")
+
+        assert len(response.data["results"]) == 10
+        assert len(ctx.captured_queries) == 1
+        assert "JOIN" not in ctx.captured_queries[0]["sql"]
+
+    def test_rows_match_serializer_directly(self):
+        """Test: TaskRows.represent coincide con TaskSerializer(many=True).data"""
+        queryset = Task.objects.filter(user=self.user1).order_by("id")
+        serializer = TaskSerializer()
+        rows = TaskRows.for_serializer(serializer)
+
+        represented = rows.represent(rows.queryset(queryset))
+
+        assert represented == TaskSerializer(queryset, many=True).data
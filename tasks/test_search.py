@@ -0,0 +1,91 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+from tasks.search import rebuild_search_index
+
+
+@pytest.mark.django_db
+class TestTaskSearch:
+    """
+    Tests para la busqueda de texto completo de tareas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user1 = User.objects.create_user(username="usuario1", password="pass123")
+        self.user2 = User.objects.create_user(username="usuario2", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+        self.tag_trabajo = Tag.objects.create(name="trabajo")
+
+        self.reunion = Task.objects.create(
+            title="Reunión importante",
+            description="con el cliente",
+            user=self.user1,
+        )
+        self.reunion.tags.add(self.tag_trabajo)
+        self.compras = Task.objects.create(
+            title="comprar viveres",
+            description="despues de la reunion",
+            completed=True,
+            user=self.user1,
+        )
+        Task.objects.create(title="reunion ajena", user=self.user2)
+
+    def search(self, query):
+        response = self.client.get(f"/api/tasks/?{query}")
+        assert response.status_code == status.HTTP_200_OK
+        return [task["title"] for task in response.data["results"]]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test: el titulo pesa mas que la descripcion y no hay tareas ajenas"""
+        assert self.search("search=reunion") == [
+            "Reunión importante",
+            "comprar viveres",
+        ]
+
+    def test_search_prefix_matching(self):
+        """Test: la busqueda coincide por prefijo"""
+        assert self.search("search=compr") == ["comprar viveres"]
+
+    def test_search_combined_with_filters(self):
+        """Test: la busqueda se combina con los filtros existentes"""
+        assert self.search("search=reunion&completed=true") == ["comprar viveres"]
+
+    def test_search_by_tag_name_follows_tag_changes(self):
+        """Test: el indice se actualiza al asignar y renombrar etiquetas"""
+        assert self.search("search=trabajo") == ["Reunión importante"]
+
+        self.compras.tags.add(self.tag_trabajo)
+        self.tag_trabajo.name = "oficina"
+        self.tag_trabajo.save()
+
+        assert self.search("search=trabajo") == []
+        assert sorted(self.search("search=oficina")) == [
+            "Reunión importante",
+            "comprar viveres",
+        ]
+
+    def test_search_follows_task_updates_and_deletes(self):
+        """Test: editar o borrar una tarea actualiza el indice"""
+        self.client.patch(f"/api/tasks/{self.compras.id}/", {"title": "pagar luz"})
+        assert self.search("search=pagar") == ["pagar luz"]
+
+        self.client.delete(f"/api/tasks/{self.compras.id}/")
+        assert self.search("search=pagar") == []
+
+    def test_search_ignores_query_syntax(self):
+        """Test: los operadores del motor no rompen la busqueda"""
+        assert self.search('search="reunion*:(') == [
+            "Reunión importante",
+            "comprar viveres",
+        ]
+
+    def test_rebuild_search_index(self):
+        """Test: la reconstruccion indexa todas las tareas"""
+        assert rebuild_search_index() == Task.objects.count()
+        assert self.search("search=viveres") == ["comprar viveres"]
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task, TaskStats
+from tasks.stats import get_stats, rebuild_stats
+
+URL = "/api/tasks/stats/"
+
+
+@pytest.mark.django_db
+class TestTaskStats:
+    """
+    Tests para las estadisticas por usuario mantenidas de forma incremental
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.work = Tag.objects.create(name="trabajo")
+        self.home = Tag.objects.create(name="casa")
+
+    def create(self, title, **data):
+        response = self.client.post("/api/tasks/", {"title": title, **data})
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.data["id"]
+
+    def assert_matches_rebuild(self):
+        """Los contadores incrementales coinciden con recalcularlos desde cero"""
+        incremental = get_stats(self.user)
+        rebuild_stats([self.user])
+        assert incremental == get_stats(self.user)
+
+    def test_endpoint(self):
+        """Test: totales, tareas por etiqueta y completadas por dia"""
+        self.create("a", completed=True, tags_id=[self.work.id])
+        self.create("b", tags_id=[self.work.id, self.home.id])
+
+        response = self.client.get(URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 2
+        assert response.data["completed"] == 1
+        assert response.data["pending"] == 1
+        assert response.data["tags"] == [
+            {"id": self.work.id, "name": "trabajo", "total": 2, "completed": 1},
+            {"id": self.home.id, "name": "casa", "total": 1, "completed": 0},
+        ]
+        assert response.data["completed_per_day"] == [
+            {"day": timezone.localdate().isoformat(), "completed": 1}
+        ]
+
+    def test_updates_and_deletes_keep_counters_exact(self):
+        """Test: completar, reabrir, cambiar etiquetas y borrar"""
+        first = self.create("a", tags_id=[self.work.id])
+        second = self.create("b", completed=True)
+
+        self.client.patch(
+            f"/api/tasks/{first}/",
+            {"completed": True, "tags_id": [self.home.id]},
+            format="json",
+        )
+        self.client.patch(f"/api/tasks/{second}/", {"completed": False}, format="json")
+        self.assert_matches_rebuild()
+        assert Task.objects.get(pk=second).completed_at is None
+
+        self.client.delete(f"/api/tasks/{first}/")
+        stats = get_stats(self.user)
+        assert (stats["total"], stats["completed"], stats["tags"]) == (1, 0, [])
+        self.assert_matches_rebuild()
+
+    def test_failed_write_leaves_counters_untouched(self):
+        """Test: un titulo duplicado revierte tambien los contadores"""
+        self.create("a", completed=True)
+        response = self.client.post("/api/tasks/", {"title": "a"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert TaskStats.objects.get(user=self.user).total == 1
+
+    def test_bulk_and_import(self):
+        """Test: operaciones masivas e importacion actualizan los contadores"""
+        first = self.create("a", tags_id=[self.work.id])
+        second = self.create("b")
+        self.client.post(
+            "/api/tasks/bulk/",
+            {
+                "operations": [
+                    {"action": "update", "id": first, "data": {"completed": True}},
+                    {"action": "delete", "id": second},
+                    {
+                        "action": "create",
+                        "data": {"title": "c", "tags_id": [self.home.id]},
+                    },
+                ]
+            },
+            format="json",
+        )
+        content = json.dumps({"title": "d", "completed": True, "tags": ["nueva"]})
+        self.client.post(
+            "/api/tasks/import/",
+            {"file": SimpleUploadedFile("tareas.ndjson", content.encode())},
+            format="multipart",
+        )
+
+        stats = get_stats(self.user)
+        assert (stats["total"], stats["completed"]) == (3, 2)
+        self.assert_matches_rebuild()
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test: rebuild_task_stats corrige contadores desincronizados"""
+        self.create("a", completed=True)
+        TaskStats.objects.filter(user=self.user).update(total=40, completed=-3)
+
+        call_command("rebuild_task_stats", user=["usuario1"])
+
+        stats = self.client.get(URL).data
+        assert (stats["total"], stats["completed"]) == (1, 1)
+
+    def test_days_validation(self):
+        """Test: days fuera de rango responde 400"""
+        response = self.client.get(URL, {"days": 0})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,116 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+
+
+@pytest.mark.django_db
+class TestTaskTagNames:
+    """
+    Tests para la columna desnormalizada Task.tag_names
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.work = Tag.objects.create(name="trabajo")
+        self.home = Tag.objects.create(name="casa")
+        self.urgent = Tag.objects.create(name="urgente")
+
+    def create(self, title, tags):
+        response = self.client.post(
+            "/api/tasks/", {"title": title, "tags_id": [tag.id for tag in tags]}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        return Task.objects.get(pk=response.data["id"])
+
+    def test_serializer_keeps_names_sorted(self):
+        """Test: crear y actualizar etiquetas mantiene tag_names ordenado"""
+        task = self.create("a", [self.work, self.home])
+        assert task.tag_names == "|casa|trabajo|"
+
+        self.client.patch(
+            f"/api/tasks/{task.id}/", {"tags_id": [self.urgent.id]}, format="json"
+        )
+        task.refresh_from_db()
+        assert task.tag_names == "|urgente|"
+
+        self.client.patch(f"/api/tasks/{task.id}/", {"tags_id": []}, format="json")
+        task.refresh_from_db()
+        assert task.tag_names == ""
+
+    def test_rename_and_delete_tag(self):
+        """Test: renombrar o borrar una etiqueta actualiza sus tareas"""
+        task = self.create("a", [self.work, self.home])
+
+        self.client.patch(f"/api/tags/{self.work.id}/", {"name": "oficina"})
+        task.refresh_from_db()
+        assert task.tag_names == "|casa|oficina|"
+        response = self.client.get("/api/tasks/", {"search": "oficina"})
+        assert response.data["count"] == 1
+
+        self.client.delete(f"/api/tags/{self.home.id}/")
+        task.refresh_from_db()
+        assert task.tag_names == "|oficina|"
+
+    def test_reverse_side_changes(self):
+        """Test: cambios desde la etiqueta (tag.task_set) tambien se reflejan"""
+        task = self.create("a", [self.work])
+        self.home.task_set.add(task)
+        self.work.task_set.clear()
+
+        task.refresh_from_db()
+        assert task.tag_names == "|casa|"
+
+    def test_ordering_by_tag_name_without_join(self):
+        """Test: ordenar por tags__name no duplica filas ni hace JOIN"""
+        self.create("b", [self.work, self.urgent])
+        self.create("a", [self.home, self.work])
+        self.create("c", [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/", {"ordering": "tags__name"})
+        cursor = self.client.get(
+            "/api/tasks/", {"ordering": "-tags__name", "pagination": "cursor"}
+        )
+
+        assert [task["title"] for task in response.data["results"]] == ["c", "a", "b"]
+        assert [task["title"] for task in cursor.data["results"]] == ["b", "a", "c"]
+        assert not any("JOIN" in query["sql"] for query in ctx.captured_queries)
+
+    def test_filter_by_tag_ids(self):
+        """Test: ?tags acepta varios ids (cualquiera) y rechaza ids inexistentes"""
+        self.create("a", [self.work])
+        self.create("b", [self.home, self.urgent])
+        self.create("c", [])
+
+        response = self.client.get(
+            f"/api/tasks/?tags={self.work.id}&tags={self.urgent.id}&ordering=title"
+        )
+        invalid = self.client.get("/api/tasks/", {"tags": 999})
+
+        assert [task["title"] for task in response.data["results"]] == ["a", "b"]
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_filter_is_case_exact(self):
+        """Test: ?tags de la etiqueta Casa no devuelve las tareas de casa"""
+        capitalized = Tag.objects.create(name="Casa")
+        self.create("a", [self.home])
+        self.create("b", [capitalized])
+
+        response = self.client.get("/api/tasks/", {"tags": capitalized.id})
+
+        assert [task["title"] for task in response.data["results"]] == ["b"]
+
+    def test_separator_not_allowed_in_tag_names(self):
+        """Test: el separador | no se acepta en el nombre de una etiqueta"""
+        response = self.client.post("/api/tags/", {"name": "a|b"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,89 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tasks.models import Tag, Task
+from tasks.tags import VERSION_KEY, get_tag_snapshot
+
+
+@pytest.mark.django_db
+class TestTagSnapshot:
+    """
+    Tests para el snapshot en memoria de etiquetas
+    """
+
+    def setup_method(self):
+        """Configuracion que se ejecuta antes de cada test"""
+        self.user = User.objects.create_user(username="usuario1", password="pass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tag_trabajo = Tag.objects.create(name="trabajo")
+        self.tag_personal = Tag.objects.create(name="personal")
+        for i in range(5):
+            task = Task.objects.create(title=f"tarea {i}", user=self.user)
+            task.tags.add(self.tag_trabajo, self.tag_personal)
+
+    def test_list_renders_tags_without_tag_queries(self):
+        """Test: el listado solo lee tasks_task (etiquetas desde tag_names)"""
+        get_tag_snapshot().all()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/tasks/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["tags"] == [
+            {"id": self.tag_personal.id, "name": "personal"},
+            {"id": self.tag_trabajo.id, "name": "trabajo"},
+        ]
+        sql = [query["sql"] for query in ctx.captured_queries]
+        assert not any('FROM "tasks_tag"' in query for query in sql)
+        assert not any("tasks_task_tags" in query for query in sql)
+
+    def test_tags_id_validated_against_snapshot(self):
+        """Test: tags_id se valida sin consultas y rechaza ids inexistentes"""
+        get_tag_snapshot().all()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/tasks/", {"title": "nueva", "tags_id": [999]}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "tags_id" in response.data
+        # Solo la recarga forzada por el id desconocido
+        assert len(ctx.captured_queries) == 1
+
+    def test_tag_endpoints_served_from_memory(self):
+        """Test: /api/tags/ y su detalle no consultan la base de datos"""
+        get_tag_snapshot().all()
+        with CaptureQueriesContext(connection) as ctx:
+            listing = self.client.get("/api/tags/")
+            detail = self.client.get(f"/api/tags/{self.tag_personal.id}/")
+
+        assert [tag["name"] for tag in listing.data["results"]] == [
+            "trabajo",
+            "personal",
+        ]
+        assert detail.data == {"id": self.tag_personal.id, "name": "personal"}
+        assert len(ctx.captured_queries) == 0
+        assert self.client.get("/api/tags/999/").status_code == 404
+
+    def test_rename_reloads_snapshot(self):
+        """Test: renombrar una etiqueta se refleja en las tareas"""
+        self.client.get("/api/tasks/")
+        self.client.patch(f"/api/tags/{self.tag_trabajo.id}/", {"name": "oficina"})
+
+        response = self.client.get(f"/api/tags/{self.tag_trabajo.id}/")
+        assert response.data["name"] == "oficina"
+
+    def test_other_worker_change_is_detected(self):
+        """Test: un cambio de version publicado por otro proceso fuerza la recarga"""
+        snapshot = get_tag_snapshot()
+        snapshot.all()
+        # Otro worker renombra la etiqueta e incrementa la version compartida
+        Tag.objects.filter(pk=self.tag_trabajo.pk).update(name="oficina")
+        snapshot.cache.incr(VERSION_KEY)
+
+        assert snapshot.get(self.tag_trabajo.pk).name == "oficina"
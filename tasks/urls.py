@@ -1,17 +1,40 @@
+from django.conf import settings
 from django.urls import path
 
+from .async_views import (
+    AsyncTagListCreateView,
+    AsyncTagRetrieveUpdateDestroyView,
+    AsyncTaskListCreateView,
+    AsyncTaskRetrieveUpdateDestroyView,
+)
 from .views import (
+    DeletionJobView,
     TagListCreateView,
     TagRetrieveUpdateDestroyView,
+    TaskBulkView,
+    TaskExportView,
+    TaskImportView,
     TaskListCreateView,
     TaskRetrieveUpdateDestroyView,
+    TaskStatsView,
 )
 
+if settings.TASKS_ASYNC_VIEWS:
+    # Servidor ASGI: mismas rutas con vistas que usan el ORM asincrono
+    task_list, task_detail = AsyncTaskListCreateView, AsyncTaskRetrieveUpdateDestroyView
+    tag_list, tag_detail = AsyncTagListCreateView, AsyncTagRetrieveUpdateDestroyView
+else:
+    task_list, task_detail = TaskListCreateView, TaskRetrieveUpdateDestroyView
+    tag_list, tag_detail = TagListCreateView, TagRetrieveUpdateDestroyView
+
 urlpatterns = [
-    path("tasks/", TaskListCreateView.as_view(), name="task-list"),
-    path(
-        "tasks/<int:pk>/", TaskRetrieveUpdateDestroyView.as_view(), name="task-detail"
-    ),
-    path("tags/", TagListCreateView.as_view(), name="tag-list"),
-    path("tags/<int:pk>/", TagRetrieveUpdateDestroyView.as_view(), name="tag-detail"),
+    path("tasks/", task_list.as_view(), name="task-list"),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="task-bulk"),
+    path("tasks/export/", TaskExportView.as_view(), name="task-export"),
+    path("tasks/import/", TaskImportView.as_view(), name="task-import"),
+    path("tasks/stats/", TaskStatsView.as_view(), name="task-stats"),
+    path("tasks/<int:pk>/", task_detail.as_view(), name="task-detail"),
+    path("tags/", tag_list.as_view(), name="tag-list"),
+    path("tags/<int:pk>/", tag_detail.as_view(), name="tag-detail"),
+    path("deletions/<int:pk>/", DeletionJobView.as_view(), name="deletion-detail"),
 ]
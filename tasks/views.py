@@ -1,40 +1,122 @@
-from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import IntegrityError, router
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import filters, generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
 
-from .models import Tag, Task
+from . import archive, bulk, deletion, export, importer, stats
+from .filters import (
+    TaskFilter,
+    TaskFilterBackend,
+    TaskOrderingFilter,
+    TaskSearchFilter,
+)
+from .mixins import (
+    CachedResponseMixin,
+    ConditionalRequestMixin,
+    SparseFieldsetMixin,
+)
+from .models import DeletionJob, Tag, Task, TaskRecord
+from .pagination import TaskPagination
 from .permissions import IsOwner
-from .serializers import TagSerializer, TaskSerializer
+from .rows import TaskRowsMixin
+from .serializers import (
+    BulkRequestSerializer,
+    DeletionJobSerializer,
+    TagSerializer,
+    TaskImportSerializer,
+    TaskSerializer,
+    TaskStatsQuerySerializer,
+    TaskStatsSerializer,
+    duplicate_title_error,
+)
+from .tags import get_tag_snapshot
+
+# ?fields= / ?omit= de los GET de tareas y etiquetas
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Campos a incluir, separados por comas (p. ej. id,title,completed)",
+    ),
+    OpenApiParameter(
+        name="omit",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Campos a excluir, separados por comas (p. ej. description,tags)",
+    ),
+]
+
+INCLUDE_ARCHIVED_PARAMETER = OpenApiParameter(
+    name=archive.INCLUDE_ARCHIVED_PARAM,
+    type=OpenApiTypes.BOOL,
+    location=OpenApiParameter.QUERY,
+    description="Incluir las tareas archivadas (completadas hace tiempo)",
+)
+
+
+class TaskFieldsetMixin(SparseFieldsetMixin):
+    # Campo del serializer -> columnas de tasks_task que necesita
+    fieldset_columns = {
+        "title": ["title"],
+        "description": ["description"],
+        "completed": ["completed"],
+        "created_at": ["created_at"],
+        "tags": ["tag_names"],
+    }
+    # Propietario (IsOwner), ETag/Last-Modified y orden por defecto
+    required_columns = ("user", "updated_at", "created_at")
 
 
 # Vista para listar y crear tareas
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(
+    TaskRowsMixin,
+    TaskFieldsetMixin,
+    CachedResponseMixin,
+    ConditionalRequestMixin,
+    generics.ListCreateAPIView,
+):
     """
     Vista para listar todas las tareas (GET) y crear una nueva tarea (POST).
     """
 
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    # Consultas por peticion (config/query_budget.py); incluyen la primera
+    # lectura del token y del snapshot de etiquetas. POST: alta, etiquetas,
+    # indice de busqueda y contadores
+    query_budget = {"GET": 5, "POST": 20}
+    # Paginacion por numero de pagina o por cursor (?pagination=cursor)
+    pagination_class = TaskPagination
     filter_backends = [
-        DjangoFilterBackend,
-        filters.OrderingFilter,
-        filters.SearchFilter,
+        TaskFilterBackend,
+        TaskOrderingFilter,
+        TaskSearchFilter,
     ]
 
-    # Filtrar por tareas completadas o por etiquetas (por id)
-    filterset_fields = ["completed", "tags"]
+    # Filtrar por tareas completadas o por etiquetas (por id, sobre tag_names)
+    filterset_class = TaskFilter
     # Permitir ordenar por fecha de creación, título o nombre de etiqueta
+    # (tags__name se resuelve con la columna tag_names)
     ordering_fields = ["created_at", "title", "tags__name"]
     # Permitir buscar por título, descripción o nombre de etiqueta
-    search_fields = ["title", "description", "tags__name"]
+    # (texto completo; estos campos solo se usan en motores sin soporte)
+    search_fields = ["title", "description", "tag_names"]
 
     def get_queryset(self):
         # Para spectacular: evitar error cuando no hay usuario autenticado
         if getattr(self, "swagger_fake_view", False):
             return Task.objects.none()
-        return Task.objects.filter(user=self.request.user).order_by("-created_at")
+        # Solo tareas activas salvo ?include_archived=true (tasks.archive)
+        model = archive.task_model(self.request)
+        return model.objects.filter(user=self.request.user).order_by("-created_at")
 
     def perform_create(self, serializer):
         # Asociar automáticamente el usuario a la tarea
@@ -61,7 +143,7 @@ class TaskListCreateView(generics.ListCreateAPIView):
                 name="search",
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
-                description="Buscar en título, descripción o nombre de etiqueta",
+                description="Buscar en título, descripción o nombre de etiqueta (texto completo, por prefijo y ordenado por relevancia)",
             ),
             OpenApiParameter(
                 name="ordering",
@@ -69,9 +151,12 @@ class TaskListCreateView(generics.ListCreateAPIView):
                 location=OpenApiParameter.QUERY,
                 description="Ordenar por: created_at, title, tags__name (usar - para orden descendente)",
             ),
+            INCLUDE_ARCHIVED_PARAMETER,
+            *FIELDSET_PARAMETERS,
         ],
         responses={
             200: TaskSerializer(many=True),
+            400: {"description": "Campo desconocido en fields u omit"},
             401: {"description": "No autenticado"},
         },
     )
@@ -96,23 +181,60 @@ class TaskListCreateView(generics.ListCreateAPIView):
 
 
 # Vista para ver, actualizar o eliminar una tarea individual
-class TaskRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class TaskRetrieveUpdateDestroyView(
+    TaskRowsMixin,
+    TaskFieldsetMixin,
+    CachedResponseMixin,
+    ConditionalRequestMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated, IsOwner]
+    # Cambiar etiquetas toca tag_names, busqueda y contadores por etiqueta;
+    # una tarea archivada se restaura antes de escribir
+    query_budget = {"GET": 4, "PUT": 30, "PATCH": 30, "DELETE": 18}
 
     def get_queryset(self):
         # Para spectacular: evitar error cuando no hay usuario autenticado
         if getattr(self, "swagger_fake_view", False):
             return Task.objects.none()
-        # Restringe el acceso a las tareas del usuario autenticado
-        return Task.objects.filter(user=self.request.user)
+        # Restringe el acceso a las tareas del usuario autenticado; las
+        # lecturas tambien encuentran las archivadas
+        model = TaskRecord if self.request.method in SAFE_METHODS else Task
+        return model.objects.filter(user=self.request.user)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            # PUT/PATCH/DELETE de una tarea archivada: vuelve antes a tasks_task
+            if self.request.method in SAFE_METHODS:
+                raise
+            pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            try:
+                restored = archive.restore_tasks(self.request.user, [pk])
+            except IntegrityError:
+                # Mientras estaba archivada otra tarea tomo su titulo
+                raise duplicate_title_error() from None
+            if not restored:
+                raise
+            return super().get_object()
+
+    def perform_destroy(self, instance):
+        # Descuenta la tarea de las estadisticas en la misma transaccion
+        change = stats.StatsChange()
+        change.remove([instance])
+        instance.delete()
+        change.save()
 
     @extend_schema(
         summary="Obtener tarea específica",
-        description="Obtiene los detalles de una tarea específica del usuario autenticado",
+        description="Obtiene los detalles de una tarea específica del usuario autenticado, aunque este archivada",
         tags=["Tasks"],
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: TaskSerializer,
+            304: {"description": "La tarea no cambio (If-None-Match)"},
             401: {"description": "No autenticado"},
             403: {"description": "No tienes permisos para acceder a esta tarea"},
             404: {"description": "Tarea no encontrada"},
@@ -132,6 +254,7 @@ class TaskRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             401: {"description": "No autenticado"},
             403: {"description": "No tienes permisos para modificar esta tarea"},
             404: {"description": "Tarea no encontrada"},
+            412: {"description": "La tarea cambio desde el ETag de If-Match"},
         },
     )
     def put(self, request, *args, **kwargs):
@@ -148,6 +271,7 @@ class TaskRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             401: {"description": "No autenticado"},
             403: {"description": "No tienes permisos para modificar esta tarea"},
             404: {"description": "Tarea no encontrada"},
+            412: {"description": "La tarea cambio desde el ETag de If-Match"},
         },
     )
     def patch(self, request, *args, **kwargs):
@@ -162,22 +286,195 @@ class TaskRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             401: {"description": "No autenticado"},
             403: {"description": "No tienes permisos para eliminar esta tarea"},
             404: {"description": "Tarea no encontrada"},
+            412: {"description": "La tarea cambio desde el ETag de If-Match"},
         },
     )
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
 
+# Vista para crear, actualizar y eliminar tareas en lote
+class TaskBulkView(generics.GenericAPIView):
+    serializer_class = BulkRequestSerializer
+    permission_classes = [IsAuthenticated]
+    # Constante: el lote se valida y se escribe por conjuntos (tasks.bulk)
+    query_budget = {"POST": 25}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["max_operations"] = settings.TASK_BULK_MAX_OPERATIONS
+        return context
+
+    @extend_schema(
+        summary="Operaciones masivas de tareas",
+        description=(
+            "Aplica hasta TASK_BULK_MAX_OPERATIONS operaciones (create, update, "
+            "delete) sobre las tareas del usuario en una sola peticion. Cada "
+            "operacion tiene su propio resultado; las invalidas no se aplican."
+        ),
+        tags=["Tasks"],
+        request=BulkRequestSerializer,
+        responses={
+            200: {"description": "Resultado por operacion"},
+            400: {"description": "Cuerpo invalido o demasiadas operaciones"},
+            401: {"description": "No autenticado"},
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.execute(request.user, serializer.validated_data["operations"])
+        return Response({"results": results})
+
+
+# Vista para exportar todas las tareas del usuario en streaming
+class TaskExportView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    # Solo hasta empezar el streaming; los bloques se leen despues
+    query_budget = {"GET": 3}
+    renderer_classes = [export.NDJSONRenderer, export.CSVRenderer]
+    pagination_class = None
+    # Mismos filtros y ordenamientos que el listado
+    filter_backends = TaskListCreateView.filter_backends
+    filterset_class = TaskListCreateView.filterset_class
+    ordering_fields = TaskListCreateView.ordering_fields
+    search_fields = TaskListCreateView.search_fields
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Task.objects.none()
+        model = archive.task_model(self.request)
+        return model.objects.filter(user=self.request.user).order_by(
+            "-created_at", "-id"
+        )
+
+    @extend_schema(
+        summary="Exportar tareas",
+        description=(
+            "Devuelve todas las tareas del usuario en NDJSON (por defecto) o "
+            "CSV (?format=csv o Accept: text/csv), en streaming y sin "
+            "paginar. Acepta los mismos filtros que el listado."
+        ),
+        tags=["Tasks"],
+        parameters=[INCLUDE_ARCHIVED_PARAMETER],
+        responses={
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            (200, "text/csv"): OpenApiTypes.STR,
+            401: {"description": "No autenticado"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # Los bloques se leen al enviar la respuesta, cuando
+        # ReplicaRoutingMiddleware ya restablecio replica_reads: la base de
+        # lectura se decide aqui, dentro de la peticion
+        queryset = queryset.using(router.db_for_read(queryset.model))
+        renderer = request.accepted_renderer
+        records = export.iter_records(queryset, settings.TASK_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            renderer.stream(records),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks.{renderer.format}"'
+        )
+        return response
+
+
+# Vista para importar tareas desde un archivo NDJSON o CSV
+class TaskImportView(generics.GenericAPIView):
+    serializer_class = TaskImportSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="Importar tareas",
+        description=(
+            "Crea tareas del usuario a partir de un archivo .ndjson o .csv "
+            "(campos title, description, completed y tags por nombre; en CSV "
+            "separados por '|'). Las etiquetas que no existen se crean. Las "
+            "filas invalidas o con titulo repetido se omiten y se informan."
+        ),
+        tags=["Tasks"],
+        request={"multipart/form-data": TaskImportSerializer},
+        responses={
+            200: {"description": "Resumen de la importacion y errores por fila"},
+            400: {"description": "Archivo ausente o con formato no soportado"},
+            401: {"description": "No autenticado"},
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        try:
+            result = importer.import_tasks(
+                request.user,
+                upload,
+                importer.detect_format(upload.name, upload.content_type or ""),
+                batch_size=settings.TASK_IMPORT_BATCH_SIZE,
+                max_errors=settings.TASK_IMPORT_MAX_REPORTED_ERRORS,
+            )
+        except importer.ImportFileError as exc:
+            raise ValidationError({"file": [str(exc)]}) from exc
+        return Response({**result.summary(), "errors": result.errors})
+
+
+# Vista de estadisticas del usuario (contadores mantenidos en tasks.stats)
+class TaskStatsView(generics.GenericAPIView):
+    serializer_class = TaskStatsSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 5}
+
+    @extend_schema(
+        summary="Estadisticas de tareas",
+        description=(
+            "Totales de tareas completadas y pendientes, tareas por etiqueta y "
+            "completadas por dia de los ultimos ?days dias (30 por defecto). "
+            "Se leen de contadores por usuario, sin recorrer sus tareas."
+        ),
+        tags=["Tasks"],
+        parameters=[TaskStatsQuerySerializer],
+        responses={
+            200: TaskStatsSerializer,
+            400: {"description": "Parametro days invalido"},
+            401: {"description": "No autenticado"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        query = TaskStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = stats.get_stats(request.user, days=query.validated_data["days"])
+        tags = get_tag_snapshot().get_many([row["tag_id"] for row in data["tags"]])
+        data["tags"] = [
+            {"id": row["tag_id"], "name": tags[row["tag_id"]].name, **row}
+            for row in data["tags"]
+            if row["tag_id"] in tags
+        ]
+        return Response(self.get_serializer(data).data)
+
+
 # Vista para listar y crear etiquetas
-class TagListCreateView(generics.ListCreateAPIView):
-    queryset = Tag.objects.all()
+class TagListCreateView(SparseFieldsetMixin, generics.ListCreateAPIView):
+    queryset = Tag.objects.order_by("id")
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 4, "POST": 4}
+
+    def list(self, request, *args, **kwargs):
+        # Se sirve desde el snapshot en memoria (ordenado por id)
+        page = self.paginate_queryset(get_tag_snapshot().all())
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(get_tag_snapshot().all(), many=True)
+        return Response(serializer.data)
 
     @extend_schema(
         summary="Listar todas las etiquetas",
         description="Obtiene la lista completa de etiquetas disponibles en el sistema",
         tags=["Tags"],
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: TagSerializer(many=True),
             401: {"description": "No autenticado"},
@@ -202,15 +499,41 @@ class TagListCreateView(generics.ListCreateAPIView):
 
 
 # Vista para ver, actualizar o eliminar una etiqueta individual
-class TagRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class TagRetrieveUpdateDestroyView(
+    SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
+    # Renombrar o borrar actualiza tag_names y la busqueda de sus tareas
+    query_budget = {"GET": 3, "PUT": 14, "PATCH": 14, "DELETE": 17}
+
+    def retrieve(self, request, *args, **kwargs):
+        # Lectura desde el snapshot; las escrituras siguen yendo a la base
+        tag = get_tag_snapshot().get(kwargs[self.lookup_field])
+        if tag is None:
+            raise Http404
+        return Response(self.get_serializer(tag).data)
+
+    def destroy(self, request, *args, **kwargs):
+        # Con muchas tareas, el Collector las cargaria todas en una sola
+        # transaccion: se quita de ellas por lotes fuera de la peticion
+        tag = self.get_object()
+        if not deletion.tag_exceeds(tag.pk, settings.DELETION["ASYNC_THRESHOLD"]):
+            self.perform_destroy(tag)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        job = deletion.schedule(DeletionJob.TAG, tag.pk, request.user)
+        return Response(
+            DeletionJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("deletion-detail", args=[job.pk])},
+        )
 
     @extend_schema(
         summary="Obtener etiqueta específica",
         description="Obtiene los detalles de una etiqueta específica por su ID",
         tags=["Tags"],
+        parameters=FIELDSET_PARAMETERS,
         responses={
             200: TagSerializer,
             401: {"description": "No autenticado"},
@@ -252,9 +575,14 @@ class TagRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     @extend_schema(
         summary="Eliminar etiqueta",
-        description="Elimina permanentemente una etiqueta específica del sistema",
+        description=(
+            "Elimina permanentemente una etiqueta específica del sistema. Si "
+            "la usan muchas tareas se borra por lotes en segundo plano: "
+            "responde 202 con el borrado, consultable en Location"
+        ),
         tags=["Tags"],
         responses={
+            202: DeletionJobSerializer,
             204: {"description": "Etiqueta eliminada exitosamente"},
             401: {"description": "No autenticado"},
             404: {"description": "Etiqueta no encontrada"},
@@ -262,3 +590,29 @@ class TagRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     )
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
+
+
+# Vista del avance de un borrado por lotes (tasks.deletion)
+class DeletionJobView(generics.RetrieveAPIView):
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3}
+
+    def get_queryset(self):
+        # Cada usuario ve los borrados que pidio; staff, todos
+        if self.request.user.is_staff:
+            return DeletionJob.objects.all()
+        return DeletionJob.objects.filter(requested_by=self.request.user)
+
+    @extend_schema(
+        summary="Estado de un borrado",
+        description="Avance de un borrado por lotes (filas borradas sobre el total estimado)",
+        tags=["Tags"],
+        responses={
+            200: DeletionJobSerializer,
+            401: {"description": "No autenticado"},
+            404: {"description": "Borrado no encontrado"},
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)